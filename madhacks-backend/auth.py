@@ -1,12 +1,15 @@
+import asyncio
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, Request
 from pydantic import BaseModel, Field
-from firebase_admin import auth
 
-from google.cloud.firestore_v1 import SERVER_TIMESTAMP
-
-from db.firebase import db
+from db import get_store
+from db.base import SERVER_TIMESTAMP, ConflictError
+from services.admission import admission
+from services.call_policy import call_policy
+from services.firebase_app import get_app
+from services.token_cache import token_verifier
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -28,32 +31,33 @@ class UserResponse(BaseModel):
 
 @router.post("", response_model=UserResponse)
 def create_or_update_user(req: AuthRequest):
-    """Create or update a user in Firestore. Creates on first registration with created_at."""
+    """Create or update a user document. Creates on first registration with created_at."""
     try:
         user_id = req.user_id.strip()
         user_name = req.user_name.strip()
         user_email = req.email.strip()
-        doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-        doc = doc_ref.get()
+        store = get_store()
+        path = f"{USERS_COLLECTION}/{user_id}"
+        doc = store.get(path, [("created_at",)])
 
         if not doc.exists:
-            doc_ref.set(
-                {
-                    "user_id": user_id,
-                    "user_name": user_name,
-                    "user_email": user_email,
-                    "created_at": SERVER_TIMESTAMP,
-                }
-            )
+            try:
+                store.create(
+                    path,
+                    {
+                        "user_id": user_id,
+                        "user_name": user_name,
+                        "user_email": user_email,
+                        "created_at": SERVER_TIMESTAMP,
+                    },
+                )
+            except ConflictError:
+                # Registered concurrently; fall back to a plain field update.
+                store.merge(path, {("user_name",): user_name, ("user_email",): user_email})
             created_at = None
         else:
-            doc_ref.update(
-                {
-                    "user_name": user_name,
-                    "user_email": user_email,
-                }
-            )
-            data = doc.to_dict()
+            store.update(path, {("user_name",): user_name, ("user_email",): user_email})
+            data = doc.data
             created_at = data.get("created_at")
             if hasattr(created_at, "isoformat"):
                 created_at = created_at.isoformat()
@@ -74,11 +78,10 @@ def create_or_update_user(req: AuthRequest):
 def get_user(user_id: str):
     """Get user details by user_id."""
     try:
-        doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-        doc = doc_ref.get()
+        doc = get_store().get(f"{USERS_COLLECTION}/{user_id}")
         if not doc.exists:
             raise HTTPException(status_code=404, detail="User not found")
-        data = doc.to_dict()
+        data = doc.data
         email_val = data.get("user_email") or data.get("email", "")
         created_at = data.get("created_at")
         if hasattr(created_at, "isoformat"):
@@ -102,13 +105,59 @@ def verify_firebase_token(authorization: str = Header(...)):
     Expect header:
     Authorization: Bearer <ID_TOKEN>
     """
+    scheme, _, token = authorization.strip().partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Missing bearer token")
     try:
-        token = authorization.split(" ")[1]
-        decoded_token = auth.verify_id_token(token)
-        return decoded_token
+        return token_verifier.verify(token)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+async def client_key(request: Request, authorization: Optional[str] = Header(None)) -> str:
+    """Rate-limit key: the Firebase uid for a valid bearer token, the client IP otherwise."""
+    scheme, _, token = (authorization or "").strip().partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        try:
+            claims = await asyncio.to_thread(token_verifier.verify, token.strip())
+            return f"uid:{claims['uid']}"
+        except Exception:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def uid_of(key: str) -> Optional[str]:
+    """The verified Firebase uid behind a client_key() value; None for anonymous clients."""
+    return key[len("uid:"):] if key.startswith("uid:") else None
+
+
+def admit_request(kind: str):
+    """
+    Dependency running services.admission for a model-backed request of
+    `kind` and starting its model-call deadline. Async so the context it
+    tags is the request's own.
+    """
+
+    async def dependency(key: str = Depends(client_key)) -> str:
+        admission.admit(key, kind)
+        call_policy.begin()
+        return key
+
+    return dependency
+
+@router.post("/revoke")
+def revoke_sessions(user: dict = Depends(verify_firebase_token)):
+    """Sign the caller out everywhere: revoke their refresh tokens and drop cached ID tokens."""
+    from firebase_admin import auth as firebase_auth
+
+    try:
+        firebase_auth.revoke_refresh_tokens(user["uid"], app=get_app())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    dropped = token_verifier.invalidate_uid(user["uid"])
+    return {"ok": True, "cached_tokens_dropped": dropped}
+
+
 @router.get("/auth")
 def protected_route(user=Depends(verify_firebase_token)):
     return {
@@ -0,0 +1,25 @@
+"""
+Benchmarks for the backend. Run from madhacks-backend/:
+
+    python -m bench.e2e      # whole app, fake model + in-memory storage
+    python -m bench.micro    # parsing and checklist-walk hot paths
+    python -m bench.startup  # cold start: import time per module
+
+Results go to bench/results/ and each run is compared with the previous
+one of the same kind. Importing this package points every cache and the
+document store at throwaway locations before llm/server are imported.
+"""
+
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="madhacks-bench-")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("CONCEPTS_CACHE_PATH", "")
+os.environ.setdefault("RESOURCE_INDEX_PATH", os.path.join(_tmp, "resources.sqlite3"))
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(_tmp, "jobs.sqlite3"))
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+# Every bench client shares one IP; measure throughput, not the rate limits.
+os.environ.setdefault("ADMISSION_USER_RATE_PER_MINUTE", "0")
+os.environ.setdefault("ADMISSION_MAX_QUEUE", "100000")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
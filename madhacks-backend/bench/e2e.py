@@ -0,0 +1,214 @@
+"""
+End-to-end load benchmark: drives the FastAPI app in-process (httpx ASGI
+transport, no sockets) with a mixed workload at increasing concurrency.
+
+    python -m bench.e2e --levels 1,8,32,64 --requests 400 --latency 0.05
+
+The model is bench.fakes.FakeModel, storage is the in-memory document
+store and auth is overridden to trust "Bearer <uid>". Roadmap reads send
+the last ETag seen for the user, like a browser would. Per level it reports
+p50/p95/p99 per endpoint, requests/sec and resident memory.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any
+
+import bench  # noqa: F401  (sets storage/cache env before the app is imported)
+import httpx
+from fastapi import Header
+
+import auth
+import db
+import llm
+import server
+from bench.fakes import CORE_TOPICS, DSA_TOPICS, FakeModel, install, roadmap_output
+from bench.report import delta, latest_result, rss_mb, save_result, summarize
+from db.memory import MemoryStore
+
+DEFAULT_MIX = "concepts=15,roadmap=5,save=10,get=30,putitem=30,putitems=10"
+SEED_DAYS = 30
+
+
+def _trust_bearer(authorization: str = Header(...)) -> dict:
+    return {"uid": authorization.split()[-1]}
+
+
+def _profile() -> dict:
+    return {
+        "dsa_topics": {t: {"importance": 10 - i, "confidence": 3} for i, t in enumerate(DSA_TOPICS)},
+        "core_fundamentals": {t: {"importance": 8 - i, "confidence": 5} for i, t in enumerate(CORE_TOPICS)},
+    }
+
+
+class Workload:
+    def __init__(self, mix: dict[str, int], users: int, companies: int, seed: int) -> None:
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.users = [f"bench-user-{i}" for i in range(users)]
+        self.companies = [f"Company {i}" for i in range(companies)]
+        self.rng = random.Random(seed)
+        self.saved = llm._extract_json(roadmap_output(SEED_DAYS))
+        self.urls = [
+            item["url"] for day in self.saved["roadmap"] for item in day["checklist"]
+        ]
+        self.etags: dict[str, str] = {}
+
+    def observe(self, op: str, path: str, response: httpx.Response) -> None:
+        if op == "get" and response.headers.get("etag"):
+            self.etags[path.rsplit("=", 1)[-1]] = response.headers["etag"]
+
+    def next_request(self) -> tuple[str, str, str, dict[str, Any] | None, dict[str, str]]:
+        """(op, method, path, json body, headers)"""
+        rng = self.rng
+        op = rng.choices(self.ops, self.weights)[0]
+        user = rng.choice(self.users)
+        headers = {"Authorization": f"Bearer {user}"}
+        company = rng.choice(self.companies)
+
+        if op == "concepts":
+            body = {"role": "Software Engineer", "company": company, "jobLink": ""}
+            return op, "POST", "/api/concepts", body, headers
+        if op == "roadmap":
+            body = {
+                "role": "Software Engineer",
+                "company": company,
+                "prepDays": rng.choice([7, 14, 30]),
+                "hoursPerDay": 2,
+                "conceptProfile": _profile(),
+            }
+            return op, "POST", "/api/roadmap", body, headers
+        if op == "save":
+            body = {"company_name": company, "roadmap_json": self.saved}
+            return op, "POST", "/api/roadmap/save", body, headers
+        if op == "get":
+            if user in self.etags:
+                headers["If-None-Match"] = self.etags[user]
+            return op, "GET", f"/api/roadmap?user_id={user}", None, headers
+        if op == "putitem":
+            body = {"url": rng.choice(self.urls), "checked": rng.random() < 0.5}
+            return op, "POST", "/api/roadmap/putitem", body, headers
+        items = [{"url": u, "checked": True} for u in rng.sample(self.urls, 5)]
+        return op, "POST", "/api/roadmap/putitems", {"items": items}, headers
+
+
+async def _seed(client: httpx.AsyncClient, workload: Workload) -> None:
+    for user in workload.users:
+        r = await client.post(
+            "/api/roadmap/save",
+            json={"company_name": workload.companies[0], "roadmap_json": workload.saved},
+            headers={"Authorization": f"Bearer {user}"},
+        )
+        r.raise_for_status()
+
+
+async def run_level(client: httpx.AsyncClient, workload: Workload, concurrency: int, total: int) -> dict:
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            op, method, path, body, headers = workload.next_request()
+            started = time.perf_counter()
+            try:
+                r = await client.request(method, path, json=body, headers=headers)
+                ok = r.status_code < 400
+                workload.observe(op, path, r)
+            except Exception:
+                ok = False
+            samples[op].append(time.perf_counter() - started)
+            if not ok:
+                errors[op] += 1
+
+    llm.concepts_cache.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    everything = [s for values in samples.values() for s in values]
+    return {
+        "concurrency": concurrency,
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(everything) / elapsed, 1),
+        "latency": summarize(everything),
+        "endpoints": {
+            op: {**summarize(values), "errors": errors.get(op, 0)}
+            for op, values in sorted(samples.items())
+        },
+        "rss_mb": rss_mb(),
+    }
+
+
+async def main(args: argparse.Namespace) -> list[dict]:
+    mix = {k: int(v) for k, v in (part.split("=") for part in args.mix.split(","))}
+    levels = [int(x) for x in args.levels.split(",")]
+
+    db.set_store(MemoryStore())
+    model = FakeModel(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    restore = install(model)
+    server.app.dependency_overrides[auth.verify_firebase_token] = _trust_bearer
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    workload = Workload(mix, args.users, args.companies, args.seed)
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await _seed(client, workload)
+            for level in levels:
+                if args.tracemalloc:
+                    tracemalloc.reset_peak()
+                result = await run_level(client, workload, level, args.requests)
+                result["model_calls"] = model.calls
+                if args.tracemalloc:
+                    result["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                results.append(result)
+    finally:
+        restore()
+        server.app.dependency_overrides.pop(auth.verify_firebase_token, None)
+    return results
+
+
+def _print(results: list[dict], previous: dict | None) -> None:
+    before = {r["concurrency"]: r for r in (previous or {}).get("results", [])}
+    for r in results:
+        old = before.get(r["concurrency"], {})
+        lat = r["latency"]
+        print(
+            f"c={r['concurrency']:<4} {r['rps']:>8.1f} req/s{delta(r['rps'], old.get('rps'))}"
+            f"  p50 {lat['p50_ms']:.1f}ms  p95 {lat['p95_ms']:.1f}ms"
+            f"  p99 {lat['p99_ms']:.1f}ms{delta(lat['p99_ms'], old.get('latency', {}).get('p99_ms'))}"
+            f"  errors {r['errors']}  rss {r['rss_mb']}MB"
+        )
+        for op, s in r["endpoints"].items():
+            print(f"    {op:<9} n={s['count']:<5} p50 {s['p50_ms']:.1f}  p95 {s['p95_ms']:.1f}  p99 {s['p99_ms']:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,8,32,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=400, help="requests per level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="op=weight pairs")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency jitter fraction")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also record Python heap peak")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    _print(results, latest_result("e2e"))
+    if not args.no_save:
+        print("saved", save_result("e2e", results, vars(args)))
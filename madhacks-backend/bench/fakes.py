@@ -0,0 +1,178 @@
+"""
+Deterministic stand-in for the Gemini calls in llm.py.
+
+FakeModel answers each prompt kind (concepts, full roadmap, roadmap window,
+planner fill) with canned JSON shaped like the real model's output, after a
+configurable latency. install() swaps it in for llm.generate, llm.agenerate
+and llm.agenerate_stream; everything above those (parsing, caches, the
+planner, the resource index) runs unchanged.
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator, Callable
+
+import llm
+from services.admission import admission
+
+DSA_TOPICS = [
+    "arrays", "hash maps", "two pointers", "sliding window", "binary search",
+    "trees", "graphs", "dynamic programming", "heap", "backtracking",
+]
+CORE_TOPICS = ["operating systems", "dbms", "computer networks", "system design", "oop"]
+
+_TOTAL_DAYS_RE = re.compile(r"\*\*Total prep duration\*\*: (\d+) days")
+_WINDOW_DAYS_RE = re.compile(r"Produce exactly (\d+) days")
+
+
+def concepts_output() -> str:
+    return json.dumps(
+        {
+            "dsa_topics": {t: 10 - i for i, t in enumerate(DSA_TOPICS)},
+            "core_fundamentals": {t: 9 - i for i, t in enumerate(CORE_TOPICS)},
+        }
+    )
+
+
+def checklist(day: int, topic: str, study: int = 2, leetcode: int = 2, difficulties=None) -> list[dict]:
+    slug = topic.replace(" ", "-")
+    items = [
+        {
+            "type": "study",
+            "title": f"{topic} notes part {n}",
+            "url": f"https://www.geeksforgeeks.org/{slug}-{day}-{n}/",
+            "topic": topic,
+            "reason": "Covers the basics",
+        }
+        for n in range(1, study + 1)
+    ]
+    difficulties = list(difficulties or [])
+    items += [
+        {
+            "type": "leetcode",
+            "title": f"{topic} problem {day}.{n}",
+            "difficulty": difficulties[n - 1] if n <= len(difficulties) else "medium",
+            "topic": topic,
+            "url": f"https://leetcode.com/problems/{slug}-{day}-{n}/",
+            "reason": "Frequently asked",
+        }
+        for n in range(1, leetcode + 1)
+    ]
+    return items
+
+
+def roadmap_output(days: int) -> str:
+    roadmap = []
+    for day in range(1, days + 1):
+        topic = DSA_TOPICS[(day - 1) % len(DSA_TOPICS)]
+        roadmap.append(
+            {
+                "day": day,
+                "date_placeholder": f"Day {day}",
+                "focus_area": topic,
+                "hours_allocated": 2,
+                "checklist": checklist(day, topic),
+            }
+        )
+    return json.dumps(
+        {
+            "roadmap": roadmap,
+            "summary": {
+                "total_study_resources": 2 * days,
+                "total_leetcode_problems": 2 * days,
+                "major_focus_areas": {t: 1 for t in DSA_TOPICS[: min(days, len(DSA_TOPICS))]},
+            },
+        }
+    )
+
+
+def fill_output(prompt: str) -> str:
+    section = prompt.split("## Slots to Fill", 1)[1].split("## Rules", 1)[0]
+    slots = json.loads(section[section.index("[") : section.rindex("]") + 1])
+    return json.dumps(
+        {
+            "slots": [
+                {
+                    "day": s["day"],
+                    "topic": s["topic"],
+                    "checklist": checklist(
+                        s["day"], s["topic"], s["study"], s["leetcode"], s.get("difficulties")
+                    ),
+                }
+                for s in slots
+            ]
+        }
+    )
+
+
+def canned_output(prompt: str) -> str:
+    if "## Slots to Fill" in prompt:
+        return fill_output(prompt)
+    match = _WINDOW_DAYS_RE.search(prompt) or _TOTAL_DAYS_RE.search(prompt)
+    if match:
+        return roadmap_output(int(match.group(1)))
+    return concepts_output()
+
+
+class FakeModel:
+    """
+    latency: mean seconds per call; jitter: +/- fraction of it, drawn from a
+    seeded RNG so runs are repeatable. `calls` counts every model call.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, seed: int = 0, chunks: int = 8) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.chunks = max(1, chunks)
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            spread = self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency * (1 + spread))
+
+    def generate(
+        self, job_description: str = "", api_key: str | None = None, schema=None, kind: str = "model"
+    ) -> str:
+        time.sleep(self._delay())
+        return canned_output(job_description)
+
+    async def agenerate(
+        self, job_description: str = "", api_key: str | None = None, schema=None, kind: str = "model"
+    ) -> str:
+        # Scheduled like llm.agenerate, so admission control is part of the measurement.
+        async with admission.slot():
+            await asyncio.sleep(self._delay())
+        return canned_output(job_description)
+
+    async def agenerate_stream(
+        self, job_description: str = "", api_key: str | None = None, schema=None, kind: str = "model"
+    ) -> AsyncIterator[str]:
+        delay = self._delay()
+        text = canned_output(job_description)
+        step = max(1, len(text) // self.chunks)
+        async with admission.slot():
+            for i in range(0, len(text), step):
+                await asyncio.sleep(delay / self.chunks)
+                yield text[i : i + step]
+
+
+def install(model: FakeModel) -> Callable[[], None]:
+    """Patch llm's model calls with the fake; returns a function that undoes it."""
+    saved = {name: getattr(llm, name) for name in ("generate", "agenerate", "agenerate_stream")}
+    llm.generate = model.generate
+    llm.agenerate = model.agenerate
+    llm.agenerate_stream = model.agenerate_stream
+
+    def restore() -> None:
+        for name, fn in saved.items():
+            setattr(llm, name, fn)
+
+    return restore
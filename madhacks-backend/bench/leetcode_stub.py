@@ -0,0 +1,139 @@
+"""
+Local stand-in for leetcode.com's CSRF page and GraphQL endpoint.
+
+    python -m bench.leetcode_stub --port 8765
+    LEETCODE_BASE_URL=http://127.0.0.1:8765 uvicorn server:app
+
+GET / sets a csrftoken cookie; POST /graphql requires it in x-csrftoken
+(403 otherwise) and answers matchedUser for the single-user query and for
+the aliased batch query (u0, u1, ...). Stats are derived from the username,
+so they are stable across runs; usernames starting with "missing" do not
+exist. start() runs it in a background thread for scripts.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.leetcode import BUCKET_TO_DIFFICULTY
+
+TAGS = {
+    "fundamental": ["Array", "String", "Hash Table", "Sorting", "Math"],
+    "intermediate": ["Two Pointers", "Binary Search", "Tree", "Graph", "Heap (Priority Queue)"],
+    "advanced": ["Dynamic Programming", "Backtracking", "Trie", "Union Find"],
+}
+
+_ALIAS_RE = re.compile(r"(\w+)\s*:\s*matchedUser\(username:\s*\$(\w+)\)")
+
+
+def user_stats(username: str) -> dict | None:
+    """tagProblemCounts for `username`, or None for a missing profile."""
+    if username.lower().startswith("missing"):
+        return None
+    seed = hashlib.sha256(username.lower().encode("utf-8")).digest()
+    counts, i = {}, 0
+    for bucket in BUCKET_TO_DIFFICULTY:
+        entries = []
+        for tag in TAGS[bucket]:
+            entries.append({"tagName": tag, "problemsSolved": seed[i] % 25})
+            i += 1
+        counts[bucket] = entries
+    return {"tagProblemCounts": counts}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], latency: float = 0.0) -> None:
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.token = hashlib.sha256(str(time.time()).encode()).hexdigest()[:32]
+        self.lock = threading.Lock()
+        self.counters = {"csrf": 0, "graphql": 0, "forbidden": 0, "users": 0}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += amount
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body: dict, headers: dict[str, str] | None = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self) -> None:
+        self.server.count("csrf")
+        self._reply(200, {}, {"Set-Cookie": f"csrftoken={self.server.token}; Path=/; Max-Age=3600"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/graphql":
+            self._reply(404, {"error": "not found"})
+            return
+        if self.headers.get("x-csrftoken") != self.server.token:
+            self.server.count("forbidden")
+            self._reply(403, {"detail": "CSRF verification failed"})
+            return
+
+        self.server.count("graphql")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        query = payload.get("query") or ""
+        variables = payload.get("variables") or {}
+        aliases = _ALIAS_RE.findall(query) or [("matchedUser", "username")]
+
+        data, errors = {}, []
+        for alias, var in aliases:
+            username = str(variables.get(var, ""))
+            data[alias] = user_stats(username)
+            if data[alias] is None:
+                errors.append({"message": "That user does not exist.", "path": [alias]})
+        self.server.count("users", len(aliases))
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        self._reply(200, body)
+
+
+def start(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0) -> StubServer:
+    """Serve in a daemon thread; port 0 picks a free port (see .url)."""
+    server = StubServer((host, port), latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per GraphQL request")
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), args.latency)
+    print(f"LeetCode stub on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
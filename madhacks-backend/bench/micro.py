@@ -0,0 +1,131 @@
+"""
+Micro-benchmarks for the CPU-bound hot paths, on 365-day roadmaps.
+
+    python -m bench.micro --days 365
+
+Covers llm._extract_json, the validated roadmap/concepts parsers (including
+repair of a truncated roadmap) and llm._coerce_topic_score_map on
+model-sized output, problem catalog selection, and the storage paths in
+services/crud.py (roadmap compression and URL extraction on save,
+checked-flag merge on read, index listing, scoped bulk toggles) against
+the in-memory document store.
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from typing import Any, Callable
+
+import bench  # noqa: F401  (sets storage/cache env before llm is imported)
+import db
+import llm
+from bench.fakes import concepts_output, roadmap_output
+from bench.report import delta, latest_result, save_result
+from db.memory import MemoryStore
+from services import crud
+from services.problem_catalog import problem_catalog
+
+USER = "bench-user"
+COMPANY = "Bench Co"
+
+
+def measure(fn: Callable[[], Any], number: int, repeat: int) -> dict[str, float]:
+    """Per-call microseconds over `repeat` rounds of `number` calls."""
+    fn()
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - started) / number * 1e6)
+    return {
+        "min_us": round(min(rounds), 2),
+        "median_us": round(statistics.median(rounds), 2),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def cases(days: int) -> dict[str, tuple[Callable[[], Any], int]]:
+    """name -> (callable, calls per round)"""
+    raw_roadmap = roadmap_output(days)
+    # The truncated case logs a repair warning on every call.
+    logging.getLogger("llm").setLevel(logging.ERROR)
+    fenced = f"Here is the plan:\n```json\n{raw_roadmap}\n```\n"
+    truncated = raw_roadmap[: len(raw_roadmap) * 9 // 10]
+    roadmap = llm._extract_json(raw_roadmap)
+    raw_concepts = concepts_output()
+    score_dict = {f"topic {i}": str(i % 10) for i in range(50)}
+    score_list = [f"topic {i} {i % 10}" for i in range(50)]
+
+    db.set_store(MemoryStore())
+    crud.run_in_unit(
+        USER,
+        lambda uow: (
+            crud.save_roadmap_dump(USER, COMPANY, roadmap, uow=uow),
+            crud.extract_urls_and_update_db(USER, roadmap, uow=uow),
+        ),
+    )
+    urls = [item["url"] for day in roadmap["roadmap"] for item in day["checklist"]]
+    toggles = {url: True for url in urls[:: 7]}
+
+    def save() -> None:
+        crud.run_in_unit(
+            USER,
+            lambda uow: (
+                crud.save_roadmap_dump(USER, COMPANY, roadmap, uow=uow),
+                crud.extract_urls_and_update_db(USER, roadmap, uow=uow),
+            ),
+        )
+
+    return {
+        "extract_json.roadmap": (lambda: llm._extract_json(raw_roadmap), 20),
+        "extract_json.fenced_roadmap": (lambda: llm._extract_json(fenced), 20),
+        "extract_json.concepts": (lambda: llm._extract_json(raw_concepts), 2000),
+        "parse_roadmap.full": (lambda: llm._parse_roadmap(raw_roadmap), 20),
+        "parse_roadmap.truncated": (lambda: llm._parse_roadmap(truncated), 20),
+        "parse_concepts": (lambda: llm._parse_concepts(raw_concepts), 2000),
+        "coerce_topic_score_map.dict": (lambda: llm._coerce_topic_score_map(score_dict), 2000),
+        "coerce_topic_score_map.list": (lambda: llm._coerce_topic_score_map(score_list), 2000),
+        "problem_catalog.select": (
+            lambda: problem_catalog.select("graphs", ["easy", "medium", "medium", "hard"], set()), 5000,
+        ),
+        "crud.save_roadmap": (save, 10),
+        "crud.get_roadmaps": (lambda: crud.get_roadmaps_by_user_id(USER), 10),
+        "crud.get_roadmap": (lambda: crud.get_roadmap(USER, COMPANY), 10),
+        "crud.list_roadmaps": (lambda: crud.list_roadmaps(USER), 200),
+        "crud.get_urls_for_user": (lambda: crud.get_urls_for_user(USER), 10),
+        "crud.scope_urls.company": (lambda: crud._scope_urls(roadmap, None), 50),
+        "crud.set_url_statuses.scoped": (
+            lambda: crud.set_url_statuses(USER, toggles, company_name=COMPANY), 10,
+        ),
+        "crud.set_url_status": (lambda: crud.set_url_status(USER, urls[0], True), 200),
+    }
+
+
+def main(args: argparse.Namespace) -> dict[str, dict]:
+    results = {}
+    for name, (fn, number) in cases(args.days).items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = measure(fn, max(1, int(number * args.scale)), args.repeat)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply calls per round")
+    parser.add_argument("--only", default="", help="run cases whose name contains this")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    results = main(args)
+    previous = (latest_result("micro") or {}).get("results", {})
+    for name, r in results.items():
+        old = previous.get(name, {}).get("median_us")
+        print(f"{name:<34} median {r['median_us']:>12.2f}us{delta(r['median_us'], old)}  min {r['min_us']:.2f}us")
+    if not args.no_save:
+        print("saved", save_result("micro", results, vars(args)))
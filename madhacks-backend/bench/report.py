@@ -0,0 +1,90 @@
+"""Latency summaries and the results/ store shared by the bench scripts."""
+
+import glob
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from typing import Any
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(seconds: list[float]) -> dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds."""
+    values = sorted(seconds)
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "count": len(values),
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=RESULTS_DIR.rsplit(os.sep, 1)[0],
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latest_result(kind: str) -> dict[str, Any] | None:
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{kind}-*.json")))
+    if not paths:
+        return None
+    with open(paths[-1]) as f:
+        return json.load(f)
+
+
+def save_result(kind: str, results: Any, config: dict[str, Any]) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    revision = _git_revision()
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    payload = {
+        "kind": kind,
+        "revision": revision,
+        "timestamp": stamp,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "results": results,
+    }
+    path = os.path.join(RESULTS_DIR, f"{kind}-{stamp}-{revision}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def delta(current: float, previous: float | None) -> str:
+    if not previous:
+        return ""
+    change = (current - previous) / previous * 100
+    return f" ({change:+.1f}%)"
@@ -0,0 +1,127 @@
+"""
+Cold-start benchmark: how long a fresh process takes to import the app
+and answer its first request, and which modules the import time goes to.
+
+    python -m bench.startup --repeat 5 --top 25
+
+Each run is a new interpreter (so nothing is cached in sys.modules) with
+the bench environment. Reports the median/min time to `import server` and
+to the first /api/health response, then one `python -X importtime` run
+broken down by module (cumulative ms, including what each module
+imports), and whether the lazily loaded SDKs stayed unloaded.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+import bench  # noqa: F401  (sets storage/cache env for the child processes)
+from bench.report import delta, latest_result, save_result
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported on first use; see llm.get_client and services.firebase_app.
+LAZY_MODULES = ("google.genai", "firebase_admin", "google.cloud.firestore")
+OWN_PACKAGES = ("server", "llm", "auth", "routers", "services", "db")
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+import asyncio, httpx
+
+async def first_request():
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.get("/api/health")).raise_for_status()
+
+asyncio.run(first_request())
+print(json.dumps({"import": imported - started, "first_request": time.perf_counter() - started}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=os.environ.copy(),
+        capture_output=True, text=True, check=True,
+    )
+
+
+def time_startup(repeat: int) -> dict[str, dict[str, float]]:
+    runs = [json.loads(_run(["-c", CHILD]).stdout.strip().splitlines()[-1]) for _ in range(repeat)]
+    return {
+        key: {
+            "median_ms": round(statistics.median(r[key] for r in runs) * 1000, 1),
+            "min_ms": round(min(r[key] for r in runs) * 1000, 1),
+        }
+        for key in ("import", "first_request")
+    }
+
+
+def import_profile() -> dict[str, dict[str, float]]:
+    """module -> {self_ms, cumulative_ms, depth} from one `-X importtime` run."""
+    stderr = _run(["-X", "importtime", "-c", "import server"]).stderr
+    modules: dict[str, dict[str, float]] = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            }
+    return modules
+
+
+def main(args: argparse.Namespace) -> dict:
+    modules = import_profile()
+    ranked = sorted(modules.items(), key=lambda kv: -kv[1]["cumulative_ms"])
+    own = {
+        name: m["cumulative_ms"] for name, m in ranked
+        if name.split(".")[0] in OWN_PACKAGES
+    }
+    return {
+        "startup": time_startup(args.repeat),
+        "modules": {
+            name: m["cumulative_ms"] for name, m in ranked[: args.top]
+            if m["cumulative_ms"] >= args.min_ms
+        },
+        "own_modules": {name: ms for name, ms in own.items() if ms >= args.min_ms},
+        "lazy_loaded": {name: name in modules for name in LAZY_MODULES},
+        "module_count": len(modules),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes to time")
+    parser.add_argument("--top", type=int, default=25, help="modules to list by cumulative time")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="hide modules faster than this")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    results = main(args)
+    previous = (latest_result("startup") or {}).get("results", {})
+    for key, r in results["startup"].items():
+        old = previous.get("startup", {}).get(key, {}).get("median_ms")
+        print(f"{key:<14} median {r['median_ms']:>8.1f}ms{delta(r['median_ms'], old)}  min {r['min_ms']:.1f}ms")
+    print(f"\n{results['module_count']} modules imported; slowest (cumulative):")
+    old_modules = {**previous.get("modules", {}), **previous.get("own_modules", {})}
+    for name, ms in results["modules"].items():
+        print(f"  {name:<40} {ms:>8.1f}ms{delta(ms, old_modules.get(name))}")
+    print("\nown modules:")
+    for name, ms in results["own_modules"].items():
+        print(f"  {name:<40} {ms:>8.1f}ms{delta(ms, old_modules.get(name))}")
+    for name, loaded in results["lazy_loaded"].items():
+        if loaded:
+            print(f"\nwarning: {name} is imported at startup")
+    if not args.no_save:
+        print("saved", save_result("startup", results, vars(args)))
@@ -0,0 +1,54 @@
+"""
+Storage backend selection.
+
+STORAGE_BACKEND picks the DocumentStore used for user documents:
+"firestore" (default, production), "sqlite" (file at SQLITE_PATH) or
+"memory" (process-local, for local runs and load tests). Backends are
+imported on first use, so the local ones never touch Firebase.
+"""
+
+import os
+import threading
+
+from db.base import DocumentStore
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "firestore").strip().lower()
+SQLITE_PATH = os.environ.get(
+    "SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "store.sqlite3"),
+)
+
+_store: DocumentStore | None = None
+_store_lock = threading.Lock()
+
+
+def create_store(backend: str = STORAGE_BACKEND) -> DocumentStore:
+    if backend == "firestore":
+        from db.firebase import FirestoreStore
+
+        return FirestoreStore()
+    if backend == "sqlite":
+        from db.sqlite import SQLiteStore
+
+        return SQLiteStore(SQLITE_PATH)
+    if backend == "memory":
+        from db.memory import MemoryStore
+
+        return MemoryStore()
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected firestore, sqlite or memory)")
+
+
+def get_store() -> DocumentStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store()
+    return _store
+
+
+def set_store(store: DocumentStore | None) -> None:
+    """Swap the process-wide store (e.g. a fresh MemoryStore per benchmark run)."""
+    global _store
+    with _store_lock:
+        _store = store
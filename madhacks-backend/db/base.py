@@ -0,0 +1,151 @@
+"""
+Document-store interface shared by the Firestore, in-memory and SQLite backends.
+
+Documents are addressed by slash paths ("users/<uid>") and hold JSON-like
+dicts. Field updates use tuple paths, e.g. ("url_state", key), so names
+containing dots (company names) never need quoting by callers.
+"""
+
+import copy
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+
+class _Sentinel:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+# Remove the field (only meaningful in update/merge).
+DELETE = _Sentinel("DELETE")
+# Replaced with the backend's commit time.
+SERVER_TIMESTAMP = _Sentinel("SERVER_TIMESTAMP")
+
+FieldPath = tuple[str, ...]
+
+
+class StoreError(Exception):
+    pass
+
+
+class ConflictError(StoreError):
+    """The document changed (or appeared) since the version the caller read."""
+
+
+class NotFoundError(StoreError):
+    """update() on a document that does not exist."""
+
+
+class Snapshot:
+    def __init__(self, path: str, data: dict[str, Any] | None, version: Any = None) -> None:
+        self.path = path
+        self.data = data
+        self.version = version
+
+    @property
+    def exists(self) -> bool:
+        return self.data is not None
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def to_dict(self) -> dict[str, Any] | None:
+        return self.data
+
+
+class DocumentStore:
+    """Operations every backend implements. All methods are synchronous."""
+
+    name = "base"
+
+    def get(self, path: str, fields: Iterable[FieldPath] | None = None) -> Snapshot:
+        """Read a document, or only the given field paths of it."""
+        raise NotImplementedError
+
+    def get_many(self, paths: Iterable[str]) -> list[Snapshot]:
+        """Read several whole documents in one round trip, in the order given."""
+        return [self.get(path) for path in paths]
+
+    def update(
+        self, path: str, updates: dict[FieldPath, Any], expected_version: Any = None
+    ) -> None:
+        """
+        Write field paths of an existing document. Raises NotFoundError if it
+        is missing and ConflictError if expected_version is stale.
+        """
+        raise NotImplementedError
+
+    def create(self, path: str, data: dict[str, Any]) -> None:
+        """Write a new document. Raises ConflictError if it already exists."""
+        raise NotImplementedError
+
+    def merge(self, path: str, updates: dict[FieldPath, Any]) -> None:
+        """Blind write of field paths, creating the document if needed."""
+        raise NotImplementedError
+
+    def delete(self, path: str) -> None:
+        raise NotImplementedError
+
+    def list_ids(self, collection: str) -> Iterator[str]:
+        """Ids of the documents directly under a collection path."""
+        raise NotImplementedError
+
+
+# -----------------------------
+# Helpers for the local (dict-based) backends
+# -----------------------------
+def now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def resolve(value: Any, timestamp: Any) -> Any:
+    """Deep-copy a value, replacing SERVER_TIMESTAMP sentinels."""
+    if value is SERVER_TIMESTAMP:
+        return timestamp
+    if isinstance(value, dict):
+        return {k: resolve(v, timestamp) for k, v in value.items() if v is not DELETE}
+    if isinstance(value, list):
+        return [resolve(v, timestamp) for v in value]
+    return copy.deepcopy(value)
+
+
+def apply_updates(data: dict[str, Any], updates: dict[FieldPath, Any], timestamp: Any) -> None:
+    for path, value in updates.items():
+        node = data
+        for part in path[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        if value is DELETE:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = resolve(value, timestamp)
+
+
+def project(data: dict[str, Any], fields: Iterable[FieldPath]) -> dict[str, Any]:
+    """Copy of data holding only the given field paths (missing ones are skipped)."""
+    out: dict[str, Any] = {}
+    for path in fields:
+        node: Any = data
+        for part in path:
+            if not isinstance(node, dict) or part not in node:
+                break
+            node = node[part]
+        else:
+            target = out
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = copy.deepcopy(node)
+    return out
+
+
+def child_ids(paths: Iterable[str], collection: str) -> Iterator[str]:
+    prefix = collection.rstrip("/") + "/"
+    for path in paths:
+        if path.startswith(prefix) and "/" not in path[len(prefix):]:
+            yield path[len(prefix):]
@@ -1,8 +1,90 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-import os
+from firebase_admin import firestore
 
-cred = credentials.Certificate(os.getenv("FIREBASE_KEY_PATH"))
-firebase_admin.initialize_app(cred)
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from google.cloud.firestore_v1 import DELETE_FIELD
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP as FIRESTORE_TIMESTAMP
 
-db = firestore.client()
\ No newline at end of file
+from db.base import DELETE, SERVER_TIMESTAMP, ConflictError, DocumentStore, NotFoundError, Snapshot
+from services.firebase_app import get_app
+
+
+def _to_firestore(value):
+    if value is DELETE:
+        return DELETE_FIELD
+    if value is SERVER_TIMESTAMP:
+        return FIRESTORE_TIMESTAMP
+    if isinstance(value, dict):
+        return {k: _to_firestore(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_firestore(v) for v in value]
+    return value
+
+
+class FirestoreStore(DocumentStore):
+    """DocumentStore over Firestore; versions are document update_time values."""
+
+    name = "firestore"
+
+    def __init__(self, client=None) -> None:
+        self.client = client if client is not None else firestore.client(get_app())
+
+    def get(self, path, fields=None):
+        doc_ref = self.client.document(path)
+        if fields is None:
+            doc = doc_ref.get()
+        else:
+            doc = doc_ref.get(field_paths=[self.client.field_path(*f) for f in fields])
+        if not doc.exists:
+            return Snapshot(path, None)
+        return Snapshot(path, doc.to_dict() or {}, doc.update_time)
+
+    def get_many(self, paths):
+        paths = list(paths)
+        # get_all() batches the reads but yields them in any order.
+        found = {
+            doc.reference.path: doc
+            for doc in self.client.get_all([self.client.document(p) for p in paths])
+        }
+        out = []
+        for path in paths:
+            doc = found.get(path)
+            if doc is None or not doc.exists:
+                out.append(Snapshot(path, None))
+            else:
+                out.append(Snapshot(path, doc.to_dict() or {}, doc.update_time))
+        return out
+
+    def update(self, path, updates, expected_version=None):
+        fields = {self.client.field_path(*p): _to_firestore(v) for p, v in updates.items()}
+        option = None
+        if expected_version is not None:
+            option = self.client.write_option(last_update_time=expected_version)
+        try:
+            self.client.document(path).update(fields, option=option)
+        except NotFound as e:
+            raise NotFoundError(str(e))
+        except FailedPrecondition as e:
+            raise ConflictError(str(e))
+
+    def create(self, path, data):
+        try:
+            self.client.document(path).create(_to_firestore(data))
+        except AlreadyExists as e:
+            raise ConflictError(str(e))
+
+    def merge(self, path, updates):
+        nested = {}
+        for p, value in updates.items():
+            node = nested
+            for part in p[:-1]:
+                node = node.setdefault(part, {})
+            node[p[-1]] = _to_firestore(value)
+        fields = [self.client.field_path(*p) for p in updates]
+        self.client.document(path).set(nested, merge=fields)
+
+    def delete(self, path):
+        self.client.document(path).delete()
+
+    def list_ids(self, collection):
+        for doc_ref in self.client.collection(collection).list_documents():
+            yield doc_ref.id
@@ -0,0 +1,85 @@
+"""
+In-process DocumentStore. Nothing is persisted; meant for local runs,
+load tests and profiling without Firebase credentials or network.
+"""
+
+import copy
+import itertools
+import threading
+from typing import Any, Iterable, Iterator
+
+from db.base import (
+    ConflictError,
+    DocumentStore,
+    FieldPath,
+    NotFoundError,
+    Snapshot,
+    apply_updates,
+    child_ids,
+    now_utc,
+    project,
+    resolve,
+)
+
+
+class MemoryStore(DocumentStore):
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._docs: dict[str, tuple[dict[str, Any], int]] = {}
+        self._versions = itertools.count(1)
+
+    def get(self, path: str, fields: Iterable[FieldPath] | None = None) -> Snapshot:
+        with self._lock:
+            entry = self._docs.get(path)
+            if entry is None:
+                return Snapshot(path, None)
+            data, version = entry
+            data = project(data, fields) if fields is not None else copy.deepcopy(data)
+        return Snapshot(path, data, version)
+
+    def get_many(self, paths: Iterable[str]) -> list[Snapshot]:
+        out: list[Snapshot] = []
+        with self._lock:
+            for path in paths:
+                entry = self._docs.get(path)
+                if entry is None:
+                    out.append(Snapshot(path, None))
+                else:
+                    out.append(Snapshot(path, copy.deepcopy(entry[0]), entry[1]))
+        return out
+
+    def update(
+        self, path: str, updates: dict[FieldPath, Any], expected_version: Any = None
+    ) -> None:
+        with self._lock:
+            entry = self._docs.get(path)
+            if entry is None:
+                raise NotFoundError(path)
+            data, version = entry
+            if expected_version is not None and expected_version != version:
+                raise ConflictError(path)
+            apply_updates(data, updates, now_utc())
+            self._docs[path] = (data, next(self._versions))
+
+    def create(self, path: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            if path in self._docs:
+                raise ConflictError(path)
+            self._docs[path] = (resolve(data, now_utc()), next(self._versions))
+
+    def merge(self, path: str, updates: dict[FieldPath, Any]) -> None:
+        with self._lock:
+            data = self._docs.get(path, ({}, 0))[0]
+            apply_updates(data, updates, now_utc())
+            self._docs[path] = (data, next(self._versions))
+
+    def delete(self, path: str) -> None:
+        with self._lock:
+            self._docs.pop(path, None)
+
+    def list_ids(self, collection: str) -> Iterator[str]:
+        with self._lock:
+            paths = list(self._docs)
+        return child_ids(paths, collection)
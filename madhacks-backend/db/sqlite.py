@@ -0,0 +1,146 @@
+"""
+SQLite DocumentStore: one row per document, JSON body plus an integer
+version used for optimistic concurrency. Suits small single-node deploys.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+
+from db.base import (
+    ConflictError,
+    DocumentStore,
+    FieldPath,
+    NotFoundError,
+    Snapshot,
+    apply_updates,
+    now_utc,
+    project,
+    resolve,
+)
+
+
+def _encode(data: dict[str, Any]) -> str:
+    return json.dumps(data, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+class SQLiteStore(DocumentStore):
+    name = "sqlite"
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " path TEXT PRIMARY KEY,"
+            " collection TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " version INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_collection ON documents (collection)"
+        )
+
+    def _row(self, path: str) -> tuple[dict[str, Any], int] | None:
+        row = self._conn.execute(
+            "SELECT data, version FROM documents WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _write(self, path: str, data: dict[str, Any], version: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (path, collection, data, version)"
+            " VALUES (?, ?, ?, ?)",
+            (path, path.rsplit("/", 1)[0], _encode(data), version),
+        )
+
+    def get(self, path: str, fields: Iterable[FieldPath] | None = None) -> Snapshot:
+        with self._lock:
+            row = self._row(path)
+        if row is None:
+            return Snapshot(path, None)
+        data, version = row
+        return Snapshot(path, project(data, fields) if fields is not None else data, version)
+
+    def get_many(self, paths: Iterable[str]) -> list[Snapshot]:
+        paths = list(paths)
+        rows: dict[str, tuple[str, int]] = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for i in range(0, len(paths), 500):
+                chunk = paths[i : i + 500]
+                rows.update(
+                    (path, (data, version))
+                    for path, data, version in self._conn.execute(
+                        "SELECT path, data, version FROM documents"
+                        f" WHERE path IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+        return [
+            Snapshot(path, json.loads(rows[path][0]), rows[path][1])
+            if path in rows else Snapshot(path, None)
+            for path in paths
+        ]
+
+    def update(
+        self, path: str, updates: dict[FieldPath, Any], expected_version: Any = None
+    ) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._row(path)
+                if row is None:
+                    raise NotFoundError(path)
+                data, version = row
+                if expected_version is not None and expected_version != version:
+                    raise ConflictError(path)
+                apply_updates(data, updates, now_utc())
+                self._write(path, data, version + 1)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def create(self, path: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO documents (path, collection, data, version) VALUES (?, ?, ?, 1)",
+                    (path, path.rsplit("/", 1)[0], _encode(resolve(data, now_utc()))),
+                )
+            except sqlite3.IntegrityError:
+                raise ConflictError(path)
+
+    def merge(self, path: str, updates: dict[FieldPath, Any]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                data, version = self._row(path) or ({}, 0)
+                apply_updates(data, updates, now_utc())
+                self._write(path, data, version + 1)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, path: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+    def list_ids(self, collection: str) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM documents WHERE collection = ?", (collection.rstrip("/"),)
+            ).fetchall()
+        for (path,) in rows:
+            yield path.rsplit("/", 1)[-1]
@@ -1,25 +1,133 @@
 import os
 import time
 import json
+import asyncio
+import logging
+import threading
 from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable
 
 from dotenv import load_dotenv # type: ignore
-from google import genai
-from google.genai import types # type: ignore
+
+from services.admission import admission
+from services.cache import ResponseCache, make_key
+from services.call_policy import ModelDeadlineExceeded, Target, call_policy
+from services.json_stream import ArrayStreamParser
+from services.leetcode import solved_summary
+from services.fast_json import loads
+from services.metrics import llm_calls, parse_failures, parse_repairs, parsing, record_usage, stage
+from services.planner import plan_roadmap, planned_focus_areas
+from services.problem_catalog import problem_catalog, used_slugs
+from services.regenerate import plan_regeneration, profile_of
+from services.resource_index import resource_index
+from services.schemas import (
+    ConceptsOutput,
+    ConceptsSchema,
+    FillOutput,
+    RoadmapOutput,
+    RoadmapSchema,
+    decode_output,
+)
+from services.summary import SummaryBuilder, is_leetcode_item, summarize_roadmap
+from services.templates import PromptTemplate
+from services.topics import TOPIC_INDEX_VERSION, canonical_name, canonicalize_scores, topic_id
+from services.windows import allocate_days, merge_windows, split_windows, window_topics
+
+if TYPE_CHECKING:
+    # google.genai takes ~0.4s to import; it is loaded on the first model call.
+    from google import genai
+    from google.genai import types
 
 load_dotenv()
 
+HERE = os.path.dirname(os.path.abspath(__file__))
 
-def generate(job_description: str = "Software Engineer 1", api_key: str | None = None) -> str:
-    """
-    Generate content using streaming API with Google Search + URL context.
-    Returns the full raw text from the model.
-    """
+ROADMAP_WINDOW_DAYS = int(os.environ.get("ROADMAP_WINDOW_DAYS", "10"))
+ROADMAP_WINDOW_PARALLEL = int(os.environ.get("ROADMAP_WINDOW_PARALLEL", "4"))
+# Plans longer than this are generated in windows by default.
+ROADMAP_WINDOW_THRESHOLD = int(os.environ.get("ROADMAP_WINDOW_THRESHOLD", "21"))
+# Indexed study links offered per topic in model-planned prompts, plus one
+# catalog problem per difficulty below.
+KNOWN_STUDY_PER_TOPIC = int(os.environ.get("KNOWN_STUDY_PER_TOPIC", "2"))
+KNOWN_DIFFICULTIES = ("easy", "medium", "hard")
+# Pass response schemas to the model. Gemini cannot combine a response schema
+# with tools, so this turns off Google Search / URL context grounding.
+GEMINI_STRUCTURED_OUTPUT = os.environ.get("GEMINI_STRUCTURED_OUTPUT", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[str, "genai.Client"] = {}
+_clients_lock = threading.Lock()
+
+# Loaded once at import; a placeholder typo in the markdown fails startup.
+CONCEPTS_TEMPLATE = PromptTemplate(
+    os.path.join(HERE, "prompt.md"),
+    {"company_name", "job_role", "job_link"},
+)
+ROADMAP_TEMPLATE = PromptTemplate(
+    os.path.join(HERE, "roadmap.md"),
+    {
+        "company_name", "job_role", "job_link", "dsa_topics",
+        "core_fundamentals", "total_prep_days", "daily_hours", "solved_stats",
+        "known_resources",
+    },
+)
+ROADMAP_WINDOW_TEMPLATE = PromptTemplate(
+    os.path.join(HERE, "roadmap_window.md"),
+    {"window_start", "window_end", "window_days", "plan_days"},
+)
+ROADMAP_FILL_TEMPLATE = PromptTemplate(
+    os.path.join(HERE, "roadmap_fill.md"),
+    {"company_name", "job_role", "job_link", "solved_stats", "slots"},
+)
+
+concepts_cache = ResponseCache(
+    namespace="concepts",
+    max_entries=int(os.environ.get("CONCEPTS_CACHE_MAX_ENTRIES", "256")),
+    ttl_seconds=float(os.environ.get("CONCEPTS_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    db_path=os.environ.get(
+        "CONCEPTS_CACHE_PATH", os.path.join(HERE, ".cache", "responses.sqlite3")
+    ),
+)
+
+
+def _resolve_api_key(api_key: str | None) -> str:
     key = api_key or os.environ.get("GEMINI_API_KEY")
     if not key:
         raise ValueError("Provide api_key or set GEMINI_API_KEY environment variable")
+    return key
 
-    client = genai.Client(api_key=key)
+
+def get_client(api_key: str | None = None) -> "genai.Client":
+    """
+    Long-lived genai.Client shared across requests (one per API key),
+    so connections are reused instead of rebuilt on every call.
+    """
+    key = _resolve_api_key(api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                from google import genai
+
+                client = genai.Client(api_key=key)
+                _clients[key] = client
+    return client
+
+
+def _schema(schema: type | None) -> type | None:
+    """The response schema to request, or None when structured output is off."""
+    return schema if GEMINI_STRUCTURED_OUTPUT else None
+
+
+def _build_request(
+    job_description: str,
+    schema: type | None = None,
+    thinking_budget: int = 4096,
+    timeout: float | None = None,
+) -> tuple[list, "types.GenerateContentConfig"]:
+    from google.genai import types
 
     contents = [
         types.Content(
@@ -27,25 +135,190 @@ def generate(job_description: str = "Software Engineer 1", api_key: str | None =
             parts=[types.Part.from_text(text=job_description)],
         )
     ]
+    # Per-attempt HTTP timeout (ms) for the blocking client.
+    http_options = types.HttpOptions(timeout=int(timeout * 1000)) if timeout else None
+    if schema is not None:
+        # JSON mode: the model's output is constrained to `schema`; no tools.
+        return contents, types.GenerateContentConfig(
+            thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+            response_mime_type="application/json",
+            response_schema=schema,
+            http_options=http_options,
+        )
     tools = [
         types.Tool(url_context=types.UrlContext()),
         types.Tool(googleSearch=types.GoogleSearch()),
     ]
     generate_content_config = types.GenerateContentConfig(
-        thinking_config=types.ThinkingConfig(thinking_budget=4096),
+        thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
         tools=tools,
+        http_options=http_options,
     )
+    return contents, generate_content_config
+
 
-    response = client.models.generate_content(
-        model="gemini-flash-latest",
-        contents=contents,
-        config=generate_content_config,
+def _record_response(response: Any, model: str, seconds: float) -> None:
+    """Count the call and its token usage, and log one line about it."""
+    usage = getattr(response, "usage_metadata", None)
+    llm_calls.inc(model=model, outcome="ok")
+    record_usage(model, usage)
+    logger.info(
+        "gemini call model=%s seconds=%.2f prompt_tokens=%s output_tokens=%s "
+        "thoughts_tokens=%s chars=%d",
+        model,
+        seconds,
+        getattr(usage, "prompt_token_count", None),
+        getattr(usage, "candidates_token_count", None),
+        getattr(usage, "thoughts_token_count", None),
+        len(response.text or ""),
     )
-    print(response.text)
+    logger.debug("gemini response text: %s", response.text)
+
+
+def generate(
+    job_description: str = "Software Engineer 1",
+    api_key: str | None = None,
+    schema: type | None = None,
+    kind: str = "model",
+) -> str:
+    """
+    Generate content with Google Search + URL context (blocking), or as JSON
+    constrained to `schema` when one is given. Retries and falls back per
+    services.call_policy; `kind` labels the call for its latency stats.
+    Returns the full raw text from the model.
+    """
+    client = get_client(api_key)
+
+    def attempt(target: Target, timeout: float) -> str:
+        contents, generate_content_config = _build_request(
+            job_description, schema, target.thinking_budget, timeout
+        )
+        started = time.perf_counter()
+        try:
+            with stage("model"):
+                response = client.models.generate_content(
+                    model=target.model,
+                    contents=contents,
+                    config=generate_content_config,
+                )
+        except Exception:
+            llm_calls.inc(model=target.model, outcome="error")
+            raise
+        _record_response(response, target.model, time.perf_counter() - started)
+        return response.text
 
-    return response.text
+    return call_policy.call(kind, attempt)
 
 
+async def agenerate(
+    job_description: str = "Software Engineer 1",
+    api_key: str | None = None,
+    schema: type | None = None,
+    kind: str = "model",
+) -> str:
+    """
+    Async variant of generate(). Runs on the event loop through the shared
+    client's aio surface. Each attempt waits for a slot from
+    services.admission, which caps calls in flight at GEMINI_MAX_CONCURRENCY
+    and orders waiters fairly; slow attempts may be hedged.
+    """
+    client = get_client(api_key)
+
+    async def attempt(target: Target) -> str:
+        contents, generate_content_config = _build_request(
+            job_description, schema, target.thinking_budget
+        )
+        with stage("model_queue"):
+            slot = await admission.acquire()
+        try:
+            started = time.perf_counter()
+            with stage("model"):
+                response = await client.aio.models.generate_content(
+                    model=target.model,
+                    contents=contents,
+                    config=generate_content_config,
+                )
+        except Exception:
+            llm_calls.inc(model=target.model, outcome="error")
+            raise
+        finally:
+            admission.release(slot)
+        seconds = time.perf_counter() - started
+        call_policy.latency.observe(target.model, kind, seconds)
+        _record_response(response, target.model, seconds)
+        return response.text
+
+    return await call_policy.acall(kind, attempt)
+
+
+async def agenerate_stream(
+    job_description: str = "Software Engineer 1",
+    api_key: str | None = None,
+    schema: type | None = None,
+    kind: str = "model",
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of agenerate(): yields text chunks as the model produces
+    them. Holds a concurrency slot until the stream is exhausted or closed.
+    Opening the stream is retried; the request's deadline bounds every chunk.
+    """
+    client = get_client(api_key)
+    loop = asyncio.get_running_loop()
+    deadline_kind, seconds = call_policy.deadline()
+    deadline = loop.time() + call_policy.remaining()
+
+    async def open_stream(target: Target) -> tuple[Target, tuple[str, float], Any]:
+        contents, generate_content_config = _build_request(
+            job_description, schema, target.thinking_budget
+        )
+        with stage("model_queue"):
+            slot = await admission.acquire()
+        try:
+            with stage("model_first_chunk"):
+                stream = await client.aio.models.generate_content_stream(
+                    model=target.model,
+                    contents=contents,
+                    config=generate_content_config,
+                )
+        except BaseException as e:
+            admission.release(slot)
+            if isinstance(e, Exception):
+                llm_calls.inc(model=target.model, outcome="error")
+            raise
+        return target, slot, stream
+
+    started = time.perf_counter()
+    target, slot, stream = await call_policy.acall(kind, open_stream, hedge=False, deadline=deadline)
+    try:
+        usage = None
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                raise ModelDeadlineExceeded(deadline_kind, seconds) from None
+            # Usage metadata is cumulative; the last chunk carries the totals.
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.text:
+                yield chunk.text
+    except Exception:
+        llm_calls.inc(model=target.model, outcome="error")
+        raise
+    finally:
+        admission.release(slot)
+    llm_calls.inc(model=target.model, outcome="ok")
+    record_usage(target.model, usage)
+    logger.info(
+        "gemini stream model=%s seconds=%.2f output_tokens=%s",
+        target.model,
+        time.perf_counter() - started,
+        getattr(usage, "candidates_token_count", None),
+    )
+
+
+@stage("extract_json")
 def _extract_json(text: str) -> dict:
     """
     Extract strict JSON from model output.
@@ -56,7 +329,7 @@ def _extract_json(text: str) -> dict:
     text = (text or "").strip()
 
     try:
-        return json.loads(text)
+        return loads(text)
     except json.JSONDecodeError:
         pass
 
@@ -67,7 +340,7 @@ def _extract_json(text: str) -> dict:
 
     candidate = text[start : end + 1]
     try:
-        return json.loads(candidate)
+        return loads(candidate)
     except json.JSONDecodeError:
         raise ValueError(
             f"Could not parse JSON.\nCandidate:\n{candidate}\n\nRaw output:\n{text}"
@@ -76,10 +349,16 @@ def _extract_json(text: str) -> dict:
 
 def _parse_list_items_as_topic_score(items: list) -> dict[str, int]:
     """
-    Accept list like ["arrays 10", "two pointers 7"] and return {"arrays":10, "two pointers":7}
+    Accept list like ["arrays 10", "two pointers 7"] and return {"arrays":10, "two pointers":7}.
+    Items may also be {"topic": ..., "score": ...} objects (structured output).
     """
     out: dict[str, int] = {}
     for it in items:
+        if isinstance(it, dict) and "topic" in it:
+            topic = str(it.get("topic") or "").strip()
+            if topic:
+                out.update(_coerce_topic_score_map({topic: it.get("score", 1)}))
+            continue
         s = str(it).strip()
         if not s:
             continue
@@ -98,7 +377,7 @@ def _coerce_topic_score_map(value) -> dict[str, int]:
     """
     Accept either:
       - dict: {"arrays": 10, ...}
-      - list: ["arrays 10", ...]
+      - list: ["arrays 10", ...] or [{"topic": "arrays", "score": 10}, ...]
     Return dict[str,int]
     """
     if isinstance(value, dict):
@@ -127,37 +406,59 @@ def _coerce_topic_score_map(value) -> dict[str, int]:
     raise ValueError(f"Expected dict or list, got {type(value).__name__}")
 
 
-def generate_concepts_from_prompt(company_name: str, job_role: str, job_link: str) -> dict:
+def _decode(model: type, out: str, kind: str, array_key: str | None = None) -> dict:
+    """decode_output() plus a metric and a warning when a truncated output was repaired."""
+    data, repaired = decode_output(model, out, array_key)
+    if repaired:
+        parse_repairs.inc(kind=kind)
+        logger.warning(
+            "repaired truncated %s output: kept %d complete '%s' items",
+            kind, len(data.get(array_key) or []), array_key,
+        )
+    return data
+
+
+def _normalize_job_link(job_link: str) -> str:
+    return (job_link or "").strip().rstrip("/")
+
+
+def _concepts_cache_key(company_name: str, job_role: str, job_link: str) -> str:
+    return make_key(
+        company_name, job_role, _normalize_job_link(job_link),
+        CONCEPTS_TEMPLATE.content_hash, TOPIC_INDEX_VERSION,
+    )
+
+
+@stage("render")
+def _build_concepts_prompt(company_name: str, job_role: str, job_link: str) -> str:
+    return CONCEPTS_TEMPLATE.render(
+        company_name=company_name,
+        job_role=job_role,
+        job_link=job_link or "",
+    )
+
+
+@parsing("concepts")
+def _parse_concepts(out: str) -> dict:
     """
-    Reads prompt.md, replaces placeholders, calls generate(),
-    parses JSON that contains either:
+    Parses JSON that contains either:
       - dsa_topics: {topic: score, ...}  OR  ["topic score", ...]
       - core_fundamentals: {topic: score, ...}  OR  ["topic score", ...]
     Returns:
       { "dsaConcepts": {topic: score}, "coreConcepts": {topic: score} }
+    with topics renamed to their canonical names (services/topics.py).
     """
-    here = os.path.dirname(os.path.abspath(__file__))
-    prompt_path = os.path.join(here, "prompt.md")
-
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        job_description_text = f.read()
-
-    job_description_text = job_description_text.replace("{{company_name}}", company_name)
-    job_description_text = job_description_text.replace("{{job_role}}", job_role)
-    job_description_text = job_description_text.replace("{{job_link}}", job_link or "")
-
-    out = generate(job_description=job_description_text)
-    data = _extract_json(out)
-
     # IMPORTANT: your model returns keys dsa_topics / core_fundamentals
-    if "dsa_topics" not in data or "core_fundamentals" not in data:
+    try:
+        data = _decode(ConceptsOutput, out, "concepts")
+    except ValueError as e:
         raise ValueError(
             "Invalid JSON shape. Expected keys: dsa_topics, core_fundamentals.\n"
-            f"Raw output:\n{out}"
+            f"{e}\nRaw output:\n{out}"
         )
 
-    dsa_map = _coerce_topic_score_map(data.get("dsa_topics"))
-    core_map = _coerce_topic_score_map(data.get("core_fundamentals"))
+    dsa_map = canonicalize_scores(_coerce_topic_score_map(data.get("dsa_topics")))
+    core_map = canonicalize_scores(_coerce_topic_score_map(data.get("core_fundamentals")))
 
     dsa_map = dict(list(dsa_map.items())[:10])
     core_map = dict(list(core_map.items())[:10])
@@ -168,6 +469,147 @@ def generate_concepts_from_prompt(company_name: str, job_role: str, job_link: st
     return {"dsaConcepts": dsa_map, "coreConcepts": core_map}
 
 
+def generate_concepts_from_prompt(company_name: str, job_role: str, job_link: str) -> dict:
+    """
+    Reads prompt.md, replaces placeholders, calls generate() and parses the result.
+    Cached on normalized (company, role, jobLink) plus the hash of prompt.md,
+    so editing the prompt naturally invalidates old entries.
+    """
+    def compute() -> dict:
+        prompt = _build_concepts_prompt(company_name, job_role, job_link)
+        out = generate(job_description=prompt, schema=_schema(ConceptsSchema), kind="concepts")
+        return _parse_concepts(out)
+
+    key = _concepts_cache_key(company_name, job_role, job_link)
+    return concepts_cache.get_or_compute(key, compute)
+
+
+async def agenerate_concepts_from_prompt(company_name: str, job_role: str, job_link: str) -> dict:
+    """Async variant of generate_concepts_from_prompt(), sharing the same cache."""
+    async def compute() -> dict:
+        prompt = _build_concepts_prompt(company_name, job_role, job_link)
+        return _parse_concepts(
+            await agenerate(job_description=prompt, schema=_schema(ConceptsSchema), kind="concepts")
+        )
+
+    key = _concepts_cache_key(company_name, job_role, job_link)
+    return await concepts_cache.aget_or_compute(key, compute)
+
+
+def _solved_text(solved_stats: dict | None) -> Any:
+    """{tag: {difficulty: count}} for the prompt, or a note that none were given."""
+    return solved_summary(solved_stats) or "Not provided."
+
+
+@stage("prefill")
+def _known_resources(dsa_topics: dict, core_fundamentals: dict) -> dict[str, list[dict]]:
+    """
+    {topic: items} the model-planned paths offer the model before it searches:
+    a few study links from the resource index and catalog problems per topic.
+    """
+    known: dict[str, list[dict]] = {}
+    slugs: set[str] = set()
+    for topic in list(dsa_topics) + list(core_fundamentals):
+        items = resource_index.lookup(topic, "study", limit=KNOWN_STUDY_PER_TOPIC)
+        items += problem_catalog.select(topic, KNOWN_DIFFICULTIES, exclude=slugs)
+        if items:
+            known[topic] = [
+                {k: item[k] for k in ("type", "title", "url", "difficulty") if k in item}
+                for item in items
+            ]
+    return known
+
+
+@stage("render")
+def _build_roadmap_prompt(
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    solved_stats: dict | None = None,
+    known_resources: dict | None = None,
+) -> str:
+    return ROADMAP_TEMPLATE.render(
+        company_name=company_name,
+        job_role=job_role,
+        job_link=job_link or "",
+        dsa_topics=dsa_topics,
+        core_fundamentals=core_fundamentals,
+        total_prep_days=total_prep_days,
+        daily_hours=daily_hours,
+        solved_stats=_solved_text(solved_stats),
+        known_resources=known_resources or "None yet; find resources as usual.",
+    )
+
+
+@parsing("roadmap")
+def _parse_roadmap(out: str, defaults: dict[str, Any] | None = None) -> dict:
+    """
+    Validate a full roadmap response against RoadmapOutput. Days are
+    normalized, summary totals are counted locally, and top-level fields
+    missing after a repair (or in schema mode) are taken from `defaults`.
+    """
+    try:
+        data = _decode(RoadmapOutput, out, "roadmap", array_key="roadmap")
+    except ValueError as e:
+        raise ValueError(
+            "Invalid roadmap JSON shape. Expected keys: roadmap, summary.\n"
+            f"{e}\nRaw output:\n{out}"
+        )
+
+    for key, value in (defaults or {}).items():
+        data.setdefault(key, value)
+    data["roadmap"] = [_validate_day(day, i) for i, day in enumerate(data["roadmap"], start=1)]
+    data["summary"] = summarize_roadmap(data["roadmap"], data.get("summary"))
+    return data
+
+
+def _validate_day(day: Any, expected_day: int) -> dict:
+    """
+    Check one roadmap day object and normalize what the UI relies on:
+    an integer day number and a checklist of objects. focus_area and item
+    topics are renamed to their canonical names.
+    """
+    if not isinstance(day, dict):
+        raise ValueError(f"Invalid roadmap day #{expected_day}: must be an object")
+
+    checklist = day.get("checklist", [])
+    if not isinstance(checklist, list):
+        raise ValueError(f"Invalid roadmap day #{expected_day}: 'checklist' must be a list")
+    day["checklist"] = [item for item in checklist if isinstance(item, dict)]
+    for item in day["checklist"]:
+        if item.get("topic"):
+            item["topic"] = canonical_name(item["topic"])
+    if isinstance(day.get("focus_area"), str) and day["focus_area"].strip():
+        day["focus_area"] = canonical_name(day["focus_area"])
+
+    try:
+        day["day"] = int(day.get("day", expected_day))
+    except (TypeError, ValueError):
+        day["day"] = expected_day
+    day.setdefault("date_placeholder", f"Day {day['day']}")
+    return day
+
+
+async def _aingest(roadmap_json: dict) -> None:
+    """Feed a generated roadmap to the resource index without blocking the loop."""
+    await asyncio.to_thread(resource_index.ingest_roadmap, roadmap_json)
+
+
+def _roadmap_defaults(
+    company_name: str, job_role: str, total_prep_days: int, daily_hours: float
+) -> dict[str, Any]:
+    return {
+        "company": company_name,
+        "role": job_role,
+        "total_days": total_prep_days,
+        "daily_hours": daily_hours,
+    }
+
+
 def generate_roadmap_from_profile(
     company_name: str,
     job_role: str,
@@ -176,6 +618,7 @@ def generate_roadmap_from_profile(
     daily_hours: float,
     dsa_topics: dict,
     core_fundamentals: dict,
+    solved_stats: dict | None = None,
 ) -> dict:
     """
     Reads roadmap.md, fills placeholders, calls generate(),
@@ -186,46 +629,423 @@ def generate_roadmap_from_profile(
       summary: {...}
     }
     """
-    here = os.path.dirname(os.path.abspath(__file__))
-    roadmap_path = os.path.join(here, "roadmap.md")
+    prompt = _build_roadmap_prompt(
+        company_name, job_role, job_link, total_prep_days, daily_hours,
+        dsa_topics, core_fundamentals, solved_stats,
+        _known_resources(dsa_topics, core_fundamentals),
+    )
+    out = generate(job_description=prompt, schema=_schema(RoadmapSchema), kind="roadmap")
+    result = _parse_roadmap(
+        out, _roadmap_defaults(company_name, job_role, total_prep_days, daily_hours)
+    )
+    resource_index.ingest_roadmap(result)
+    return result
 
-    with open(roadmap_path, "r", encoding="utf-8") as f:
-        prompt = f.read()
 
-    prompt = prompt.replace("{{company_name}}", company_name)
-    prompt = prompt.replace("{{job_role}}", job_role)
-    prompt = prompt.replace("{{job_link}}", job_link or "")
-    prompt = prompt.replace("{{dsa_topics}}", json.dumps(dsa_topics))
-    prompt = prompt.replace("{{core_fundamentals}}", json.dumps(core_fundamentals))
-    prompt = prompt.replace("{{total_prep_days}}", str(total_prep_days))
-    prompt = prompt.replace("{{daily_hours}}", str(daily_hours))
+async def agenerate_roadmap_from_profile(
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    solved_stats: dict | None = None,
+) -> dict:
+    """Async variant of generate_roadmap_from_profile()."""
+    known = await asyncio.to_thread(_known_resources, dsa_topics, core_fundamentals)
+    prompt = _build_roadmap_prompt(
+        company_name, job_role, job_link, total_prep_days, daily_hours,
+        dsa_topics, core_fundamentals, solved_stats, known,
+    )
+    out = await agenerate(job_description=prompt, schema=_schema(RoadmapSchema), kind="roadmap")
+    result = _parse_roadmap(
+        out, _roadmap_defaults(company_name, job_role, total_prep_days, daily_hours)
+    )
+    await _aingest(result)
+    return result
 
-    out = generate(job_description=prompt)
-    data = _extract_json(out)
 
-    if not isinstance(data, dict):
-        raise ValueError("Roadmap generation did not return an object")
+@stage("render")
+def _build_window_prompt(
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    window_start: int,
+    window_end: int,
+    solved_stats: dict | None = None,
+    known_resources: dict | None = None,
+) -> str:
+    window_days = window_end - window_start + 1
+    prompt = _build_roadmap_prompt(
+        company_name, job_role, job_link, window_days, daily_hours,
+        dsa_topics, core_fundamentals, solved_stats, known_resources,
+    )
+    note = ROADMAP_WINDOW_TEMPLATE.render(
+        window_start=window_start,
+        window_end=window_end,
+        window_days=window_days,
+        plan_days=total_prep_days,
+    )
+    return prompt + note
 
-    if "roadmap" not in data or "summary" not in data:
+
+@parsing("window")
+def _parse_window(out: str) -> dict:
+    try:
+        data = _decode(RoadmapOutput, out, "window", array_key="roadmap")
+    except ValueError as e:
         raise ValueError(
-            "Invalid roadmap JSON shape. Expected keys: roadmap, summary.\n"
-            f"Raw output:\n{out}"
+            "Invalid roadmap window JSON shape. Expected key: roadmap (list).\n"
+            f"{e}\nRaw output:\n{out}"
+        )
+    for i, day in enumerate(data["roadmap"], start=1):
+        _validate_day(day, i)
+    return data
+
+
+async def agenerate_roadmap_windowed(
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    solved_stats: dict | None = None,
+    window_days: int | None = None,
+    max_parallel: int | None = None,
+) -> dict:
+    """
+    Generate a long roadmap as independent day windows.
+    Topics are allocated to days locally first, each window is generated with
+    only its own topics, at most max_parallel windows run at once, and the
+    results are merged with continuous day numbers and a locally computed
+    summary. Wall-clock time tracks window size instead of plan length.
+    """
+    windows = split_windows(total_prep_days, window_days or ROADMAP_WINDOW_DAYS)
+    schedule = allocate_days(dsa_topics, core_fundamentals, total_prep_days)
+    limit = asyncio.Semaphore(max(1, max_parallel or ROADMAP_WINDOW_PARALLEL))
+
+    async def run(start: int, end: int) -> dict:
+        dsa, core = window_topics(schedule, start, end, dsa_topics, core_fundamentals)
+        known = await asyncio.to_thread(_known_resources, dsa, core)
+        prompt = _build_window_prompt(
+            company_name, job_role, job_link, total_prep_days, daily_hours,
+            dsa, core, start, end, solved_stats, known,
         )
+        async with limit:
+            out = await agenerate(
+                job_description=prompt, schema=_schema(RoadmapSchema), kind="window"
+            )
+            part = _parse_window(out)
+        part["roadmap"] = part["roadmap"][: end - start + 1]
+        return part
 
-    if not isinstance(data["roadmap"], list):
-        raise ValueError("Invalid roadmap: 'roadmap' must be a list")
+    parts = await asyncio.gather(*(run(start, end) for start, end in windows))
+    result = merge_windows(list(parts), company_name, job_role, total_prep_days, daily_hours)
+    await _aingest(result)
+    return result
 
-    s = data["summary"]
-    if not isinstance(s, dict):
-        raise ValueError("Invalid summary: must be an object")
 
-    if "major_focus_areas" not in s or not isinstance(s["major_focus_areas"], dict):
-        raise ValueError("Invalid summary.major_focus_areas: must be an object")
+def _slot_requests(days: list[dict]) -> list[dict]:
+    """What the fill prompt needs per slot; slots needing nothing are skipped."""
+    out = []
+    for day in days:
+        for slot in day["slots"]:
+            if slot["study_count"] or slot["leetcode_count"]:
+                out.append(
+                    {
+                        "day": day["day"],
+                        "topic": slot["topic"],
+                        "study": slot["study_count"],
+                        "leetcode": slot["leetcode_count"],
+                        "difficulties": slot["difficulties"],
+                    }
+                )
+    return out
 
-    if "total_study_resources" not in s or "total_leetcode_problems" not in s:
-        raise ValueError("Invalid summary totals")
 
-    return data
+@parsing("fill")
+def _apply_fill(days: list[dict], out: str) -> None:
+    """
+    Copy filled checklist items from a fill response into their (day, topic)
+    slot, trimming each slot to the counts the planner asked for.
+    """
+    try:
+        data = _decode(FillOutput, out, "fill", array_key="slots")
+    except ValueError as e:
+        raise ValueError(f"Invalid fill JSON shape. Expected key: slots (list)\n{e}")
+
+    by_day = {day["day"]: day for day in days}
+    for entry in data["slots"]:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            day = by_day.get(int(entry.get("day")))
+        except (TypeError, ValueError):
+            continue
+        if day is None:
+            continue
+        topic = topic_id(entry.get("topic"))
+        slot = next((s for s in day["slots"] if topic_id(s["topic"]) == topic), None)
+        if slot is None:
+            continue
+
+        study_left, leetcode_left = slot["study_count"], slot["leetcode_count"]
+        for item in entry.get("checklist") or []:
+            if not isinstance(item, dict) or not isinstance(item.get("url"), str):
+                continue
+            item.setdefault("topic", slot["topic"])
+            if is_leetcode_item(item):
+                if leetcode_left <= 0:
+                    continue
+                leetcode_left -= 1
+                item["type"] = "leetcode"
+            else:
+                if study_left <= 0:
+                    continue
+                study_left -= 1
+                item["type"] = "study"
+            day["checklist"].append(item)
+
+
+@stage("prefill")
+def _prefill_from_index(days: list[dict], exclude_urls: Iterable[str] = ()) -> None:
+    """
+    Fill slots locally before asking the model: LeetCode problems from the
+    problem catalog, then study links and any problems the catalog lacks
+    from the resource index. Slot counts are reduced to what is still
+    missing, so the model is only asked for what neither has. URLs in
+    exclude_urls (e.g. the user's other roadmaps) are not reused.
+    """
+    used: set[str] = set(exclude_urls)
+    slugs = used_slugs(used)
+    for day in days:
+        for slot in day["slots"]:
+            found = resource_index.lookup(
+                slot["topic"], "study", limit=slot["study_count"], exclude=used
+            )
+            picked = problem_catalog.select(slot["topic"], slot["difficulties"], exclude=slugs)
+            found.extend(picked)
+            # select() only comes up short once the topic is exhausted, so the
+            # unfilled difficulties are the trailing ones.
+            remaining: list[str] = []
+            for difficulty in slot["difficulties"][len(picked):]:
+                hit = resource_index.lookup(
+                    slot["topic"], "leetcode", difficulty, limit=1,
+                    exclude=used | {i["url"] for i in found},
+                )
+                if hit:
+                    found.extend(hit)
+                else:
+                    remaining.append(difficulty)
+
+            for item in found:
+                used.add(item["url"])
+                day["checklist"].append(item)
+            slot["from_index"] = len(found)
+            slot["study_count"] -= sum(1 for i in found if i["type"] == "study")
+            slot["leetcode_count"] = len(remaining)
+            slot["difficulties"] = remaining
+
+
+async def _fill_slots(
+    days: list[dict],
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    solved_stats: dict | None = None,
+    window_days: int | None = None,
+    max_parallel: int | None = None,
+) -> None:
+    """Ask the model for whatever each slot of `days` still lacks, a window of days per call."""
+    windows = split_windows(len(days), window_days or ROADMAP_WINDOW_DAYS)
+    limit = asyncio.Semaphore(max(1, max_parallel or ROADMAP_WINDOW_PARALLEL))
+
+    async def fill(start: int, end: int) -> None:
+        slots = _slot_requests(days[start - 1 : end])
+        if not slots:
+            return
+        with stage("render"):
+            prompt = ROADMAP_FILL_TEMPLATE.render(
+                company_name=company_name,
+                job_role=job_role,
+                job_link=job_link or "",
+                solved_stats=_solved_text(solved_stats),
+                slots=slots,
+            )
+        async with limit:
+            out = await agenerate(job_description=prompt, schema=_schema(FillOutput), kind="fill")
+        _apply_fill(days, out)
+
+    await asyncio.gather(*(fill(start, end) for start, end in windows))
+
+
+async def agenerate_roadmap_planned(
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    solved_stats: dict | None = None,
+    window_days: int | None = None,
+    max_parallel: int | None = None,
+    exclude_urls: Iterable[str] = (),
+) -> dict:
+    """
+    Schedule days locally with plan_roadmap(), fill what the problem catalog
+    and resource index already have, then ask the model only for the rest of
+    each (day, topic) slot, a window at a time. Problems whose URLs are in
+    exclude_urls are not picked again.
+    """
+    with stage("planner"):
+        days = plan_roadmap(dsa_topics, core_fundamentals, total_prep_days, daily_hours)
+    _prefill_from_index(days, exclude_urls)
+    await _fill_slots(
+        days, company_name, job_role, job_link, solved_stats, window_days, max_parallel
+    )
+
+    result = {
+        "company": company_name,
+        "role": job_role,
+        "total_days": total_prep_days,
+        "daily_hours": daily_hours,
+        "roadmap": days,
+        "summary": summarize_roadmap(
+            days, {"major_focus_areas": planned_focus_areas(days)}
+        ),
+    }
+    await _aingest(result)
+    return result
+
+
+async def agenerate_roadmap_regenerated(
+    existing: dict,
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    solved_stats: dict | None = None,
+    window_days: int | None = None,
+    max_parallel: int | None = None,
+    exclude_urls: Iterable[str] = (),
+) -> dict:
+    """
+    Update a saved roadmap for a new profile / length / hours: only the days
+    services.regenerate finds affected are re-planned and filled (catalog and
+    resource index first, then the model), other days and checked items are
+    kept, and the summary is recomputed locally over the whole plan.
+    """
+    with stage("planner"):
+        plan = plan_regeneration(
+            existing, dsa_topics, core_fundamentals, total_prep_days, daily_hours
+        )
+    days = plan["days"]
+    affected = set(plan["affected"])
+    fresh = [day for day in days if day["day"] in affected]
+
+    used = set(exclude_urls)
+    for day in days:
+        for item in day.get("checklist") or []:
+            if isinstance(item, dict) and isinstance(item.get("url"), str):
+                used.add(item["url"])
+    # Items carried over from the saved roadmap came from the client.
+    carried = {id(item) for day in fresh for item in day["checklist"]}
+    _prefill_from_index(fresh, used)
+    await _fill_slots(
+        fresh, company_name, job_role, job_link, solved_stats, window_days, max_parallel
+    )
+
+    # Days kept from a model-planned roadmap have no slots to count hours from.
+    planned = all(day.get("slots") for day in days)
+    result = {
+        "company": company_name,
+        "role": job_role,
+        "total_days": total_prep_days,
+        "daily_hours": daily_hours,
+        "roadmap": days,
+        "summary": summarize_roadmap(
+            days, {"major_focus_areas": planned_focus_areas(days)} if planned else None
+        ),
+        "profile": profile_of(dsa_topics, core_fundamentals),
+        "regeneration": {
+            "affected_days": plan["affected"],
+            "kept_days": total_prep_days - len(affected),
+            "changed_topics": plan["changed_topics"],
+        },
+    }
+    await _aingest({
+        "roadmap": [
+            {"checklist": [i for i in day["checklist"] if id(i) not in carried]}
+            for day in fresh
+        ]
+    })
+    return result
+
+
+async def astream_roadmap_from_profile(
+    company_name: str,
+    job_role: str,
+    job_link: str,
+    total_prep_days: int,
+    daily_hours: float,
+    dsa_topics: dict,
+    core_fundamentals: dict,
+    solved_stats: dict | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming variant of agenerate_roadmap_from_profile().
+    Yields ("day", day) for each roadmap day as soon as it is parsed and
+    validated, then a single ("summary", {...}) with the top-level fields.
+    Only one day is buffered at a time; summary totals are counted locally.
+    """
+    known = await asyncio.to_thread(_known_resources, dsa_topics, core_fundamentals)
+    prompt = _build_roadmap_prompt(
+        company_name, job_role, job_link, total_prep_days, daily_hours,
+        dsa_topics, core_fundamentals, solved_stats, known,
+    )
+    parser = ArrayStreamParser("roadmap")
+    summary = SummaryBuilder()
+
+    try:
+        async for chunk in agenerate_stream(
+            job_description=prompt, schema=_schema(RoadmapSchema), kind="roadmap"
+        ):
+            for day in parser.feed(chunk):
+                day = _validate_day(day, summary.days + 1)
+                summary.add_day(day)
+                yield "day", day
+
+        if summary.days == 0:
+            raise ValueError("Roadmap stream produced no days")
+    except ValueError:
+        parse_failures.inc(kind="stream")
+        raise
+
+    try:
+        outer = parser.finish()
+    except ValueError:
+        # The days already sent are valid; only the trailing summary was lost.
+        parse_failures.inc(kind="stream_summary")
+        outer = {}
+
+    yield "summary", {
+        "company": outer.get("company", company_name),
+        "role": outer.get("role", job_role),
+        "total_days": outer.get("total_days", total_prep_days),
+        "daily_hours": outer.get("daily_hours", daily_hours),
+        "summary": summary.build(outer.get("summary")),
+    }
 
 
 if __name__ == "__main__":
@@ -269,5 +1089,4 @@ if __name__ == "__main__":
         core_fundamentals=mock_core_fundamentals,
     )
     print("\n--- Sample Roadmap Output ---")
-    print(json.dumps(roadmap, indent=2))
-    print(generate_roadmap_from_profile())
\ No newline at end of file
+    print(json.dumps(roadmap, indent=2))
\ No newline at end of file
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth import client_key
+from services.jobs import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/stats")
+def job_stats():
+    return job_queue.stats()
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for a change"),
+    key: str = Depends(client_key),
+):
+    """
+    Status of a job this client submitted with ?job=true, and its result
+    once it succeeded. Other clients get 404.
+    """
+    job = await job_queue.wait(job_id, wait, key)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, key: str = Depends(client_key)):
+    """
+    Cancel a job this client submitted. A job other clients also submitted
+    keeps running for them. Async so the task is cancelled on the event loop.
+    """
+    job = job_queue.cancel(job_id, key)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from services.leetcode import LeetCodeUserNotFound, leetcode_client
+
+router = APIRouter(prefix="/api/leetcode", tags=["leetcode"])
+
+
+class BatchStatsRequest(BaseModel):
+    usernames: list[str] = Field(..., min_length=1, max_length=100, description="LeetCode usernames")
+
+
+@router.get("/stats/{username}")
+async def get_topic_stats(username: str):
+    """Per-tag Easy/Medium/Hard/Total solved counts for one LeetCode user."""
+    try:
+        return await leetcode_client.atopic_stats(username)
+    except LeetCodeUserNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.post("/stats")
+async def get_topic_stats_batch(req: BatchStatsRequest):
+    """Topic stats for many users; unknown or private profiles map to null."""
+    try:
+        return await leetcode_client.abatch_topic_stats(req.usernames)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.get("/cache/stats")
+def leetcode_cache_stats():
+    return leetcode_client.stats()
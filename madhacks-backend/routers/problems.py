@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+
+from auth import client_key, uid_of
+from services.crud import get_urls_for_user
+from services.problem_catalog import problem_catalog, used_slugs
+
+router = APIRouter(prefix="/api/problems", tags=["problems"])
+
+
+class SelectProblemsRequest(BaseModel):
+    topic: str = Field(..., min_length=1, description="Topic name; matched by canonical topic id")
+    difficulties: list[str] = Field(
+        ..., min_length=1, max_length=20, description='One entry per problem, e.g. ["easy", "medium"]'
+    )
+    exclude: list[str] = Field(default_factory=list, description="Problem URLs or slugs to skip")
+
+
+@router.post("/select")
+def select_problems(req: SelectProblemsRequest, key: str = Depends(client_key)):
+    """
+    Checklist items for one roadmap slot, picked from the local catalog.
+    With a valid bearer token, problems already in the caller's roadmaps are skipped.
+    """
+    try:
+        uid = uid_of(key)
+        urls = list(get_urls_for_user(uid)) if uid else []
+        exclude = used_slugs(urls + req.exclude) | {e for e in req.exclude if "/" not in e}
+        return {
+            "version": problem_catalog.version,
+            "items": problem_catalog.select(req.topic, req.difficulties, exclude=exclude),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+def problem_catalog_stats():
+    return problem_catalog.stats()
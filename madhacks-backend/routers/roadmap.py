@@ -1,15 +1,19 @@
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel, Field
 
 from auth import verify_firebase_token
+from services.roadmap_views import roadmap_views
 from services.crud import (
     save_roadmap_dump,
-    get_roadmaps_by_user_id,
+    get_roadmap,
+    list_roadmaps,
     extract_urls_and_update_db,
     get_url_status,
-    set_url_status
+    set_url_status,
+    set_url_statuses,
+    run_in_unit,
 )
 
 router = APIRouter(prefix="/api/roadmap", tags=["roadmap"])
@@ -33,6 +37,15 @@ class SaveItemRequest(BaseModel):
     checked: bool = Field(..., description="Checked status")
 
 
+class SaveItemsRequest(BaseModel):
+    items: list[SaveItemRequest] = Field(
+        default_factory=list, max_length=1000, description="Changes to apply"
+    )
+    company_name: Optional[str] = Field(None, description="Limit changes to this saved roadmap")
+    day: Optional[int] = Field(None, ge=1, description="Limit changes to this day (needs company_name)")
+    checked: Optional[bool] = Field(None, description="Apply to every item in the company/day scope")
+
+
 @router.post("/save")
 def save_roadmap(
     req: SaveRoadmapRequest,
@@ -41,8 +54,13 @@ def save_roadmap(
     """Save a roadmap to Firebase under the authenticated user."""
     try:
         user_id = user["uid"]
-        save_roadmap_dump(user_id, req.company_name.strip(), req.roadmap_json)
-        extract_urls_and_update_db(user_id, req.roadmap_json)
+
+        def save(uow):
+            save_roadmap_dump(user_id, req.company_name.strip(), req.roadmap_json, uow=uow)
+            extract_urls_and_update_db(user_id, req.roadmap_json, uow=uow)
+
+        run_in_unit(user_id, save, label="save")
+        roadmap_views.invalidate(user_id)
 
         return {"ok": True, "message": "Roadmap saved"}
     except Exception as e:
@@ -50,14 +68,38 @@ def save_roadmap(
 
 
 @router.get("")
-def get_roadmaps(user_id : str):
-    """Get all roadmaps for the authenticated user."""
+def get_roadmaps(user_id : str, request: Request):
+    """Get all roadmaps for the authenticated user (ETag / If-None-Match aware)."""
+    try:
+        view = roadmap_views.get(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return view.response(request.headers)
+
+
+@router.get("/cache/stats")
+def get_roadmap_cache_stats():
+    return roadmap_views.stats()
+
+@router.get("/list")
+def get_roadmap_list(user_id: str):
+    """Company names and metadata of a user's saved roadmaps, without their content."""
+    try:
+        return {"roadmaps": list_roadmaps(user_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/company")
+def get_company_roadmap(user_id: str, company_name: str):
+    """One saved roadmap with checked flags."""
     try:
-        user_id = user_id
-        result = get_roadmaps_by_user_id(user_id)
-        return result
+        roadmap = get_roadmap(user_id, company_name.strip())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if roadmap is None:
+        raise HTTPException(status_code=404, detail=f"No saved roadmap for '{company_name}'")
+    return {"company_name": company_name.strip(), "roadmap": roadmap}
 
 @router.post("/getitem")
 def get_roadmap_item(
@@ -82,6 +124,42 @@ def save_roadmap_item(
     try:
         user_id = user['uid']
         set_url_status(user_id, req.url, req.checked)
+        roadmap_views.invalidate(user_id)
         return {"ok": True, "message": "Item updated"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/putitems")
+def save_roadmap_items(
+    req: SaveItemsRequest,
+    user: dict = Depends(verify_firebase_token),
+):
+    """Bulk variant of /putitem: every change lands in one document write."""
+    if req.day is not None and not req.company_name:
+        raise HTTPException(status_code=422, detail="day requires company_name")
+    if req.checked is not None and not req.company_name:
+        raise HTTPException(status_code=422, detail="checked requires company_name")
+    try:
+        user_id = user["uid"]
+        changes = {item.url: item.checked for item in req.items}
+        company_name = req.company_name.strip() if req.company_name else None
+
+        if company_name is None:
+            result = set_url_statuses(user_id, changes)
+            if result is None:
+                raise KeyError("No saved progress for this user")
+        else:
+            result = run_in_unit(
+                user_id,
+                lambda uow: set_url_statuses(
+                    user_id, changes, company_name, req.day, req.checked, uow=uow
+                ),
+                label="putitems",
+            )
+        roadmap_views.invalidate(user_id)
+        return {"ok": True, "updated": len(result), "items": result}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
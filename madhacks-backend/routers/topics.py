@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+
+from services import topics
+
+router = APIRouter(prefix="/api/topics", tags=["topics"])
+
+
+class ResolveTopicsRequest(BaseModel):
+    names: list[str] = Field(..., max_length=500, description="Topic names as written anywhere")
+
+
+@router.get("")
+def list_topics():
+    """Canonical topics with their ids and synonyms."""
+    return {"version": topics.TOPIC_INDEX_VERSION, "topics": topics.topic_index()}
+
+
+@router.post("/resolve")
+def resolve_topics(req: ResolveTopicsRequest):
+    """name -> {id, name, kind}; unknown topics get kind null and a slug id."""
+    return {name: topics.resolve(name)._asdict() for name in req.names}
+
+
+@router.get("/stats")
+def topic_stats():
+    return topics.stats()
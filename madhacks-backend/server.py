@@ -1,20 +1,96 @@
-from typing import Dict, Optional
+from typing import Dict, Literal, Optional
 import os
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
 
 load_dotenv()
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from llm import generate_concepts_from_prompt, generate_roadmap_from_profile
+from llm import (
+    concepts_cache,
+    agenerate_concepts_from_prompt,
+    agenerate_roadmap_from_profile,
+    agenerate_roadmap_windowed,
+    agenerate_roadmap_planned,
+    agenerate_roadmap_regenerated,
+    ROADMAP_WINDOW_THRESHOLD,
+    astream_roadmap_from_profile,
+    get_client,
+)
 
-from auth import router as auth_router
+from auth import admit_request, router as auth_router, uid_of, verify_firebase_token
+from db import STORAGE_BACKEND, get_store
+from routers.jobs import router as jobs_router
+from routers.leetcode import router as leetcode_router
+from routers.problems import router as problems_router
 from routers.roadmap import router as roadmap_router
-
-app = FastAPI()
+from routers.topics import router as topics_router
+from services.planner import UNIT_HOURS, plan_roadmap, planned_focus_areas
+from services.regenerate import profile_of
+from services.admission import admission, as_rejection
+from services.call_policy import ModelDeadlineExceeded, call_policy
+from services.crud import get_io_stats, get_roadmap, get_urls_for_user
+from services.jobs import job_queue
+from services.leetcode import LeetCodeError, LeetCodeUserNotFound, leetcode_client
+from services.metrics import MetricsMiddleware, render as render_metrics, stage
+from services.resource_index import resource_index
+from services.roadmap_views import RESPONSE_COMPRESS_MIN_BYTES
+from services.firebase_app import get_app as get_firebase_app
+from services.token_cache import token_verifier
+from services.summary import summarize_roadmap
+from services.topics import canonicalize_profile
+from services.warmup import WARMUP_ON_STARTUP, warmup
+
+logger = logging.getLogger(__name__)
+
+# SDK clients are created on first use; warm them up without delaying startup.
+if os.environ.get("GEMINI_API_KEY"):
+    warmup.register("gemini_client", get_client)
+if STORAGE_BACKEND == "firestore" or os.environ.get("FIREBASE_KEY_PATH"):
+    warmup.register("firebase_app", get_firebase_app)
+    warmup.register("firebase_auth", token_verifier.start_prefetch)
+warmup.register("document_store", get_store)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        warmup.start()
+    job_queue.open()
+    resource_index.start_link_checks()
+    yield
+    resource_index.stop_link_checks()
+    if token_verifier.prefetcher is not None:
+        token_verifier.prefetcher.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(auth_router)
 app.include_router(roadmap_router)
+app.include_router(leetcode_router)
+app.include_router(problems_router)
+app.include_router(topics_router)
+app.include_router(jobs_router)
+app.add_middleware(MetricsMiddleware)
+# Large JSON bodies; NDJSON streams stay uncompressed so days arrive as they are generated.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=RESPONSE_COMPRESS_MIN_BYTES,
+    compresslevel=6,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/x-ndjson",),
+)
 
 default_origins = [
     "http://localhost:5173",
@@ -40,6 +116,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -69,8 +146,16 @@ class RoadmapRequest(BaseModel):
     company: str = Field(..., min_length=1)
     jobLink: Optional[str] = ""
     prepDays: int = Field(..., ge=1, le=365)
+    # The local planner needs at least UNIT_HOURS (see _require_plannable_hours)
     hoursPerDay: float = Field(..., gt=0, le=23)
     conceptProfile: ConceptProfile
+    # None = generate in windows only when prepDays exceeds ROADMAP_WINDOW_THRESHOLD
+    windowed: Optional[bool] = None
+    windowDays: Optional[int] = Field(None, ge=7, le=14)
+    # "local" schedules days with services.planner and asks the model only for checklist items
+    planner: Literal["llm", "local"] = "llm"
+    # Solved counts per tag are fetched from this profile and added to the prompt
+    leetcodeUsername: Optional[str] = None
 
 
 @app.get("/api/health")
@@ -78,57 +163,335 @@ def health():
     return {"ok": True}
 
 
+async def _generate_concepts(req: ConceptsRequest) -> dict:
+    result = await agenerate_concepts_from_prompt(
+        company_name=req.company.strip(),
+        job_role=req.role.strip(),
+        job_link=(req.jobLink or "").strip(),
+    )
+
+    if (
+        not isinstance(result, dict)
+        or not isinstance(result.get("dsaConcepts"), dict)
+        or not isinstance(result.get("coreConcepts"), dict)
+    ):
+        raise ValueError(
+            "llm.py returned invalid shape. Expected {dsaConcepts: {...}, coreConcepts: {...}}"
+        )
+
+    return result
+
+
+async def _submit_job(kind: str, req: BaseModel, uid: Optional[str] = None) -> JSONResponse:
+    """
+    202 with the job (poll GET /api/jobs/{id}); an identical pending job is reused.
+    uid, the caller's verified uid, travels in the payload for handlers that need it.
+    """
+    payload = req.model_dump()
+    if uid:
+        payload["uid"] = uid
+    job, deduplicated = await job_queue.submit(kind, payload)
+    return JSONResponse(
+        status_code=202,
+        content={**job, "deduplicated": deduplicated},
+        headers={"Location": f"/api/jobs/{job['id']}"},
+    )
+
+
+def _error(e: Exception) -> HTTPException:
+    """429 for admission and provider rate limits, 504 past the model deadline, 500 otherwise."""
+    if isinstance(e, ModelDeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    return as_rejection(e) or HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/concepts", response_model=ConceptsResponse)
-def concepts(req: ConceptsRequest):
+async def concepts(
+    req: ConceptsRequest, job: bool = False, _client: str = Depends(admit_request("concepts"))
+):
+    """With ?job=true, runs in the background and returns a job id at once."""
+    if job:
+        return await _submit_job("concepts", req)
     try:
-        result = generate_concepts_from_prompt(
-            company_name=req.company.strip(),
-            job_role=req.role.strip(),
-            job_link=(req.jobLink or "").strip(),
+        return await _generate_concepts(req)
+    except Exception as e:
+        raise _error(e)
+
+
+@app.get("/api/concepts/cache")
+def concepts_cache_stats():
+    return concepts_cache.stats()
+
+
+@app.get("/api/storage/stats")
+def storage_stats():
+    """Document reads/writes per operation, to track per-endpoint cost."""
+    return get_io_stats()
+
+
+@app.get("/api/tokens/stats")
+def token_cache_stats():
+    return token_verifier.stats()
+
+
+@app.get("/api/admission/stats")
+def admission_stats():
+    """Model-call slots in use, queue depth by kind, and rejection counts."""
+    return admission.stats()
+
+
+@app.get("/api/startup/stats")
+def startup_stats():
+    """Background warm-up steps and how long each took."""
+    return warmup.stats()
+
+
+@app.get("/api/llm/stats")
+def llm_stats():
+    """Model call policy: targets, deadlines, retry/fallback/hedge counts and recent latency."""
+    return call_policy.stats()
+
+
+@app.get("/api/resources/stats")
+def resource_index_stats():
+    return resource_index.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of request, stage, token and storage metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def _roadmap_kwargs(req: RoadmapRequest) -> dict:
+    dsa_topics = {
+        k: {"importance": float(v.importance), "confidence": float(v.confidence)}
+        for k, v in req.conceptProfile.dsa_topics.items()
+    }
+    core_fundamentals = {
+        k: {"importance": float(v.importance), "confidence": float(v.confidence)}
+        for k, v in req.conceptProfile.core_fundamentals.items()
+    }
+    return {
+        "company_name": req.company.strip(),
+        "job_role": req.role.strip(),
+        "job_link": (req.jobLink or "").strip(),
+        "total_prep_days": int(req.prepDays),
+        "daily_hours": float(req.hoursPerDay),
+        "dsa_topics": canonicalize_profile(dsa_topics),
+        "core_fundamentals": canonicalize_profile(core_fundamentals),
+    }
+
+
+def _require_plannable_hours(req: RoadmapRequest) -> None:
+    """The local planner schedules in UNIT_HOURS blocks, so a shorter day cannot be planned."""
+    if req.hoursPerDay < UNIT_HOURS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"hoursPerDay must be at least {UNIT_HOURS:g} with the local planner",
         )
 
-        if (
-            not isinstance(result, dict)
-            or not isinstance(result.get("dsaConcepts"), dict)
-            or not isinstance(result.get("coreConcepts"), dict)
-        ):
-            raise ValueError(
-                "llm.py returned invalid shape. Expected {dsaConcepts: {...}, coreConcepts: {...}}"
-            )
 
-        return result
+async def _solved_stats(req: RoadmapRequest) -> Optional[dict]:
+    """
+    LeetCode topic stats for the request's username, if any. An unknown
+    profile is the caller's error; LeetCode being unreachable only costs
+    the personalization, so the roadmap is generated without it.
+    """
+    username = (req.leetcodeUsername or "").strip()
+    if not username:
+        return None
+    try:
+        return await leetcode_client.atopic_stats(username)
+    except LeetCodeUserNotFound as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LeetCodeError as e:
+        logger.warning("LeetCode stats unavailable for %s: %s", username, e)
+        return None
+
+
+async def _used_urls(uid: Optional[str]) -> list[str]:
+    """Checklist URLs of the user's saved roadmaps; empty if anonymous or unavailable."""
+    if not uid:
+        return []
+    try:
+        return list(await asyncio.to_thread(get_urls_for_user, uid))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.warning("could not load saved URLs for %s: %s", uid, e)
+        return []
+
+
+async def _generate_roadmap(
+    req: RoadmapRequest, solved_stats: Optional[dict], uid: Optional[str] = None
+) -> dict:
+    """uid (verified) keeps the local planner off problems in that user's saved roadmaps."""
+    windowed = req.windowed
+    if windowed is None:
+        windowed = req.prepDays > ROADMAP_WINDOW_THRESHOLD
+
+    if req.planner == "local":
+        result = await agenerate_roadmap_planned(
+            **_roadmap_kwargs(req),
+            solved_stats=solved_stats,
+            window_days=req.windowDays,
+            exclude_urls=await _used_urls(uid),
+        )
+    elif windowed:
+        result = await agenerate_roadmap_windowed(
+            **_roadmap_kwargs(req), solved_stats=solved_stats, window_days=req.windowDays
+        )
+    else:
+        result = await agenerate_roadmap_from_profile(
+            **_roadmap_kwargs(req), solved_stats=solved_stats
+        )
+
+    if not isinstance(result, dict):
+        raise ValueError("Roadmap output must be a JSON object")
+
+    # Kept with the roadmap so /api/roadmap/regenerate can tell what changed.
+    kwargs = _roadmap_kwargs(req)
+    result["profile"] = profile_of(kwargs["dsa_topics"], kwargs["core_fundamentals"])
+    return result
 
 
 @app.post("/api/roadmap")
-def roadmap(req: RoadmapRequest):
+async def roadmap(
+    req: RoadmapRequest, job: bool = False, client: str = Depends(admit_request("roadmap"))
+):
+    """With ?job=true, runs in the background and returns a job id at once."""
+    uid = None
+    if req.planner == "local":
+        _require_plannable_hours(req)
+        uid = uid_of(client)
+    if job:
+        return await _submit_job("roadmap", req, uid)
+    solved_stats = await _solved_stats(req)
     try:
-        dsa_topics = {
-            k: {"importance": float(v.importance), "confidence": float(v.confidence)}
-            for k, v in req.conceptProfile.dsa_topics.items()
-        }
-        core_fundamentals = {
-            k: {"importance": float(v.importance), "confidence": float(v.confidence)}
-            for k, v in req.conceptProfile.core_fundamentals.items()
-        }
-
-        result = generate_roadmap_from_profile(
-            company_name=req.company.strip(),
-            job_role=req.role.strip(),
-            job_link=(req.jobLink or "").strip(),
-            total_prep_days=int(req.prepDays),
-            daily_hours=float(req.hoursPerDay),
-            dsa_topics=dsa_topics,
-            core_fundamentals=core_fundamentals,
+        return await _generate_roadmap(req, solved_stats, uid)
+    except Exception as e:
+        raise _error(e)
+
+
+class RegenerateRequest(RoadmapRequest):
+    # The roadmap to update; without it, the caller's saved roadmap for this company is used
+    roadmap: Optional[dict] = None
+
+
+async def _regenerate_roadmap(req: RegenerateRequest, solved_stats: Optional[dict], uid: str) -> dict:
+    existing = req.roadmap
+    if existing is None:
+        existing = await asyncio.to_thread(get_roadmap, uid, req.company.strip())
+    if not isinstance(existing, dict) or not isinstance(existing.get("roadmap"), list):
+        raise HTTPException(
+            status_code=404, detail="No roadmap to regenerate; send roadmap or save one for this company"
         )
+    return await agenerate_roadmap_regenerated(
+        existing,
+        **_roadmap_kwargs(req),
+        solved_stats=solved_stats,
+        window_days=req.windowDays,
+        exclude_urls=await _used_urls(uid),
+    )
 
-        if not isinstance(result, dict):
-            raise ValueError("Roadmap output must be a JSON object")
 
-        return result
+@app.post("/api/roadmap/regenerate")
+async def roadmap_regenerate(
+    req: RegenerateRequest,
+    job: bool = False,
+    user: dict = Depends(verify_firebase_token),
+    _client: str = Depends(admit_request("roadmap")),
+):
+    """
+    Update an existing roadmap after a profile, prepDays or hoursPerDay change.
+    Only affected days are re-planned and filled; other days and checked items
+    are kept and the summary is recomputed. Always uses the local planner.
+    """
+    _require_plannable_hours(req)
+    uid = user["uid"]
+    if job:
+        return await _submit_job("regenerate", req, uid)
+    solved_stats = await _solved_stats(req)
+    try:
+        return await _regenerate_roadmap(req, solved_stats, uid)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _error(e)
+
+
+# The models ignore the extra "uid" key _submit_job() may add.
+async def _roadmap_job(payload: dict) -> dict:
+    req = RoadmapRequest(**payload)
+    return await _generate_roadmap(req, await _solved_stats(req), payload.get("uid"))
+
+
+async def _regenerate_job(payload: dict) -> dict:
+    req = RegenerateRequest(**payload)
+    return await _regenerate_roadmap(req, await _solved_stats(req), payload["uid"])
+
+
+async def _concepts_job(payload: dict) -> dict:
+    return await _generate_concepts(ConceptsRequest(**payload))
+
+
+job_queue.register("roadmap", _roadmap_job)
+job_queue.register("regenerate", _regenerate_job)
+job_queue.register("concepts", _concepts_job)
+
+
+@app.post("/api/roadmap/plan")
+def roadmap_plan(req: RoadmapRequest):
+    """Day/topic skeleton from the local planner only; no model call."""
+    _require_plannable_hours(req)
+    kwargs = _roadmap_kwargs(req)
+    with stage("planner"):
+        days = plan_roadmap(
+            kwargs["dsa_topics"],
+            kwargs["core_fundamentals"],
+            kwargs["total_prep_days"],
+            kwargs["daily_hours"],
+        )
+    return {
+        "company": kwargs["company_name"],
+        "role": kwargs["job_role"],
+        "total_days": kwargs["total_prep_days"],
+        "daily_hours": kwargs["daily_hours"],
+        "roadmap": days,
+        "summary": summarize_roadmap(days, {"major_focus_areas": planned_focus_areas(days)}),
+    }
+
+
+@app.post("/api/roadmap/stream")
+async def roadmap_stream(req: RoadmapRequest, _client: str = Depends(admit_request("roadmap"))):
+    """
+    NDJSON variant of /api/roadmap. One line per event:
+      {"event": "day", "data": {...day...}}        as each day is generated
+      {"event": "summary", "data": {company, role, total_days, daily_hours, summary}}
+      {"event": "error", "detail": "..."}           if generation fails midway
+                                                    (plus status/retry_after when rate limited,
+                                                    status 504 past the model deadline)
+    """
+    kwargs = _roadmap_kwargs(req)
+    kwargs["solved_stats"] = await _solved_stats(req)
+
+    async def events():
+        try:
+            async for event, data in astream_roadmap_from_profile(**kwargs):
+                yield json.dumps({"event": event, "data": data}) + "\n"
+        except Exception as e:
+            error = {"event": "error", "detail": str(e)}
+            rejected = as_rejection(e)
+            if rejected is not None:
+                error.update(detail=rejected.detail, status=429, retry_after=rejected.retry_after)
+            elif isinstance(e, ModelDeadlineExceeded):
+                error["status"] = 504
+            yield json.dumps(error) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 def main():
@@ -0,0 +1,274 @@
+"""
+Admission control in front of model calls.
+
+- Per-client token buckets: each request to a model-backed endpoint costs
+  ADMISSION_COSTS[kind] tokens from its client's bucket (Firebase uid when
+  a valid bearer token is sent, client IP otherwise), refilled at
+  ADMISSION_USER_RATE_PER_MINUTE up to ADMISSION_USER_BURST
+- A global cap of GEMINI_MAX_CONCURRENCY model calls in flight; calls
+  beyond it wait in a fair queue: cheaper kinds first (concepts before
+  roadmaps), then the client holding the fewest slots, then arrival order
+- An empty bucket or a queue of ADMISSION_MAX_QUEUE waiting calls is a
+  fast 429 with Retry-After instead of a long hang
+
+admit() runs per request (see auth.admit_request) and tags the
+request's context with the client and kind; acquire() reads that tag, so
+every model call a request makes is scheduled as that client's.
+"""
+
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import HTTPException
+
+from services.metrics import admission_queue, admission_rejections, admission_wait
+
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "64"))
+# 0 disables the per-client limit
+ADMISSION_USER_RATE_PER_MINUTE = float(os.environ.get("ADMISSION_USER_RATE_PER_MINUTE", "20"))
+ADMISSION_USER_BURST = float(os.environ.get("ADMISSION_USER_BURST", "10"))
+ADMISSION_MAX_CLIENTS = int(os.environ.get("ADMISSION_MAX_CLIENTS", "10000"))
+
+# Bucket tokens per request and queue priority (lower goes first), by kind.
+ADMISSION_COSTS = {"concepts": 1.0, "roadmap": 3.0}
+ADMISSION_PRIORITIES = {"concepts": 0, "roadmap": 1}
+
+# Seconds a model call holds its slot, until measured.
+_INITIAL_HOLD_SECONDS = 10.0
+
+_identity: contextvars.ContextVar[tuple[str, str]] = contextvars.ContextVar(
+    "admission_identity", default=("local", "roadmap")
+)
+
+
+class AdmissionRejected(HTTPException):
+    """429 with Retry-After; raised for an empty bucket or a full queue."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        seconds = max(1, math.ceil(retry_after))
+        message = {
+            "rate_limited": "Too many requests from this client",
+            "queue_full": "The server is busy",
+            "provider": "The model provider is rate limiting requests",
+        }.get(reason, "Too many requests")
+        super().__init__(
+            status_code=429,
+            detail=f"{message}; retry in {seconds}s",
+            headers={"Retry-After": str(seconds)},
+        )
+        self.reason = reason
+        self.retry_after = seconds
+
+
+def as_rejection(e: BaseException) -> Optional[AdmissionRejected]:
+    """A 429 for provider rate-limit errors (google.genai APIError code 429), else None."""
+    if isinstance(e, AdmissionRejected):
+        return e
+    if getattr(e, "code", None) == 429:
+        admission_rejections.inc(reason="provider")
+        return AdmissionRejected("provider", 30)
+    return None
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "key", "kind", "future", "enqueued")
+
+    def __init__(self, priority: int, seq: int, key: str, kind: str, future: asyncio.Future) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.kind = kind
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_active: int = GEMINI_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        rate_per_minute: float = ADMISSION_USER_RATE_PER_MINUTE,
+        burst: float = ADMISSION_USER_BURST,
+        max_clients: int = ADMISSION_MAX_CLIENTS,
+    ) -> None:
+        self.max_active = max(1, max_active)
+        self.max_queue = max(0, max_queue)
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, max(ADMISSION_COSTS.values()))
+        self.max_clients = max_clients
+
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}  # key -> (tokens, updated)
+        # Slot state is only touched on the event loop.
+        self._active = 0
+        self._active_by_key: dict[str, int] = {}
+        self._waiting: list[_Waiter] = []
+        self._seq = 0
+        self._hold_seconds = _INITIAL_HOLD_SECONDS
+        self._counters = {"admitted": 0, "rate_limited": 0, "queue_full": 0, "granted": 0, "waited": 0}
+
+    # -----------------------------
+    # Per-client token buckets
+    # -----------------------------
+    def _tokens(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def charge(self, key: str, kind: str) -> None:
+        """Take the request's cost from the client's bucket or raise AdmissionRejected."""
+        if self.rate <= 0:
+            return
+        cost = ADMISSION_COSTS.get(kind, 1.0)
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._tokens(key, now)
+            if tokens < cost:
+                self._counters["rate_limited"] += 1
+                admission_rejections.inc(reason="rate_limited")
+                raise AdmissionRejected("rate_limited", (cost - tokens) / self.rate)
+            self._buckets[key] = (tokens - cost, now)
+            if len(self._buckets) > self.max_clients:
+                # Full buckets hold no state worth keeping.
+                for k in [k for k in self._buckets if self._tokens(k, now) >= self.burst]:
+                    del self._buckets[k]
+
+    def _queue_full_retry_after(self) -> float:
+        return self._hold_seconds * math.ceil((len(self._waiting) + 1) / self.max_active)
+
+    def admit(self, key: str, kind: str) -> None:
+        """
+        Admit a request: reject at once if the queue is full, charge the
+        client's bucket, and tag the current context for acquire().
+        """
+        if len(self._waiting) >= self.max_queue and self._active >= self.max_active:
+            self._counters["queue_full"] += 1
+            admission_rejections.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full", self._queue_full_retry_after())
+        self.charge(key, kind)
+        self._counters["admitted"] += 1
+        _identity.set((key, kind))
+
+    def current(self) -> tuple[str, str]:
+        """(client key, kind) of the running request."""
+        return _identity.get()
+
+    def bind(self, identity: tuple[str, str]) -> None:
+        """Schedule the current context's model calls as `identity` (e.g. in a job)."""
+        _identity.set(identity)
+
+    # -----------------------------
+    # Global slots, fair queue
+    # -----------------------------
+    def _publish(self) -> None:
+        admission_queue.set(len(self._waiting), state="waiting")
+        admission_queue.set(self._active, state="active")
+
+    def _take(self, key: str) -> None:
+        self._active += 1
+        self._active_by_key[key] = self._active_by_key.get(key, 0) + 1
+        self._counters["granted"] += 1
+
+    def _grant_next(self) -> None:
+        while self._active < self.max_active and self._waiting:
+            waiter = min(
+                self._waiting,
+                key=lambda w: (w.priority, self._active_by_key.get(w.key, 0), w.seq),
+            )
+            self._waiting.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._take(waiter.key)
+            waiter.future.set_result(None)
+        self._publish()
+
+    def _release(self, key: str, held: float) -> None:
+        self._active -= 1
+        remaining = self._active_by_key.get(key, 1) - 1
+        if remaining:
+            self._active_by_key[key] = remaining
+        else:
+            self._active_by_key.pop(key, None)
+        self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+        self._grant_next()
+
+    async def acquire(self) -> tuple[str, float]:
+        """
+        Wait for one of the max_active model-call slots. Returns a handle
+        for release(); raises AdmissionRejected if the queue is full.
+        """
+        key, kind = _identity.get()
+        if self._active >= self.max_active or self._waiting:
+            if len(self._waiting) >= self.max_queue:
+                self._counters["queue_full"] += 1
+                admission_rejections.inc(reason="queue_full")
+                raise AdmissionRejected("queue_full", self._queue_full_retry_after())
+            self._seq += 1
+            waiter = _Waiter(
+                ADMISSION_PRIORITIES.get(kind, 1), self._seq, key, kind,
+                asyncio.get_running_loop().create_future(),
+            )
+            self._waiting.append(waiter)
+            self._counters["waited"] += 1
+            self._publish()
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter in self._waiting:
+                    self._waiting.remove(waiter)
+                    self._publish()
+                elif waiter.future.done() and not waiter.future.cancelled():
+                    # Granted just as the caller went away: pass the slot on.
+                    self._release(key, 0.0)
+                raise
+            admission_wait.observe(time.perf_counter() - waiter.enqueued, kind=kind)
+        else:
+            self._take(key)
+            self._publish()
+            admission_wait.observe(0.0, kind=kind)
+        return key, time.perf_counter()
+
+    def has_free_slot(self) -> bool:
+        """True when a call could start now without queueing."""
+        return self._active < self.max_active and not self._waiting
+
+    def release(self, handle: tuple[str, float]) -> None:
+        key, started = handle
+        self._release(key, time.perf_counter() - started)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        handle = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(handle)
+
+    def stats(self) -> dict[str, Any]:
+        waiting_by_kind: dict[str, int] = {}
+        for waiter in list(self._waiting):
+            waiting_by_kind[waiter.kind] = waiting_by_kind.get(waiter.kind, 0) + 1
+        with self._lock:
+            clients = len(self._buckets)
+        return {
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "waiting": len(self._waiting),
+            "waiting_by_kind": waiting_by_kind,
+            "clients_holding_slots": len(self._active_by_key),
+            "tracked_clients": clients,
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "avg_hold_seconds": round(self._hold_seconds, 3),
+            **self._counters,
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,310 @@
+"""
+Two-tier response cache for expensive model calls.
+
+- Tier 1: in-process LRU with a per-entry TTL
+- Tier 2: SQLite table on local disk, survives restarts
+- Single-flight: concurrent misses for the same key share one computation
+
+Values must be JSON-serializable.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+
+def normalize_part(value: Any) -> str:
+    """Lowercase and collapse whitespace so 'Google ' and 'google' share a key."""
+    return " ".join(str(value or "").split()).lower()
+
+
+def make_key(*parts: Any) -> str:
+    """Stable digest over normalized key parts."""
+    joined = "\x1f".join(normalize_part(p) for p in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Nobody may be left awaiting a failed flight; don't log it as unretrieved.
+    if not task.cancelled():
+        task.exception()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 256,
+        ttl_seconds: float = 24 * 3600,
+        db_path: str | None = None,
+    ) -> None:
+        self.namespace = namespace
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.db_path = db_path or None
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._flights: dict[str, _Flight] = {}
+        self._async_flights: dict[str, asyncio.Task] = {}
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+        self._conn: sqlite3.Connection | None = None
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self._conn.commit()
+
+    # -----------------------------
+    # Tier 1: memory
+    # -----------------------------
+    def _memory_get(self, key: str, now: float) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self._counters["expirations"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _memory_set(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # -----------------------------
+    # Tier 2: SQLite
+    # -----------------------------
+    def _disk_get(self, key: str, now: float) -> tuple[bool, Any, float]:
+        if self._conn is None:
+            return False, None, 0.0
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM response_cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            return False, None, 0.0
+        raw, expires_at = row
+        if expires_at <= now:
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            self._conn.commit()
+            self._counters["expirations"] += 1
+            return False, None, 0.0
+        return True, json.loads(raw), expires_at
+
+    def _disk_set(self, key: str, value: Any, expires_at: float) -> None:
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO response_cache (namespace, key, value, expires_at)"
+            " VALUES (?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), expires_at),
+        )
+        self._conn.commit()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            found, value = self._memory_get(key, now)
+            if found:
+                self._counters["memory_hits"] += 1
+                return value
+            found, value, expires_at = self._disk_get(key, now)
+            if found:
+                self._counters["disk_hits"] += 1
+                self._memory_set(key, value, expires_at)
+                return value
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._memory_set(key, value, expires_at)
+            self._disk_set(key, value, expires_at)
+
+    async def aget(self, key: str) -> Any | None:
+        """get() that reads the SQLite tier in a worker thread, off the event loop."""
+        if self._conn is None:
+            return self.get(key)
+        with self._lock:
+            found, value = self._memory_get(key, time.time())
+            if found:
+                self._counters["memory_hits"] += 1
+                return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """set() with the SQLite write in a worker thread."""
+        if self._conn is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, or run compute() once and cache it.
+        Callers that miss while another caller is computing the same key wait
+        for that result instead of calling compute() themselves.
+        Failures are not cached and are re-raised to every waiter.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # A flight that finished between get() and here has already
+            # stored its value; look again before starting a new one.
+            now = time.time()
+            found, value = self._memory_get(key, now)
+            if found:
+                self._counters["memory_hits"] += 1
+                return value
+            found, value, expires_at = self._disk_get(key, now)
+            if found:
+                self._counters["disk_hits"] += 1
+                self._memory_set(key, value, expires_at)
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._counters["misses"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self.set(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Async variant of get_or_compute(). compute() runs in a task owned by
+        the flight and every caller, the first one included, awaits it
+        shielded, so cancelling any caller leaves the computation running
+        for the others (and its result is still cached). The SQLite tier is
+        read and written in a worker thread.
+        """
+        value = await self.aget(key)
+        if value is not None:
+            return value
+
+        flight = self._async_flights.get(key)
+        if flight is None:
+            # A flight may have finished while the disk tier was being read.
+            with self._lock:
+                found, value = self._memory_get(key, time.time())
+            if found:
+                return value
+            flight = asyncio.ensure_future(self._afill(key, compute))
+            flight.add_done_callback(_retrieve_exception)
+            self._async_flights[key] = flight
+            with self._lock:
+                self._counters["misses"] += 1
+        else:
+            with self._lock:
+                self._counters["coalesced"] += 1
+        return await asyncio.shield(flight)
+
+    async def _afill(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            await self.aset(key, value)
+            return value
+        except BaseException:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            self._async_flights.pop(key, None)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute(
+                    "DELETE FROM response_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute(
+                    "DELETE FROM response_cache WHERE namespace = ?", (self.namespace,)
+                )
+                self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"] + self._counters["coalesced"]
+            return {
+                "namespace": self.namespace,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._conn is not None,
+                **self._counters,
+                "hit_ratio": (hits / lookups) if lookups else 0.0,
+            }
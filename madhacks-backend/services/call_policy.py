@@ -0,0 +1,334 @@
+"""
+Deadline, retry, hedging and fallback policy for model calls.
+
+- Every request gets one deadline by endpoint (LLM_DEADLINE_<KIND>_SECONDS,
+  kind taken from services.admission), started by begin() at admission or
+  when a job starts and shared by all of its model calls and their
+  attempts; calls outside such a context get a deadline each
+- Transient failures (5xx, 429, timeouts, dropped connections) are retried
+  up to LLM_MAX_ATTEMPTS times with full-jitter exponential backoff;
+  429/503 ("overloaded") also move on to the next target
+- Targets are GEMINI_MODEL followed by GEMINI_FALLBACK_MODELS (none by
+  default), each "model" or "model:thinking_budget"
+- Streams are retried and fall back only until they are open; the
+  deadline still bounds the whole stream
+- Async calls still running after the LLM_HEDGE_PERCENTILE latency of
+  recent successful calls (per model and call kind) get one hedged
+  duplicate; the first to succeed wins and the other is cancelled.
+  Hedges need LLM_HEDGE_MIN_SAMPLES of history, a free model-call slot,
+  and stay under LLM_HEDGE_MAX_RATIO of calls
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, TypeVar
+
+from services.admission import admission
+from services.metrics import llm_hedges, retries
+
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-flash-latest")
+GEMINI_FALLBACK_MODELS = os.environ.get("GEMINI_FALLBACK_MODELS", "")
+GEMINI_THINKING_BUDGET = int(os.environ.get("GEMINI_THINKING_BUDGET", "4096"))
+
+LLM_DEADLINES = {
+    "concepts": float(os.environ.get("LLM_DEADLINE_CONCEPTS_SECONDS", "90")),
+    "roadmap": float(os.environ.get("LLM_DEADLINE_ROADMAP_SECONDS", "300")),
+}
+LLM_MAX_ATTEMPTS = int(os.environ.get("LLM_MAX_ATTEMPTS", "3"))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", "10"))
+# 0 turns hedging off
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MAX_RATIO = float(os.environ.get("LLM_HEDGE_MAX_RATIO", "0.1"))
+LLM_LATENCY_WINDOW = int(os.environ.get("LLM_LATENCY_WINDOW", "200"))
+
+# HTTP statuses worth another attempt; the overloaded ones also switch target.
+TRANSIENT_CODES = {408, 429, 500, 502, 503, 504}
+OVERLOADED_CODES = {429, 503}
+
+T = TypeVar("T")
+
+# time.monotonic() by which the current request's model calls must finish
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "llm_request_deadline", default=None
+)
+
+
+class Target(NamedTuple):
+    model: str
+    thinking_budget: int
+
+
+class ModelDeadlineExceeded(TimeoutError):
+    def __init__(self, kind: str, seconds: float) -> None:
+        super().__init__(f"Model call ({kind}) did not finish within {seconds:g}s")
+        self.kind = kind
+
+
+def parse_targets(primary: str, fallbacks: str, thinking_budget: int) -> list[Target]:
+    targets: list[Target] = []
+    for entry in [primary, *fallbacks.split(",")]:
+        model, _, budget = entry.strip().partition(":")
+        if not model:
+            continue
+        target = Target(model, int(budget) if budget.strip() else thinking_budget)
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def is_transient(e: BaseException) -> bool:
+    if getattr(e, "code", None) in TRANSIENT_CODES:
+        return True
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    # httpx is only loaded once the model client is.
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(e, httpx.TransportError)
+
+
+def is_overloaded(e: BaseException) -> bool:
+    return getattr(e, "code", None) in OVERLOADED_CODES
+
+
+class LatencyTracker:
+    """Recent successful call durations per (model, call kind)."""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW) -> None:
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self._samples: dict[tuple[str, str], deque] = {}
+
+    def observe(self, model: str, kind: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault((model, kind), deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, kind: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get((model, kind), ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        samples.sort()
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            keys = list(self._samples)
+        out: dict[str, Any] = {}
+        for model, kind in keys:
+            out[f"{model}/{kind}"] = {
+                "samples": len(self._samples[(model, kind)]),
+                **{f"p{p}": self.percentile(model, kind, p) for p in (50, 95, 99)},
+            }
+        return out
+
+
+class CallPolicy:
+    def __init__(
+        self,
+        targets: list[Target],
+        deadlines: dict[str, float] = LLM_DEADLINES,
+        max_attempts: int = LLM_MAX_ATTEMPTS,
+        backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+        backoff_max: float = LLM_BACKOFF_MAX_SECONDS,
+        hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        hedge_max_ratio: float = LLM_HEDGE_MAX_RATIO,
+    ) -> None:
+        self.targets = targets
+        self.deadlines = deadlines
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = hedge_max_ratio
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._counters = {
+            "calls": 0, "attempts": 0, "retries": 0, "fallbacks": 0,
+            "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0,
+        }
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def deadline(self) -> tuple[str, float]:
+        """(endpoint kind, seconds) for the current request."""
+        kind = admission.current()[1]
+        return kind, self.deadlines.get(kind, self.deadlines["roadmap"])
+
+    def begin(self) -> None:
+        """Start the current request's deadline; later calls in this context share it."""
+        _request_deadline.set(time.monotonic() + self.deadline()[1])
+
+    def remaining(self) -> float:
+        """Seconds left before the current request's deadline (a full one outside begin())."""
+        expires_at = _request_deadline.get()
+        if expires_at is None:
+            return self.deadline()[1]
+        return expires_at - time.monotonic()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _next_target(self, index: int, error: BaseException) -> int:
+        if is_overloaded(error) and index + 1 < len(self.targets):
+            self._count("fallbacks")
+            return index + 1
+        return index
+
+    # -----------------------------
+    # Blocking
+    # -----------------------------
+    def call(self, call_kind: str, fn: Callable[[Target, float], T]) -> T:
+        """
+        Run fn(target, timeout_seconds) under the policy, without hedging.
+        fn must give up after timeout_seconds (e.g. via the client's HTTP timeout).
+        """
+        kind, seconds = self.deadline()
+        deadline = time.monotonic() + self.remaining()
+        self._count("calls")
+        index = 0
+        for attempt in range(self.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            target = self.targets[index]
+            self._count("attempts")
+            started = time.perf_counter()
+            try:
+                result = fn(target, remaining)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                if time.monotonic() >= deadline:
+                    break
+                delay = self._backoff(attempt)
+                if attempt == self.max_attempts - 1 or time.monotonic() + delay >= deadline:
+                    raise
+                index = self._next_target(index, e)
+                self._count("retries")
+                retries.inc(operation=f"llm_{call_kind}")
+                time.sleep(delay)
+                continue
+            self.latency.observe(target.model, call_kind, time.perf_counter() - started)
+            return result
+        self._count("deadline_exceeded")
+        raise ModelDeadlineExceeded(kind, seconds)
+
+    # -----------------------------
+    # Async, with hedging
+    # -----------------------------
+    async def acall(
+        self,
+        call_kind: str,
+        fn: Callable[[Target], Awaitable[T]],
+        hedge: bool = True,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """
+        Await fn(target) under the policy. fn should record its own model
+        time with latency.observe() (queueing for a slot excluded).
+        `deadline` (loop time) overrides the request's deadline.
+        """
+        kind, seconds = self.deadline()
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + self.remaining()
+        self._count("calls")
+        index = 0
+        for attempt in range(self.max_attempts):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            target = self.targets[index]
+            call = self._hedged(call_kind, target, fn) if hedge else self._single(target, fn)
+            try:
+                return await asyncio.wait_for(call, remaining)
+            except asyncio.TimeoutError:
+                break
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                if loop.time() >= deadline:
+                    break
+                delay = self._backoff(attempt)
+                if attempt == self.max_attempts - 1 or loop.time() + delay >= deadline:
+                    raise
+                index = self._next_target(index, e)
+                self._count("retries")
+                retries.inc(operation=f"llm_{call_kind}")
+                await asyncio.sleep(delay)
+        self._count("deadline_exceeded")
+        raise ModelDeadlineExceeded(kind, seconds)
+
+    async def _single(self, target: Target, fn: Callable[[Target], Awaitable[T]]) -> T:
+        self._count("attempts")
+        return await fn(target)
+
+    def _may_hedge(self) -> bool:
+        if not admission.has_free_slot():
+            return False
+        with self._lock:
+            return self._counters["hedges"] < self.hedge_max_ratio * self._counters["calls"]
+
+    async def _hedged(self, call_kind: str, target: Target, fn: Callable[[Target], Awaitable[T]]) -> T:
+        self._count("attempts")
+        primary = asyncio.ensure_future(fn(target))
+        after = None
+        if self.hedge_percentile > 0:
+            after = self.latency.percentile(
+                target.model, call_kind, self.hedge_percentile, self.hedge_min_samples
+            )
+        if after is None:
+            return await primary
+
+        pending: set[asyncio.Future] = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=after)
+            if done or not self._may_hedge():
+                return await primary
+
+            self._count("hedges")
+            self._count("attempts")
+            hedge = asyncio.ensure_future(fn(target))
+            pending.add(hedge)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        won = task is hedge
+                        llm_hedges.inc(model=target.model, outcome="won" if won else "lost")
+                        if won:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "targets": [f"{t.model}:{t.thinking_budget}" for t in self.targets],
+            "deadlines": self.deadlines,
+            "hedge_percentile": self.hedge_percentile,
+            **counters,
+            "latency": self.latency.stats(),
+        }
+
+
+call_policy = CallPolicy(parse_targets(GEMINI_MODEL, GEMINI_FALLBACK_MODELS, GEMINI_THINKING_BUDGET))
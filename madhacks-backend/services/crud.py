@@ -1,98 +1,489 @@
 """
 DB dump format: { user_id: { "roadmaps": { company_name: json } } }
-Stores roadmap JSON in Firestore at users/{user_id} with structure:
-{ roadmaps: { [company_name]: roadmap_json } }
+Stores roadmap JSON in the configured document store (see db/__init__.py):
+
+users/{user_id}
+{ roadmap_index: { [roadmap_key(company)]: { company, content_hash, days, size, stored_size, updated_at } },
+  url_state: { [url_key(url)]: { url, checked } } }
+
+users/{user_id}/roadmaps/{roadmap_key(company)}
+{ company, encoding: "zlib+base64", blob, content_hash, size }
+
+Each roadmap is its own compressed document, so saving one company writes
+only that roadmap (nothing at all if its content hash is unchanged) and
+listing reads just the index. Older user documents keep roadmaps inline as
+roadmaps: { [company_name]: roadmap_json }; reads still see them and the
+next save moves them out.
+
+Helpers take an optional UnitOfWork so one request loads users/{user_id}
+once, shares that snapshot, and commits all of its writes together.
 """
 
-from typing import Any, Dict, List
+import base64
+import hashlib
+import json
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
 
-from db.firebase import db
+from db import get_store
+from db.base import DELETE, ConflictError, NotFoundError
+from services import fast_json
+from services.metrics import retries, stage, storage_docs, storage_ops
 
 USERS_COLLECTION = "users"
+# { url_key(url): {"url": url, "checked": bool} }; replaces the legacy "urls" array
+URL_STATE_FIELD = "url_state"
+# { roadmap_key(company): metadata } of the documents under users/{user_id}/roadmaps
+ROADMAP_INDEX_FIELD = "roadmap_index"
+# Legacy inline { company_name: roadmap_json } map
+LEGACY_ROADMAPS_FIELD = "roadmaps"
+ROADMAPS_COLLECTION = "roadmaps"
+ROADMAP_ENCODING = "zlib+base64"
+
+_io_lock = threading.Lock()
+_io_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _record_io(label: str, reads: int, writes: int) -> None:
+    with _io_lock:
+        entry = _io_stats.setdefault(label, {"calls": 0, "reads": 0, "writes": 0})
+        entry["calls"] += 1
+        entry["reads"] += reads
+        entry["writes"] += writes
+    storage_ops.inc(operation=label)
+    if reads:
+        storage_docs.inc(reads, operation=label, direction="read")
+    if writes:
+        storage_docs.inc(writes, operation=label, direction="write")
+
+
+def get_io_stats() -> Dict[str, Dict[str, Any]]:
+    """Document reads/writes per operation label, with per-call averages."""
+    with _io_lock:
+        return {
+            label: {
+                **entry,
+                "reads_per_call": entry["reads"] / entry["calls"],
+                "writes_per_call": entry["writes"] / entry["calls"],
+            }
+            for label, entry in _io_stats.items()
+        }
+
+
+class UnitOfWork:
+    """
+    One read and at most one write of users/{user_id}.
+
+    load() fetches the document the first time and returns the cached copy
+    afterwards. stage() queues a field update and applies it to the cached
+    copy, so later helpers in the same unit see it. commit() sends every
+    staged update as one write, guarded by the snapshot's version when
+    the document was read, so a concurrent change raises ConflictError
+    instead of being overwritten.
+
+    put_document() queues a whole child document (a stored roadmap);
+    commit() writes those first, so the user document never indexes a
+    roadmap that was not written.
+    """
+
+    def __init__(self, user_id: str, label: str = "unit") -> None:
+        self.user_id = user_id
+        self.label = label
+        self.store = get_store()
+        self.path = f"{USERS_COLLECTION}/{user_id}"
+        self.reads = 0
+        self.writes = 0
+        self._snapshot = None
+        self._data: Dict[str, Any] | None = None
+        self._updates: Dict[tuple[str, ...], Any] = {}
+        self._documents: Dict[str, Dict[str, Any]] = {}
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            _record_io(self.label, self.reads, self.writes)
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self) -> Dict[str, Any] | None:
+        """The user document as a dict, or None if it does not exist."""
+        if self._snapshot is None:
+            with stage("storage_read"):
+                self._snapshot = self.store.get(self.path)
+            self.reads += 1
+            self._data = self._snapshot.data
+        return self._data
+
+    def stage(self, path: tuple[str, ...], value: Any) -> None:
+        self._updates[path] = value
+        if self._data is None:
+            if not self.loaded:
+                return
+            self._data = {}
+        node = self._data
+        for part in path[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        if value is DELETE:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = value
+
+    def put_document(self, path: str, data: Dict[str, Any]) -> None:
+        self._documents[path] = data
+
+    def get_document(self, path: str) -> Dict[str, Any] | None:
+        """Read another document, queued writes first; counted in this unit's reads."""
+        if path in self._documents:
+            return self._documents[path]
+        with stage("storage_read"):
+            snapshot = self.store.get(path)
+        self.reads += 1
+        return snapshot.data
+
+    def get_documents(self, paths: list[str]) -> Dict[str, Dict[str, Any] | None]:
+        """get_document() for several paths, fetching the unqueued ones in one batch."""
+        out: Dict[str, Dict[str, Any] | None] = {
+            path: self._documents[path] for path in paths if path in self._documents
+        }
+        missing = [path for path in paths if path not in out]
+        if missing:
+            with stage("storage_read"):
+                snapshots = self.store.get_many(missing)
+            self.reads += len(missing)
+            out.update((snapshot.path, snapshot.data) for snapshot in snapshots)
+        return out
+
+    def commit(self) -> None:
+        if self._documents:
+            with stage("storage_write"):
+                for path, data in self._documents.items():
+                    self.store.merge(path, {(k,): v for k, v in data.items()})
+            self.writes += len(self._documents)
+            self._documents = {}
+
+        if not self._updates:
+            return
+
+        with stage("storage_write"):
+            self._write()
+        self.writes += 1
+        self._updates = {}
+
+    def _write(self) -> None:
+        if self.loaded and self._snapshot.exists:
+            try:
+                self.store.update(self.path, self._updates, expected_version=self._snapshot.version)
+            except NotFoundError as e:
+                # Deleted since the read: the snapshot is just as stale.
+                raise ConflictError(str(e))
+        elif self.loaded:
+            # Read showed no document: create fails if someone else made it first.
+            self.store.create(self.path, self._data or {})
+        else:
+            # Blind write of just these fields; creates the document if needed.
+            self.store.merge(self.path, self._updates)
+
+
+def run_in_unit(
+    user_id: str, fn: Callable[[UnitOfWork], Any], label: str = "unit", attempts: int = 5
+) -> Any:
+    """Run fn(uow) and commit, re-running on a fresh snapshot after a conflict."""
+    for attempt in range(attempts):
+        try:
+            with UnitOfWork(user_id, label) as uow:
+                return fn(uow)
+        except ConflictError:
+            if attempt == attempts - 1:
+                raise
+            retries.inc(operation=label)
+
+
+@contextmanager
+def _unit(uow: UnitOfWork | None, user_id: str, label: str) -> Iterator[UnitOfWork]:
+    """Use the caller's unit if given, otherwise a private one committed on exit."""
+    if uow is not None:
+        yield uow
+        return
+    with UnitOfWork(user_id, label) as own:
+        yield own
+
+
+def roadmap_key(company_name: str) -> str:
+    """Stable, path-safe id for a company's roadmap document."""
+    return hashlib.sha256(company_name.strip().encode("utf-8")).hexdigest()[:32]
+
+
+def _roadmap_path(user_id: str, key: str) -> str:
+    return f"{USERS_COLLECTION}/{user_id}/{ROADMAPS_COLLECTION}/{key}"
+
+
+def encode_roadmap(
+    company_name: str, roadmap_json: Dict[str, Any]
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    (stored document, index entry) for a roadmap. The hash is over the
+    canonical JSON, so re-saving identical content can be detected
+    without reading the stored blob.
+    """
+    raw = json.dumps(
+        roadmap_json, separators=(",", ":"), sort_keys=True, ensure_ascii=False
+    ).encode("utf-8")
+    content_hash = hashlib.sha256(raw).hexdigest()
+    blob = base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+    days = roadmap_json.get("roadmap")
+    document = {
+        "company": company_name,
+        "encoding": ROADMAP_ENCODING,
+        "blob": blob,
+        "content_hash": content_hash,
+        "size": len(raw),
+    }
+    entry = {
+        "company": company_name,
+        "content_hash": content_hash,
+        "days": len(days) if isinstance(days, list) else 0,
+        "size": len(raw),
+        "stored_size": len(blob),
+        "updated_at": time.time(),
+    }
+    return document, entry
+
+
+def decode_roadmap(document: Dict[str, Any]) -> Dict[str, Any]:
+    if document.get("encoding") != ROADMAP_ENCODING:
+        raise ValueError(f"Unknown roadmap encoding: {document.get('encoding')!r}")
+    return fast_json.loads(zlib.decompress(base64.b64decode(document["blob"])))
+
+
+def _roadmap_index(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    index = data.get(ROADMAP_INDEX_FIELD)
+    return index if isinstance(index, dict) else {}
+
+
+def _legacy_roadmaps(data: Dict[str, Any]) -> Dict[str, Any]:
+    legacy = data.get(LEGACY_ROADMAPS_FIELD)
+    return legacy if isinstance(legacy, dict) else {}
+
+
+def _stage_roadmap(uow: UnitOfWork, company_name: str, roadmap_json: Dict[str, Any]) -> None:
+    key = roadmap_key(company_name)
+    document, entry = encode_roadmap(company_name, roadmap_json)
+    current = _roadmap_index(uow.load() or {}).get(key) or {}
+    if current.get("content_hash") == entry["content_hash"] and current.get("company") == company_name:
+        return
+    uow.put_document(_roadmap_path(uow.user_id, key), document)
+    uow.stage((ROADMAP_INDEX_FIELD, key), entry)
+
+
+def _migrate_legacy_roadmaps(uow: UnitOfWork) -> bool:
+    """Move the inline roadmaps map into per-roadmap documents in this unit."""
+    data = uow.load() or {}
+    if LEGACY_ROADMAPS_FIELD not in data:
+        return False
+    index = _roadmap_index(data)
+    for company, roadmap_json in list(_legacy_roadmaps(data).items()):
+        # A roadmap saved since the migration started is newer than the inline copy.
+        if roadmap_key(company) not in index and isinstance(roadmap_json, dict):
+            _stage_roadmap(uow, company, roadmap_json)
+    uow.stage((LEGACY_ROADMAPS_FIELD,), DELETE)
+    return True
 
 
 def save_roadmap_dump(
-    user_id: str, company_name: str, roadmap_json: dict[str, Any]
+    user_id: str,
+    company_name: str,
+    roadmap_json: dict[str, Any],
+    uow: UnitOfWork | None = None,
 ) -> None:
-    """Save roadmap JSON to Firestore under users/{user_id}.roadmaps.{company_name}."""
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
+    """
+    Save roadmap JSON as users/{user_id}/roadmaps/{roadmap_key(company_name)}
+    and update its entry in the user's roadmap_index. Other roadmaps are
+    not read or rewritten.
+    """
+    with _unit(uow, user_id, "save_roadmap") as unit:
+        _stage_roadmap(unit, company_name, roadmap_json)
+        _migrate_legacy_roadmaps(unit)
+
 
-    existing_roadmaps = (doc.to_dict() or {}).get("roadmaps", {}) if doc.exists else {}
-    roadmaps = {**existing_roadmaps, company_name: roadmap_json}
+def _load_roadmap(uow: UnitOfWork, company_name: str) -> Dict[str, Any] | None:
+    data = uow.load() or {}
+    key = roadmap_key(company_name)
+    if key in _roadmap_index(data):
+        document = uow.get_document(_roadmap_path(uow.user_id, key))
+        if document is not None:
+            return decode_roadmap(document)
+    legacy = _legacy_roadmaps(data).get(company_name)
+    return legacy if isinstance(legacy, dict) else None
 
-    doc_ref.set({"roadmaps": roadmaps}, merge=True)
+
+def _mark_checked(roadmap_json: Dict[str, Any], existing_urls: Dict[str, bool]) -> None:
+    roadmap_list = roadmap_json.get("roadmap", [])
+    if not isinstance(roadmap_list, list):
+        return
+    for day_obj in roadmap_list:
+        if not isinstance(day_obj, dict):
+            continue
+        checklist = day_obj.get("checklist", [])
+        if not isinstance(checklist, list):
+            continue
+        for item in checklist:
+            if not isinstance(item, dict):
+                continue
+            url = item.get("url")
+            if isinstance(url, str) and url in existing_urls:
+                item["checked"] = existing_urls[url]
 
 
 def get_roadmaps_by_user_id(
     user_id: str,
+    uow: UnitOfWork | None = None,
 ) -> dict[str, dict[str, dict[str, Any]]]:
     """
-    Fetch all roadmaps for a user.
+    Fetch all roadmaps for a user; the roadmap documents are read in one batch.
     Returns format: { user_id: { "roadmaps": { company_name: json } } }
     """
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
+    with _unit(uow, user_id, "get_roadmaps") as unit:
+        data = unit.load() or {}
+        roadmaps: Dict[str, Any] = dict(_legacy_roadmaps(data))
+        index = _roadmap_index(data)
+        documents = unit.get_documents([_roadmap_path(user_id, key) for key in index])
+        for key, entry in index.items():
+            document = documents.get(_roadmap_path(user_id, key))
+            if document is not None:
+                roadmaps[entry.get("company") or document.get("company")] = decode_roadmap(document)
+
+        # get the existing urls and parse the roadmap
+        existing_urls = get_urls_for_user(user_id, uow=unit)
+
+    for roadmap_json in roadmaps.values():
+        _mark_checked(roadmap_json, existing_urls)
 
-    roadmaps = (doc.to_dict() or {}).get("roadmaps", {}) if doc.exists else {}
+    return {user_id: {"roadmaps": roadmaps}}
 
-    # get the existing urls and parse the roadmap
-    existing_urls = get_urls_for_user(user_id)
 
-    # For each roadmap, iterate over each day's checklist and augment with 'checked' if URL exists in existing_urls
-    for company, roadmap_json in roadmaps.items():
-        roadmap_list = roadmap_json.get("roadmap", [])
-        if not isinstance(roadmap_list, list):
-            continue
-        for day_obj in roadmap_list:
-            if not isinstance(day_obj, dict):
-                continue
-            checklist = day_obj.get("checklist", [])
-            if not isinstance(checklist, list):
-                continue
-            for item in checklist:
-                if not isinstance(item, dict):
-                    continue
-                url = item.get("url")
-                if isinstance(url, str) and url in existing_urls:
-                    item["checked"] = existing_urls[url]
+def get_user_version(user_id: str) -> Any:
+    """
+    Version of users/{user_id} (None if it does not exist), from a
+    field-masked read. Every roadmap save and checklist toggle changes it.
+    """
+    with stage("storage_read"):
+        doc = get_store().get(f"{USERS_COLLECTION}/{user_id}", [(ROADMAP_INDEX_FIELD,)])
+    _record_io("get_user_version", 1, 0)
+    return doc.version if doc.exists else None
 
 
-    return {user_id: {"roadmaps": roadmaps}}
+def list_roadmaps(user_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    { company_name: metadata } of a user's saved roadmaps, read from the
+    index alone. Roadmaps still stored inline report only their day count.
+    """
+    with stage("storage_read"):
+        doc = get_store().get(
+            f"{USERS_COLLECTION}/{user_id}", [(ROADMAP_INDEX_FIELD,), (LEGACY_ROADMAPS_FIELD,)]
+        )
+    _record_io("list_roadmaps", 1, 0)
+    data = doc.data or {}
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for company, roadmap_json in _legacy_roadmaps(data).items():
+        days = roadmap_json.get("roadmap") if isinstance(roadmap_json, dict) else None
+        out[company] = {"company": company, "days": len(days) if isinstance(days, list) else 0}
+    for entry in _roadmap_index(data).values():
+        if isinstance(entry, dict) and entry.get("company"):
+            out[entry["company"]] = entry
+    return out
+
+
+def get_roadmap(user_id: str, company_name: str) -> Dict[str, Any] | None:
+    """One saved roadmap with its checked flags, or None if there is none."""
+    with UnitOfWork(user_id, "get_roadmap") as unit:
+        roadmap_json = _load_roadmap(unit, company_name)
+        if roadmap_json is None:
+            return None
+        existing_urls = get_urls_for_user(user_id, uow=unit)
+    _mark_checked(roadmap_json, existing_urls)
+    return roadmap_json
+
+
+def url_key(url: str) -> str:
+    """Stable, field-name-safe key for a checklist URL."""
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()[:32]
+
+
+def _merge_url_state(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Combine the keyed url_state map with the legacy urls array.
+    Keyed entries win, since every write after migration goes there.
+    """
+    state: Dict[str, Dict[str, Any]] = {}
 
+    urls_field = data.get("urls", [])
+    if isinstance(urls_field, list):
+        for item in urls_field:
+            if isinstance(item, dict) and isinstance(item.get("url"), str):
+                state[url_key(item["url"])] = {
+                    "url": item["url"],
+                    "checked": bool(item.get("checked", False)),
+                }
 
-from typing import Dict
+    keyed = data.get(URL_STATE_FIELD, {})
+    if isinstance(keyed, dict):
+        for key, entry in keyed.items():
+            if isinstance(entry, dict) and isinstance(entry.get("url"), str):
+                state[key] = {"url": entry["url"], "checked": bool(entry.get("checked", False))}
 
+    return state
 
-def get_urls_for_user(user_id: str) -> Dict[str, bool]:
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
 
-    existing_urls_list: List[Dict[str, Any]] = []
+def get_urls_for_user(user_id: str, uow: UnitOfWork | None = None) -> Dict[str, bool]:
+    if uow is not None:
+        data = uow.load() or {}
+    else:
+        with stage("storage_read"):
+            doc = get_store().get(f"{USERS_COLLECTION}/{user_id}", [(URL_STATE_FIELD,), ("urls",)])
+        _record_io("get_urls", 1, 0)
+        data = doc.data or {}
 
-    if doc.exists:
-        data = doc.to_dict() or {}
-        urls_field = data.get("urls", [])
-        if isinstance(urls_field, list):
-            existing_urls_list = [
-                item for item in urls_field
-                if isinstance(item, dict) and "url" in item
-            ]
+    state = _merge_url_state(data)
+    return {entry["url"]: entry["checked"] for entry in state.values()}
 
-    existing_url_map = {
-        item["url"]: bool(item.get("checked", False))
-        for item in existing_urls_list
-        if isinstance(item.get("url"), str)
-    }
 
-    return existing_url_map
+def _stage_new_urls(uow: UnitOfWork, urls: set[str]) -> None:
+    data = uow.load() or {}
+    state = _merge_url_state(data)
+
+    for url in urls:
+        key = url_key(url)
+        if key not in state:
+            uow.stage((URL_STATE_FIELD, key), {"url": url, "checked": False})
+
+    if "urls" in data:
+        # Fold the legacy array into the keyed map in the same write.
+        for key, entry in state.items():
+            uow.stage((URL_STATE_FIELD, key), entry)
+        uow.stage(("urls",), DELETE)
+
 
 def extract_urls_and_update_db(
     user_id: str,
-    roadmap_json: Dict[str, Any]
+    roadmap_json: Dict[str, Any],
+    uow: UnitOfWork | None = None,
 ) -> None:
     """
-    Extract URLs from roadmap JSON and update Firestore.
+    Extract URLs from roadmap JSON and update the user document.
 
     - Adds only new URLs
     - Preserves existing checked state
@@ -124,53 +515,161 @@ def extract_urls_and_update_db(
     if not extracted_urls:
         return
 
-    # 🔹 Step 2: Fetch existing user URLs
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
-
-    existing_urls = get_urls_for_user(user_id)
-
-    new_entries = [
-        {"url": url, "checked": False}
-        for url in extracted_urls
-        if url not in existing_urls
-    ]
-
-    existing_urls_list = [{"url": url, "checked": checked} for url, checked in existing_urls.items()]
-
-    updated_urls = existing_urls_list + new_entries
-
-    # 🔹 Step 5: Write back merged array
-    doc_ref.set(
-        {"urls": updated_urls},
-        merge=True
-    )
+    # 🔹 Step 2: Add only the missing keys, guarded against concurrent toggles
+    if uow is not None:
+        _stage_new_urls(uow, extracted_urls)
+    else:
+        run_in_unit(user_id, lambda unit: _stage_new_urls(unit, extracted_urls), "add_urls")
 
 
 def get_url_status(user_id: str, url: str) -> bool:
     if not url or not isinstance(url, str):
         return False
 
-    existing_urls = get_urls_for_user(user_id)
-    
-    return existing_urls.get(url)
+    key = url_key(url)
+    with stage("storage_read"):
+        doc = get_store().get(f"{USERS_COLLECTION}/{user_id}", [(URL_STATE_FIELD, key), ("urls",)])
+    _record_io("get_url_status", 1, 0)
+    if not doc.exists:
+        return None
+
+    state = _merge_url_state(doc.data)
+    entry = state.get(key)
+    return entry["checked"] if entry else None
+
 
 def set_url_status(user_id: str, url: str, checked: bool) -> None:
+    """Single field-level write; concurrent toggles of other URLs never conflict."""
     if not url or not isinstance(url, str):
         return False
-    
-    doc_ref = db.collection(USERS_COLLECTION).document(user_id)
-    doc = doc_ref.get()
 
-    if not doc.exists:
+    try:
+        with stage("storage_write"):
+            get_store().update(
+                f"{USERS_COLLECTION}/{user_id}",
+                {(URL_STATE_FIELD, url_key(url)): {"url": url, "checked": bool(checked)}},
+            )
+        _record_io("set_url_status", 0, 1)
+    except NotFoundError:
+        _record_io("set_url_status", 0, 0)
         return None
 
-    existing_urls = get_urls_for_user(user_id)
-    existing_urls_list = [{"url": u, "checked": c} for u, c in existing_urls.items() if u != url]
-    existing_urls_list.append({"url": url, "checked": checked})
 
-    doc_ref.set(
-        {"urls": existing_urls_list},
-        merge=True
-    )
-    
\ No newline at end of file
+def _scope_urls(roadmap_json: Dict[str, Any], day: int | None) -> set[str]:
+    urls: set[str] = set()
+    for day_obj in roadmap_json.get("roadmap", []) or []:
+        if not isinstance(day_obj, dict):
+            continue
+        if day is not None and day_obj.get("day") != day:
+            continue
+        for item in day_obj.get("checklist", []) or []:
+            if isinstance(item, dict) and isinstance(item.get("url"), str) and item["url"].strip():
+                urls.add(item["url"].strip())
+    return urls
+
+
+def set_url_statuses(
+    user_id: str,
+    changes: Dict[str, bool],
+    company_name: str | None = None,
+    day: int | None = None,
+    checked: bool | None = None,
+    uow: UnitOfWork | None = None,
+) -> Dict[str, bool] | None:
+    """
+    Apply many checklist toggles as one write.
+
+    Without a scope this is a field-level update with no read; like
+    set_url_status() it never creates the user document and returns None
+    when there is none. With company_name (and optionally day), the saved
+    roadmap is read once: changes are limited to URLs in that scope, and
+    `checked`, if given, is applied to every URL in it. Returns the
+    resulting {url: checked} for the affected URLs: every URL in the scope,
+    or the submitted ones without a scope.
+    """
+    changes = {u.strip(): bool(c) for u, c in changes.items() if isinstance(u, str) and u.strip()}
+
+    if company_name is None and uow is None:
+        if not changes:
+            return {}
+        try:
+            with stage("storage_write"):
+                get_store().update(
+                    f"{USERS_COLLECTION}/{user_id}",
+                    {
+                        (URL_STATE_FIELD, url_key(url)): {"url": url, "checked": value}
+                        for url, value in changes.items()
+                    },
+                )
+            _record_io("set_url_statuses", 0, 1)
+        except NotFoundError:
+            _record_io("set_url_statuses", 0, 0)
+            return None
+        return changes
+
+    with _unit(uow, user_id, "set_url_statuses") as unit:
+        affected = set(changes)
+        if company_name is not None:
+            roadmap_json = _load_roadmap(unit, company_name)
+            if roadmap_json is None:
+                raise KeyError(f"No saved roadmap for '{company_name}'")
+            in_scope = _scope_urls(roadmap_json, day)
+            changes = {u: c for u, c in changes.items() if u in in_scope}
+            if checked is not None:
+                changes = {**{u: bool(checked) for u in in_scope}, **changes}
+            affected = in_scope
+
+        for url, value in changes.items():
+            unit.stage((URL_STATE_FIELD, url_key(url)), {"url": url, "checked": value})
+
+        if not unit.loaded:
+            return changes
+        state = _merge_url_state(unit.load() or {})
+        return {
+            url: state.get(url_key(url), {}).get("checked", False) for url in sorted(affected)
+        }
+
+
+def _migrate_url_state(uow: UnitOfWork) -> bool:
+    data = uow.load() or {}
+    if "urls" not in data:
+        return False
+    for key, entry in _merge_url_state(data).items():
+        uow.stage((URL_STATE_FIELD, key), entry)
+    uow.stage(("urls",), DELETE)
+    return True
+
+
+def migrate_url_state(user_id: str) -> bool:
+    """Move one user's legacy urls array into url_state. Returns True if migrated."""
+    return run_in_unit(user_id, _migrate_url_state, "migrate_url_state")
+
+
+def migrate_roadmaps(user_id: str) -> bool:
+    """Move one user's inline roadmaps map into roadmap documents. Returns True if migrated."""
+    return run_in_unit(user_id, _migrate_legacy_roadmaps, "migrate_roadmaps")
+
+
+def migrate_all_roadmaps() -> int:
+    migrated = 0
+    store = get_store()
+    for user_id in store.list_ids(USERS_COLLECTION):
+        if LEGACY_ROADMAPS_FIELD in (store.get(f"{USERS_COLLECTION}/{user_id}", [(LEGACY_ROADMAPS_FIELD,)]).data or {}):
+            migrated += bool(migrate_roadmaps(user_id))
+    return migrated
+
+
+def migrate_all_url_states() -> int:
+    migrated = 0
+    store = get_store()
+    for user_id in store.list_ids(USERS_COLLECTION):
+        if "urls" in (store.get(f"{USERS_COLLECTION}/{user_id}", [("urls",)]).data or {}):
+            migrated += bool(migrate_url_state(user_id))
+    return migrated
+
+
+if __name__ == "__main__":
+    # python -m services.crud  -> migrate every user's urls array to url_state
+    # and inline roadmaps map to per-roadmap documents
+    print(f"Migrated url state of {migrate_all_url_states()} users")
+    print(f"Migrated roadmaps of {migrate_all_roadmaps()} users")
@@ -0,0 +1,28 @@
+"""
+JSON decoding for model output (and encoding for cached responses): orjson
+when it is installed, the standard library otherwise. Both raise json.JSONDecodeError (orjson's error is a
+subclass), so callers catch one exception type either way.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(text: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,37 @@
+"""
+The process-wide Firebase app, initialized on first use.
+
+firebase_admin is imported and the credentials are read only when a token is
+verified or the Firestore store is created, so importing the server (and
+/api/health) never depends on them. FIREBASE_KEY_PATH names a service
+account file; without it, Application Default Credentials are used.
+"""
+
+import os
+import threading
+from typing import Any
+
+_app: Any = None
+_lock = threading.Lock()
+
+
+def get_app() -> Any:
+    """The default firebase_admin App, initializing it on the first call."""
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                import firebase_admin
+                from firebase_admin import credentials
+
+                try:
+                    _app = firebase_admin.get_app()
+                except ValueError:
+                    key_path = os.getenv("FIREBASE_KEY_PATH")
+                    cred = credentials.Certificate(key_path) if key_path else None
+                    _app = firebase_admin.initialize_app(cred)
+    return _app
+
+
+def is_initialized() -> bool:
+    return _app is not None
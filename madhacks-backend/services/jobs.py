@@ -0,0 +1,423 @@
+"""
+Background jobs for long model calls.
+
+submit() records a job and returns at once; JOB_WORKERS asyncio workers
+run the handler registered for its kind (see server.py), so a generation
+finishes and its result is kept even if the client that asked for it
+disconnects. Clients poll get(), optionally waiting for the next change,
+and may cancel(); both only answer clients that submitted the job.
+
+- Jobs and results are stored in SQLite (JOB_STORE_PATH) and kept for
+  JOB_RETENTION_SECONDS after they finish, so a result can be fetched
+  again after a dropped connection or a restart
+- Submitting the same kind and payload as a queued or running job returns
+  that job instead of starting another, even to another client; cancel()
+  by one of its submitters only detaches that client, and the job stops
+  once none is left
+- Each row records the process that owns it (boot id and pid). At startup
+  (open(), from the server lifespan) rows of owners that are no longer
+  running are marked failed, so processes sharing JOB_STORE_PATH never fail
+  each other's live jobs; submitting again starts them over
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from services import fast_json
+from services.admission import admission
+from services.call_policy import call_policy
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", str(24 * 3600)))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+Handler = Callable[[dict[str, Any]], Awaitable[Any]]
+
+logger = logging.getLogger(__name__)
+
+
+def _dedupe_key(kind: str, payload: dict[str, Any]) -> str:
+    raw = json.dumps([kind, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _boot_id() -> str:
+    """Changes on every reboot, so pids from before one are never taken as running."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r", encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _owner_alive(owner: str | None, boot_id: str) -> bool:
+    boot, _, pid = (owner or "").rpartition(":")
+    if boot != boot_id or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+def _error_message(e: BaseException) -> str:
+    # HTTPException carries its message in .detail
+    return str(getattr(e, "detail", None) or e) or type(e).__name__
+
+
+class JobQueue:
+    def __init__(
+        self,
+        db_path: str,
+        workers: int = JOB_WORKERS,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+    ) -> None:
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._boot_id = _boot_id()
+        self.owner = f"{self._boot_id}:{os.getpid()}"
+
+        self._handlers: dict[str, Handler] = {}
+        self._pending: dict[str, str] = {}  # dedupe key -> queued/running job id
+        self._tasks: dict[str, asyncio.Task] = {}  # running job id -> handler task
+        self._submitters: dict[str, set[str]] = {}  # queued/running job id -> client keys
+        self._changed: dict[str, asyncio.Event] = {}
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._counters = {"submitted": 0, "deduplicated": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """handler(payload) runs a job of this kind; its return value is the result."""
+        self._handlers[kind] = handler
+
+    # -----------------------------
+    # Storage
+    # -----------------------------
+    def open(self) -> None:
+        """
+        Create the store if needed, fail jobs orphaned by stopped processes
+        and purge expired ones. Called from the server lifespan; the first
+        query opens it too, so nothing touches the disk at import.
+        """
+        with self._lock:
+            if self._conn is not None:
+                return
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " dedupe_key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " owner TEXT,"
+                " clients TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("owner", "clients"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)")
+            conn.commit()
+            self._conn = conn
+        self._fail_interrupted()
+        self.purge()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> int:
+        conn = self._db()
+        with self._lock:
+            cur = conn.execute(sql, args)
+            conn.commit()
+            return cur.rowcount
+
+    def _fail_interrupted(self) -> None:
+        """Fail queued or running jobs whose owning process is gone; live ones are left alone."""
+        with self._lock:
+            owners = [
+                owner
+                for (owner,) in self._conn.execute(
+                    "SELECT DISTINCT owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+                )
+            ]
+        count = 0
+        for owner in owners:
+            if owner != self.owner and _owner_alive(owner, self._boot_id):
+                continue
+            count += self._execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?"
+                " WHERE status IN (?, ?) AND owner IS ?",
+                (
+                    FAILED,
+                    "Interrupted by a server restart; submit again",
+                    time.time(),
+                    QUEUED,
+                    RUNNING,
+                    owner,
+                ),
+            )
+        if count:
+            logger.warning("marked %d interrupted jobs as failed", count)
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention window."""
+        return self._execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (time.time() - self.retention_seconds,),
+        )
+
+    def _add_client(self, job_id: str, client: str) -> None:
+        """Let `client` read a job it submitted again; kept after the job finishes."""
+        conn = self._db()
+        with self._lock:
+            row = conn.execute("SELECT clients FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            clients = json.loads(row[0] or "[]") if row else []
+            if client not in clients:
+                conn.execute(
+                    "UPDATE jobs SET clients = ? WHERE id = ?", (json.dumps(clients + [client]), job_id)
+                )
+                conn.commit()
+
+    def get(self, job_id: str, client: str | None = None) -> dict[str, Any] | None:
+        """
+        Job status, with the result once it succeeded; None if unknown or
+        expired, or if `client` is given and never submitted the job.
+        """
+        conn = self._db()
+        with self._lock:
+            row = conn.execute(
+                "SELECT id, kind, status, result, error, created_at, started_at, finished_at, clients"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, kind, status, result, error, created_at, started_at, finished_at, clients = row
+        if client is not None and client not in json.loads(clients or "[]"):
+            return None
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+        if status == SUCCEEDED:
+            job["result"] = fast_json.loads(result)
+        if error:
+            job["error"] = error
+        return job
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: str | None = None) -> bool:
+        """Record the outcome unless the job already finished (e.g. was cancelled)."""
+        updated = self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?"
+            " WHERE id = ? AND status IN (?, ?)",
+            (
+                status,
+                fast_json.dumps(result).decode("utf-8") if status == SUCCEEDED else None,
+                error,
+                time.time(),
+                job_id,
+                QUEUED,
+                RUNNING,
+            ),
+        )
+        if updated:
+            self._counters[status] += 1
+            self._notify(job_id)
+        return bool(updated)
+
+    # -----------------------------
+    # Submit / wait / cancel
+    # -----------------------------
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, kind: str, payload: dict[str, Any]) -> tuple[dict[str, Any], bool]:
+        """(job, deduplicated): a new queued job, or the identical one already pending."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        key = _dedupe_key(kind, payload)
+        client = admission.current()[0]
+        existing = self._pending.get(key)
+        if existing is not None:
+            job = self.get(existing)
+            if job is not None and job["status"] not in FINISHED:
+                self._submitters.setdefault(existing, set()).add(client)
+                self._add_client(existing, client)
+                self._counters["deduplicated"] += 1
+                return job, True
+
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, kind, dedupe_key, status, payload, created_at, owner, clients)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                kind,
+                key,
+                QUEUED,
+                json.dumps(payload, default=str),
+                time.time(),
+                self.owner,
+                json.dumps([client]),
+            ),
+        )
+        self._pending[key] = job_id
+        self._submitters[job_id] = {client}
+        self._counters["submitted"] += 1
+        self._ensure_workers()
+        # Model calls of the job are scheduled as the submitting client's.
+        self._queue.put_nowait((job_id, kind, key, payload, admission.current()))
+        return self.get(job_id), False
+
+    def _notify(self, job_id: str) -> None:
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait(
+        self, job_id: str, timeout: float, client: str | None = None
+    ) -> dict[str, Any] | None:
+        """get(), after waiting up to `timeout` seconds for the job to change if it is unfinished."""
+        job = self.get(job_id, client)
+        if job is None or job["status"] in FINISHED or timeout <= 0:
+            return job
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id, client)
+
+    def cancel(self, job_id: str, client: str) -> dict[str, Any] | None:
+        """
+        Withdraw `client` from a queued or running job it submitted, and cancel
+        the job if no other submitter is left. Finished jobs are returned
+        unchanged; None if the job is unknown or `client` did not submit it.
+        Call from the event loop.
+        """
+        job = self.get(job_id, client)
+        if job is None or job["status"] in FINISHED:
+            return job
+        submitters = self._submitters.get(job_id, set())
+        if client not in submitters:
+            return None
+        submitters.discard(client)
+        if submitters:
+            return job
+        # A model call already running in a thread completes, but its result is dropped.
+        self._finish(job_id, CANCELLED)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        return self.get(job_id)
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+    async def _worker(self) -> None:
+        while True:
+            job_id, kind, key, payload, identity = await self._queue.get()
+            try:
+                await self._run(job_id, kind, payload, identity)
+            except Exception:
+                logger.exception("job %s could not be recorded", job_id)
+            finally:
+                if self._pending.get(key) == job_id:
+                    del self._pending[key]
+                self._submitters.pop(job_id, None)
+                self._queue.task_done()
+            self.purge()
+
+    async def _run(
+        self, job_id: str, kind: str, payload: dict[str, Any], identity: tuple[str, str]
+    ) -> None:
+        started = self._execute(
+            "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+            (RUNNING, time.time(), job_id, QUEUED),
+        )
+        if not started:  # cancelled while queued
+            return
+        self._notify(job_id)
+
+        async def call() -> Any:
+            admission.bind(identity)
+            call_policy.begin()
+            return await self._handlers[kind](payload)
+
+        task = asyncio.ensure_future(call())
+        self._tasks[job_id] = task
+        try:
+            # wait() rather than await: cancelling the job must not cancel this worker.
+            await asyncio.wait({task})
+        finally:
+            self._tasks.pop(job_id, None)
+
+        if task.cancelled():
+            self._finish(job_id, CANCELLED)
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.warning("job %s (%s) failed: %s", job_id, kind, _error_message(error))
+            self._finish(job_id, FAILED, error=_error_message(error))
+        else:
+            self._finish(job_id, SUCCEEDED, result=task.result())
+
+    def stats(self) -> dict[str, Any]:
+        conn = self._db()
+        with self._lock:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._tasks),
+            "retention_seconds": self.retention_seconds,
+            "stored": dict(rows),
+            **self._counters,
+        }
+
+
+job_queue = JobQueue(
+    os.environ.get("JOB_STORE_PATH", os.path.join(BACKEND_DIR, ".cache", "jobs.sqlite3"))
+)
@@ -0,0 +1,147 @@
+"""
+Incremental parser for model output of the shape
+{ ..., "<array_key>": [ {...}, {...}, ... ], ... }
+
+Text is fed in arbitrary chunks. Each element of the array is returned as
+soon as its closing brace arrives, and its text is dropped right away, so
+memory stays proportional to one element rather than the whole response.
+Everything outside the array is kept and parsed by finish().
+
+With strict=False, malformed elements are skipped instead of raising, and
+salvage() recovers what it can from a response that was cut off, which is
+how truncated model output is repaired.
+"""
+
+import json
+from typing import Any
+
+from services.fast_json import loads
+
+
+class ArrayStreamParser:
+    def __init__(self, array_key: str = "roadmap", strict: bool = True) -> None:
+        self.array_key = array_key
+        self.strict = strict
+
+        self._started = False   # seen the opening '{' of the top-level object
+        self._finished = False  # seen its closing '}'
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        self._outer: list[str] = []   # top-level text with the array emptied
+        self._key: list[str] = []     # current depth-1 string token
+        self._last_key = ""
+        self._await_array = False     # saw `"<array_key>":`, expecting '['
+        self._in_array = False
+        self._item: list[str] = []    # text of the element being read
+
+        self.items_emitted = 0
+        self.items_skipped = 0
+
+    def feed(self, chunk: str) -> list[Any]:
+        """Consume a chunk of text and return the array elements it completed."""
+        out: list[Any] = []
+        for ch in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._outer.append(ch)
+                continue
+
+            if self._in_array and self._depth >= 3:
+                self._item.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = "".join(self._key)
+                elif self._depth == 1:
+                    self._key.append(ch)
+                if not self._in_array:
+                    self._outer.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._key = []
+            elif ch in "{[":
+                if self._in_array and self._depth == 2 and ch == "{":
+                    self._item = [ch]
+                elif self._depth == 1 and ch == "[" and self._await_array:
+                    self._in_array = True
+                    self._await_array = False
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._in_array and self._depth == 2 and ch == "}":
+                    text = "".join(self._item)
+                    self._item = []
+                    try:
+                        out.append(loads(text))
+                    except json.JSONDecodeError as e:
+                        if self.strict:
+                            raise ValueError(
+                                f"Invalid '{self.array_key}' item #{self.items_emitted + 1}: {e}"
+                            )
+                        self.items_skipped += 1
+                        continue
+                    self.items_emitted += 1
+                    continue
+                if self._in_array and self._depth == 1:
+                    self._in_array = False
+                    self._outer.append("[]")
+                    continue
+                if self._depth == 0:
+                    self._finished = True
+            elif ch == ":" and self._depth == 1:
+                self._await_array = self._last_key == self.array_key
+            elif not ch.isspace() and self._depth == 1:
+                self._await_array = False
+
+            if not self._in_array:
+                self._outer.append(ch)
+        return out
+
+    def finish(self) -> dict[str, Any]:
+        """
+        Parse everything outside the array (e.g. summary) once the stream ends.
+        Raises ValueError if the stream was cut off before the object closed.
+        """
+        if not self._finished:
+            raise ValueError(
+                f"Stream ended before the JSON object was complete "
+                f"({self.items_emitted} '{self.array_key}' items parsed)"
+            )
+        try:
+            return loads("".join(self._outer))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Could not parse JSON outside '{self.array_key}': {e}")
+
+    def salvage(self) -> dict[str, Any]:
+        """
+        Best-effort top-level fields of a stream that may have been cut off:
+        everything if the object closed, the fields before the array if it
+        was cut inside the array, otherwise nothing. Never raises.
+        """
+        if self._finished:
+            try:
+                return self.finish()
+            except ValueError:
+                return {}
+        if self._in_array:
+            try:
+                data = loads("".join(self._outer) + "[]}")
+            except json.JSONDecodeError:
+                return {}
+            return data if isinstance(data, dict) else {}
+        return {}
@@ -0,0 +1,304 @@
+"""
+LeetCode per-topic solved counts, from the public GraphQL endpoint.
+
+- One pooled requests.Session for all calls (keep-alive, bounded pool)
+- The CSRF token is fetched once and reused until its cookie expires (or
+  LEETCODE_CSRF_TTL_SECONDS passes); a 403 refreshes it and retries once
+- Stats are cached per username for LEETCODE_STATS_TTL_SECONDS, with
+  single-flight so concurrent misses share one request
+- batch_topic_stats() fetches every uncached username in one aliased query
+  per LEETCODE_BATCH_SIZE users
+
+LEETCODE_BASE_URL points the client elsewhere, e.g. a local stub server
+(see bench/leetcode_stub.py).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.cache import ResponseCache, make_key
+from services.metrics import stage
+from services.topics import canonicalize_keys, resolve_tag
+
+LEETCODE_BASE_URL = os.environ.get("LEETCODE_BASE_URL", "https://leetcode.com").rstrip("/")
+LEETCODE_TIMEOUT_SECONDS = float(os.environ.get("LEETCODE_TIMEOUT_SECONDS", "15"))
+LEETCODE_STATS_TTL_SECONDS = float(os.environ.get("LEETCODE_STATS_TTL_SECONDS", "3600"))
+LEETCODE_CSRF_TTL_SECONDS = float(os.environ.get("LEETCODE_CSRF_TTL_SECONDS", str(6 * 3600)))
+LEETCODE_CACHE_MAX_ENTRIES = int(os.environ.get("LEETCODE_CACHE_MAX_ENTRIES", "4096"))
+LEETCODE_POOL_SIZE = int(os.environ.get("LEETCODE_POOL_SIZE", "8"))
+LEETCODE_BATCH_SIZE = int(os.environ.get("LEETCODE_BATCH_SIZE", "20"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+TAG_COUNTS_FIELDS = """
+    tagProblemCounts {
+      advanced { tagName problemsSolved }
+      intermediate { tagName problemsSolved }
+      fundamental { tagName problemsSolved }
+    }
+"""
+
+TOPIC_STATS_QUERY = (
+    "query userProblemsSolved($username: String!) {\n"
+    "  matchedUser(username: $username) {" + TAG_COUNTS_FIELDS + "  }\n"
+    "}\n"
+)
+
+# LeetCode bucket name -> difficulty label
+BUCKET_TO_DIFFICULTY = {
+    "fundamental": "Easy",
+    "intermediate": "Medium",
+    "advanced": "Hard",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class LeetCodeError(RuntimeError):
+    """The LeetCode API could not be reached or returned errors."""
+
+
+class LeetCodeUserNotFound(ValueError):
+    def __init__(self, username: str) -> None:
+        super().__init__(f"User '{username}' not found or profile is private.")
+        self.username = username
+
+
+def parse_tag_counts(tag_counts: dict) -> dict[str, dict[str, int]]:
+    """
+    tagProblemCounts -> {tag: {"Easy": x, "Medium": y, "Hard": z, "Total": n}},
+    keeping only tags with at least one solved problem.
+    """
+    topic_stats: dict[str, dict[str, int]] = {}
+    for bucket, difficulty in BUCKET_TO_DIFFICULTY.items():
+        for entry in tag_counts.get(bucket) or []:
+            solved = int(entry.get("problemsSolved") or 0)
+            if solved <= 0:
+                continue
+            counts = topic_stats.setdefault(
+                entry["tagName"], {"Easy": 0, "Medium": 0, "Hard": 0, "Total": 0}
+            )
+            counts[difficulty] += solved
+            counts["Total"] += solved
+    return topic_stats
+
+
+def _batch_query(count: int) -> str:
+    params = ", ".join(f"$u{i}: String!" for i in range(count))
+    fields = "".join(
+        f"  u{i}: matchedUser(username: $u{i}) {{{TAG_COUNTS_FIELDS}  }}\n" for i in range(count)
+    )
+    return f"query usersProblemsSolved({params}) {{\n{fields}}}\n"
+
+
+class LeetCodeClient:
+    def __init__(
+        self,
+        base_url: str = LEETCODE_BASE_URL,
+        timeout: float = LEETCODE_TIMEOUT_SECONDS,
+        ttl_seconds: float = LEETCODE_STATS_TTL_SECONDS,
+        csrf_ttl_seconds: float = LEETCODE_CSRF_TTL_SECONDS,
+        max_entries: int = LEETCODE_CACHE_MAX_ENTRIES,
+        pool_size: int = LEETCODE_POOL_SIZE,
+        batch_size: int = LEETCODE_BATCH_SIZE,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.csrf_ttl_seconds = csrf_ttl_seconds
+        self.batch_size = max(1, batch_size)
+        self.cache = ResponseCache(
+            namespace="leetcode", max_entries=max_entries, ttl_seconds=ttl_seconds
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._csrf_lock = threading.Lock()
+        self._csrf_token = ""
+        self._csrf_expires_at = 0.0
+        self._counters_lock = threading.Lock()
+        self._counters = {
+            "csrf_fetches": 0,
+            "graphql_requests": 0,
+            "users_fetched": 0,
+            "errors": 0,
+        }
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counters_lock:
+            self._counters[name] += amount
+
+    # -----------------------------
+    # Session + CSRF
+    # -----------------------------
+    def _csrf(self, refresh: bool = False) -> str:
+        with self._csrf_lock:
+            now = time.time()
+            if not refresh and self._csrf_token and now < self._csrf_expires_at:
+                return self._csrf_token
+
+            self._count("csrf_fetches")
+            try:
+                self.session.get(self.base_url, timeout=self.timeout)
+            except requests.RequestException as e:
+                raise LeetCodeError(f"Could not reach {self.base_url}: {e}")
+
+            token, expires_at = "", now + self.csrf_ttl_seconds
+            for cookie in self.session.cookies:
+                if cookie.name == "csrftoken":
+                    token = cookie.value or ""
+                    if cookie.expires:
+                        expires_at = min(expires_at, float(cookie.expires))
+            if not token:
+                logger.warning("no CSRF token from %s; GraphQL requests may fail", self.base_url)
+            self._csrf_token = token
+            # Without a token, try again on the next call instead of caching nothing.
+            self._csrf_expires_at = expires_at if token else 0.0
+            return token
+
+    # -----------------------------
+    # GraphQL
+    # -----------------------------
+    def graphql(self, query: str, variables: dict[str, Any]) -> dict:
+        """POST a query and return its `data`; a 403 refreshes the CSRF token once."""
+        for attempt in range(2):
+            token = self._csrf(refresh=attempt > 0)
+            self._count("graphql_requests")
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/graphql",
+                    json={"query": query, "variables": variables},
+                    headers={
+                        "Content-Type": "application/json",
+                        "Referer": self.base_url,
+                        "x-csrftoken": token,
+                    },
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                self._count("errors")
+                raise LeetCodeError(f"LeetCode request failed: {e}")
+            if response.status_code == 403 and attempt == 0:
+                continue
+            if response.status_code >= 400:
+                self._count("errors")
+                raise LeetCodeError(f"LeetCode returned HTTP {response.status_code}")
+
+            data = response.json()
+            # matchedUser is null (with an error entry) for unknown users; callers handle that.
+            if data.get("errors") and not data.get("data"):
+                self._count("errors")
+                raise LeetCodeError(str(data["errors"]))
+            return data.get("data") or {}
+        raise LeetCodeError("LeetCode rejected the CSRF token")
+
+    # -----------------------------
+    # Topic stats
+    # -----------------------------
+    def _fetch_many(self, usernames: list[str]) -> dict[str, dict | None]:
+        """One aliased query per batch_size users; unknown users map to None."""
+        out: dict[str, dict | None] = {}
+        for start in range(0, len(usernames), self.batch_size):
+            chunk = usernames[start : start + self.batch_size]
+            with stage("leetcode"):
+                data = self.graphql(
+                    _batch_query(len(chunk)), {f"u{i}": name for i, name in enumerate(chunk)}
+                )
+            for i, name in enumerate(chunk):
+                user = data.get(f"u{i}")
+                out[name] = parse_tag_counts(user.get("tagProblemCounts") or {}) if user else None
+            self._count("users_fetched", len(chunk))
+        return out
+
+    def _fetch_one(self, username: str) -> dict[str, dict[str, int]]:
+        with stage("leetcode"):
+            data = self.graphql(TOPIC_STATS_QUERY, {"username": username})
+        user = data.get("matchedUser")
+        if not user:
+            raise LeetCodeUserNotFound(username)
+        self._count("users_fetched")
+        return parse_tag_counts(user.get("tagProblemCounts") or {})
+
+    def topic_stats(self, username: str) -> dict[str, dict[str, int]]:
+        """Per-tag Easy/Medium/Hard/Total solved counts for one user."""
+        username = username.strip()
+        return self.cache.get_or_compute(make_key(username), lambda: self._fetch_one(username))
+
+    async def atopic_stats(self, username: str) -> dict[str, dict[str, int]]:
+        username = username.strip()
+
+        async def compute() -> dict:
+            return await asyncio.to_thread(self._fetch_one, username)
+
+        return await self.cache.aget_or_compute(make_key(username), compute)
+
+    def batch_topic_stats(self, usernames: Iterable[str]) -> dict[str, dict | None]:
+        """
+        topic_stats() for many users, fetching every cache miss in batched
+        queries. Unknown or private users map to None.
+        """
+        names = list(dict.fromkeys(u.strip() for u in usernames if u and u.strip()))
+        out: dict[str, dict | None] = {}
+        missing: list[str] = []
+        for name in names:
+            cached = self.cache.get(make_key(name))
+            if cached is None:
+                missing.append(name)
+            else:
+                out[name] = cached
+        if missing:
+            for name, stats in self._fetch_many(missing).items():
+                out[name] = stats
+                if stats is not None:
+                    self.cache.set(make_key(name), stats)
+        return {name: out.get(name) for name in names}
+
+    async def abatch_topic_stats(self, usernames: Iterable[str]) -> dict[str, dict | None]:
+        return await asyncio.to_thread(self.batch_topic_stats, list(usernames))
+
+    def stats(self) -> dict[str, Any]:
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {
+            "base_url": self.base_url,
+            "csrf_cached": bool(self._csrf_token) and time.time() < self._csrf_expires_at,
+            **counters,
+            "cache": self.cache.stats(),
+        }
+
+
+def _add_counts(a: dict[str, int], b: dict[str, int]) -> dict[str, int]:
+    return {k: a.get(k, 0) + b.get(k, 0) for k in {**a, **b}}
+
+
+def solved_summary(topic_stats: dict[str, dict[str, int]] | None) -> dict[str, dict[str, int]]:
+    """
+    Prompt-sized view of topic stats: LeetCode tags folded into canonical
+    topic names (the names the concept profile uses), most solved first,
+    zero counts dropped.
+    """
+    if not topic_stats:
+        return {}
+    merged = canonicalize_keys(topic_stats, _add_counts, lambda tag: resolve_tag(tag).name)
+    ordered = sorted(merged.items(), key=lambda kv: (-kv[1].get("Total", 0), kv[0]))
+    return {
+        topic: {k: counts[k] for k in BUCKET_TO_DIFFICULTY.values() if counts.get(k)}
+        for topic, counts in ordered
+    }
+
+
+leetcode_client = LeetCodeClient()
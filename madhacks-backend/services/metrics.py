@@ -0,0 +1,311 @@
+"""
+Request metrics: counters, gauges and histograms in Prometheus text format, plus
+per-request stage timings reported as a Server-Timing header.
+
+- stage("model") times a block (or decorates a function); inside a request
+  it is attributed to the request's route, otherwise to endpoint="none"
+- MetricsMiddleware records per-route latency/status and adds Server-Timing
+  (stages that finish after the headers, e.g. while streaming, still reach
+  the histograms)
+- render() is the /metrics body; no prometheus_client dependency
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# Seconds; model calls dominate, so the buckets reach well past a minute.
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(values: dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in values.items()))
+
+
+def _format_labels(labels: Labels, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(_labels(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(_labels(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((k, (list(c), t[0])) for k, (c, t) in self._values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Gauge | Histogram] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        metric = Gauge(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status code."
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and method."
+)
+stage_latency = registry.histogram(
+    "stage_duration_seconds", "Time spent per pipeline stage, labelled by endpoint and stage."
+)
+llm_calls = registry.counter("llm_calls_total", "Model calls by model and outcome.")
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens reported in Gemini usage metadata, by model and kind."
+)
+retries = registry.counter("retries_total", "Retried operations by operation name.")
+llm_hedges = registry.counter(
+    "llm_hedges_total", "Hedged duplicate model calls by model and whether the hedge won."
+)
+parse_failures = registry.counter(
+    "parse_failures_total", "Model outputs that failed to parse or validate, by kind."
+)
+parse_repairs = registry.counter(
+    "parse_repairs_total", "Truncated model outputs kept by salvaging their complete elements, by kind."
+)
+storage_ops = registry.counter(
+    "storage_operations_total", "Storage units of work by operation label."
+)
+storage_docs = registry.counter(
+    "storage_documents_total", "Document reads/writes by operation label and direction."
+)
+admission_rejections = registry.counter(
+    "admission_rejections_total", "Requests and model calls turned away with 429, by reason."
+)
+admission_wait = registry.histogram(
+    "admission_wait_seconds", "Time model calls waited for a slot, by request kind."
+)
+admission_queue = registry.gauge(
+    "admission_queue_depth", "Model calls waiting for a slot, and slots in use (state=active)."
+)
+
+# usage_metadata attribute -> llm_tokens_total kind
+USAGE_FIELDS = {
+    "prompt_token_count": "prompt",
+    "candidates_token_count": "output",
+    "thoughts_token_count": "thoughts",
+    "tool_use_prompt_token_count": "tool_use",
+    "cached_content_token_count": "cached",
+}
+
+
+# -----------------------------
+# Per-request stage timings
+# -----------------------------
+class _RequestTimings:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        # stage -> one duration per occurrence
+        self.stages: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.stages.setdefault(name, []).append(seconds)
+
+    def server_timing(self) -> str:
+        with self.lock:
+            stages = sorted((name, list(values)) for name, values in self.stages.items())
+        parts = []
+        for name, values in stages:
+            # Summed, so parallel occurrences can exceed the total.
+            part = f"{name};dur={sum(values) * 1000:.1f}"
+            if len(values) > 1:
+                part += f';desc="x{len(values)}"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[_RequestTimings | None] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as pipeline stage `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = _current.get()
+        if timings is not None:
+            # Histogram labels need the route, which is only known once the
+            # request finishes; the middleware observes these then.
+            timings.add(name, elapsed)
+        else:
+            stage_latency.observe(elapsed, endpoint="none", stage=name)
+
+
+@contextmanager
+def parsing(kind: str) -> Iterator[None]:
+    """stage("parse") that also counts ValueErrors as parse failures of `kind`."""
+    with stage("parse"):
+        try:
+            yield
+        except ValueError:
+            parse_failures.inc(kind=kind)
+            raise
+
+
+def record_usage(model: str, usage: Any) -> None:
+    """Add a response's usage_metadata token counts to llm_tokens_total."""
+    if usage is None:
+        return
+    for attr, kind in USAGE_FIELDS.items():
+        count = getattr(usage, attr, None)
+        if count:
+            llm_tokens.inc(count, model=model, kind=kind)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: per-route latency/status metrics and Server-Timing."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = _RequestTimings()
+        token = _current.set(timings)
+        status = 500
+
+        async def send_with_timing(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            elapsed = time.perf_counter() - timings.started
+            http_requests.inc(endpoint=endpoint, method=method, status=status)
+            http_latency.observe(elapsed, endpoint=endpoint, method=method)
+            with timings.lock:
+                stages = [(name, list(values)) for name, values in timings.stages.items()]
+            for name, values in stages:
+                for seconds in values:
+                    stage_latency.observe(seconds, endpoint=endpoint, stage=name)
+
+
+def render() -> str:
+    return registry.render()
@@ -0,0 +1,229 @@
+"""
+Deterministic day planner.
+
+Decides which topic goes on which day, and for how long, from importance and
+confidence alone. The result is a roadmap skeleton whose days carry "slots";
+the model is only asked to fill each slot's checklist items afterwards.
+Same input always gives the same plan, so schedules can be tested offline.
+"""
+
+from typing import Any
+
+from services.windows import apportion, topic_weight
+
+# Schedule in half-hour units so fractional daily_hours (e.g. 1.5) work.
+UNIT_HOURS = 0.5
+MINUTES_PER_PROBLEM = 45
+
+
+def _difficulty_mix(confidence: float, count: int) -> list[str]:
+    """Low confidence starts easy, high confidence goes straight to hard."""
+    if confidence < 4:
+        pattern = ["easy", "medium", "easy", "medium"]
+    elif confidence < 7:
+        pattern = ["medium", "easy", "medium", "hard"]
+    else:
+        pattern = ["medium", "hard", "hard", "medium"]
+    return [pattern[i % len(pattern)] for i in range(count)]
+
+
+class _Queue:
+    """Topics of one kind, highest weight first, with their remaining units."""
+
+    def __init__(self, rows: list[dict[str, Any]]) -> None:
+        self.rows = sorted(
+            (r for r in rows if r["units"] > 0), key=lambda r: (-r["weight"], r["order"])
+        )
+
+    def remaining(self) -> int:
+        return sum(r["units"] for r in self.rows)
+
+    def take(self, units: int) -> list[tuple[dict[str, Any], int]]:
+        out: list[tuple[dict[str, Any], int]] = []
+        while units > 0 and self.rows:
+            row = self.rows[0]
+            n = min(units, row["units"])
+            row["units"] -= n
+            units -= n
+            out.append((row, n))
+            if row["units"] == 0:
+                self.rows.pop(0)
+        return out
+
+
+def _topic_rows(
+    dsa_topics: dict[str, dict], core_fundamentals: dict[str, dict]
+) -> list[dict[str, Any]]:
+    names = list(dsa_topics) + list(core_fundamentals)
+    kinds = ["dsa"] * len(dsa_topics) + ["core"] * len(core_fundamentals)
+    metas = list(dsa_topics.values()) + list(core_fundamentals.values())
+    return [
+        {
+            "topic": names[i],
+            "kind": kinds[i],
+            "weight": topic_weight(metas[i]),
+            "confidence": float(metas[i].get("confidence", 5)),
+            "units": 0,
+            "order": i,
+        }
+        for i in range(len(names))
+    ]
+
+
+def units_per_day(daily_hours: float) -> int:
+    """Whole half-hour units that fit in daily_hours (never more than it)."""
+    return max(1, int(daily_hours / UNIT_HOURS + 1e-9))
+
+
+def _schedule(
+    rows: list[dict[str, Any]],
+    day_numbers: list[int],
+    daily_hours: float,
+    first_seen: dict[str, int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Lay rows' units out over day_numbers in order. A topic's first day gets
+    its study slot unless first_seen (topic -> day scheduled elsewhere) has
+    it on an earlier day.
+    """
+    per_day = units_per_day(daily_hours)
+    first_seen = first_seen or {}
+    dsa_queue = _Queue([r for r in rows if r["kind"] == "dsa"])
+    core_queue = _Queue([r for r in rows if r["kind"] == "core"])
+
+    seen: set[str] = set()
+    days: list[dict[str, Any]] = []
+    for day_no in day_numbers:
+        dsa_left, core_left = dsa_queue.remaining(), core_queue.remaining()
+        total_left = dsa_left + core_left
+
+        # Split each day by what is left of each kind, so both stay interleaved
+        # across the whole plan instead of one kind filling the last weeks.
+        core_units = 0
+        if total_left:
+            core_units = round(per_day * core_left / total_left)
+            if core_left and dsa_left and per_day > 1:
+                core_units = min(max(core_units, 1), per_day - 1)
+        core_units = min(core_units, core_left)
+        dsa_units = min(per_day - core_units, dsa_left)
+        core_units = min(per_day - dsa_units, core_left)
+
+        taken = dsa_queue.take(dsa_units) + core_queue.take(core_units)
+
+        merged: dict[str, dict[str, Any]] = {}
+        for row, n in taken:
+            slot = merged.get(row["topic"])
+            if slot is None:
+                slot = merged[row["topic"]] = {
+                    "topic": row["topic"],
+                    "kind": row["kind"],
+                    "hours": 0.0,
+                    "confidence": row["confidence"],
+                }
+            slot["hours"] += n * UNIT_HOURS
+
+        slots: list[dict[str, Any]] = []
+        for slot in merged.values():
+            first_time = (
+                slot["topic"] not in seen and first_seen.get(slot["topic"], day_no) >= day_no
+            )
+            seen.add(slot["topic"])
+            if slot["kind"] == "dsa":
+                problems = int(slot["hours"] * 60 // MINUTES_PER_PROBLEM)
+                leetcode_count = min(4, max(1, problems - (1 if first_time else 0)))
+                study_count = 1 if first_time else 0
+            else:
+                leetcode_count = 0
+                study_count = min(2, max(1, int(slot["hours"] // 1)))
+            slots.append(
+                {
+                    "topic": slot["topic"],
+                    "kind": slot["kind"],
+                    "hours": slot["hours"],
+                    "study_count": study_count,
+                    "leetcode_count": leetcode_count,
+                    "difficulties": _difficulty_mix(slot["confidence"], leetcode_count),
+                }
+            )
+
+        focus = max(slots, key=lambda s: s["hours"])["topic"] if slots else "revision"
+        days.append(
+            {
+                "day": day_no,
+                "date_placeholder": f"Day {day_no}",
+                "focus_area": focus,
+                "hours_allocated": daily_hours,
+                "slots": slots,
+                "checklist": [],
+            }
+        )
+    return days
+
+
+def topic_units(
+    dsa_topics: dict[str, dict],
+    core_fundamentals: dict[str, dict],
+    total_days: int,
+    daily_hours: float,
+) -> dict[str, int]:
+    """Half-hour units each topic gets over the whole plan."""
+    rows = _topic_rows(dsa_topics, core_fundamentals)
+    units = apportion([r["weight"] for r in rows], units_per_day(daily_hours) * max(0, total_days))
+    return {r["topic"]: n for r, n in zip(rows, units)}
+
+
+def plan_roadmap(
+    dsa_topics: dict[str, dict],
+    core_fundamentals: dict[str, dict],
+    total_days: int,
+    daily_hours: float,
+) -> list[dict[str, Any]]:
+    """
+    Build the day skeleton. Each day:
+    {
+      day, date_placeholder, focus_area, hours_allocated, checklist: [],
+      slots: [{topic, kind, hours, study_count, leetcode_count, difficulties}]
+    }
+    DSA and fundamentals share every day in proportion to their total weight,
+    and within each kind the weakest important topics are scheduled first.
+    """
+    rows = _topic_rows(dsa_topics, core_fundamentals)
+    units = apportion([r["weight"] for r in rows], units_per_day(daily_hours) * max(0, total_days))
+    for row, n in zip(rows, units):
+        row["units"] = n
+    return _schedule(rows, list(range(1, total_days + 1)), daily_hours)
+
+
+def replan_days(
+    dsa_topics: dict[str, dict],
+    core_fundamentals: dict[str, dict],
+    total_days: int,
+    daily_hours: float,
+    day_numbers: list[int],
+    kept_units: dict[str, int],
+    first_seen: dict[str, int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Skeletons for only day_numbers of a plan whose other days are kept.
+    Their time goes to what each topic still lacks: its share of the whole
+    plan (topic_units) minus kept_units already scheduled on kept days.
+    """
+    rows = _topic_rows(dsa_topics, core_fundamentals)
+    target = topic_units(dsa_topics, core_fundamentals, total_days, daily_hours)
+    need = [max(0, target[r["topic"]] - kept_units.get(r["topic"], 0)) for r in rows]
+    if not any(need):
+        need = [r["weight"] for r in rows]
+    units = apportion(need, units_per_day(daily_hours) * len(day_numbers))
+    for row, n in zip(rows, units):
+        row["units"] = n
+    return _schedule(rows, sorted(day_numbers), daily_hours, first_seen)
+
+
+def planned_focus_areas(days: list[dict[str, Any]], limit: int = 5) -> dict[str, str]:
+    """Top topics by planned hours, with a short reason for the summary."""
+    hours: dict[str, float] = {}
+    for day in days:
+        for slot in day.get("slots", []):
+            hours[slot["topic"]] = hours.get(slot["topic"], 0.0) + slot["hours"]
+    ranked = sorted(hours.items(), key=lambda kv: -kv[1])[:limit]
+    return {topic: f"{h:g} hours planned" for topic, h in ranked}
@@ -0,0 +1,152 @@
+"""
+Offline LeetCode problem catalog (data/leetcode_problems.json).
+
+Loaded once into column arrays (id, difficulty, frequency) and string
+lists (slug, title), plus an index of canonical topic id -> difficulty ->
+problem positions sorted most frequent first. select() fills a roadmap
+slot's LeetCode items from it without a model call, skipping problems the
+user already has, so every link is a real https://leetcode.com/problems/<slug>/.
+"""
+
+import json
+import os
+import re
+from array import array
+from typing import Any, Iterable
+
+from services.topics import resolve, resolve_tag, topic_id
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBLEM_CATALOG_PATH = os.environ.get(
+    "PROBLEM_CATALOG_PATH", os.path.join(BACKEND_DIR, "data", "leetcode_problems.json")
+)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+# Where to look when a topic has no (unused) problem of the wanted difficulty.
+FALLBACK = {
+    "easy": ("easy", "medium", "hard"),
+    "medium": ("medium", "easy", "hard"),
+    "hard": ("hard", "medium", "easy"),
+}
+
+_SLUG_RE = re.compile(r"leetcode\.com/problems/([a-z0-9-]+)")
+
+
+def problem_url(slug: str) -> str:
+    return f"https://leetcode.com/problems/{slug}/"
+
+
+def slug_from_url(url: Any) -> str | None:
+    match = _SLUG_RE.search(str(url or "").lower())
+    return match.group(1) if match else None
+
+
+class ProblemCatalog:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        self.version = str(raw.get("version", ""))
+
+        self.ids = array("I")
+        self.difficulty = array("B")  # index into DIFFICULTIES
+        self.frequency = array("B")
+        self.slugs: list[str] = []
+        self.titles: list[str] = []
+        self.tags: list[tuple[str, ...]] = []
+        self._by_slug: dict[str, int] = {}
+        index: dict[str, dict[int, list[int]]] = {}
+
+        for pid, slug, title, difficulty, tags, frequency in raw["problems"]:
+            pos = len(self.slugs)
+            self.ids.append(int(pid))
+            self.difficulty.append(DIFFICULTIES.index(difficulty.lower()))
+            self.frequency.append(max(0, min(255, int(frequency))))
+            self.slugs.append(slug)
+            self.titles.append(title)
+            self.tags.append(tuple(tags))
+            self._by_slug[slug] = pos
+            for tid in {resolve_tag(tag).id for tag in tags}:
+                index.setdefault(tid, {}).setdefault(self.difficulty[pos], []).append(pos)
+
+        self._index: dict[str, dict[int, array]] = {
+            tid: {
+                d: array("H", sorted(positions, key=lambda p: (-self.frequency[p], self.ids[p])))
+                for d, positions in by_difficulty.items()
+            }
+            for tid, by_difficulty in index.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def has_topic(self, topic: str) -> bool:
+        return topic_id(topic) in self._index
+
+    def problem(self, slug: str) -> dict[str, Any] | None:
+        pos = self._by_slug.get(slug)
+        return None if pos is None else self._item(pos, None)
+
+    def _item(self, pos: int, topic: str | None) -> dict[str, Any]:
+        return {
+            "type": "leetcode",
+            "title": self.titles[pos],
+            "difficulty": DIFFICULTIES[self.difficulty[pos]],
+            "topic": topic or resolve_tag(self.tags[pos][0]).name,
+            "url": problem_url(self.slugs[pos]),
+            "reason": f"Frequently asked {DIFFICULTIES[self.difficulty[pos]]} problem",
+        }
+
+    def select(
+        self,
+        topic: str,
+        difficulties: Iterable[str],
+        exclude: set[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        One checklist item per entry of `difficulties` for `topic`, most
+        frequent first, falling back to a neighbouring difficulty when one
+        runs out. `exclude` holds slugs to skip and gets the picked slugs
+        added, so one set can be shared across a whole roadmap. Returns
+        fewer items when the topic runs out of problems.
+        """
+        canonical = resolve(topic)
+        by_difficulty = self._index.get(canonical.id)
+        if not by_difficulty:
+            return []
+        exclude = exclude if exclude is not None else set()
+
+        out: list[dict[str, Any]] = []
+        for wanted in difficulties:
+            for difficulty in FALLBACK.get(str(wanted).lower(), FALLBACK["medium"]):
+                pick = next(
+                    (
+                        pos
+                        for pos in by_difficulty.get(DIFFICULTIES.index(difficulty), ())
+                        if self.slugs[pos] not in exclude
+                    ),
+                    None,
+                )
+                if pick is not None:
+                    exclude.add(self.slugs[pick])
+                    out.append(self._item(pick, canonical.name))
+                    break
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "problems": len(self),
+            "topics": len(self._index),
+            "by_difficulty": {
+                d: sum(1 for x in self.difficulty if x == i) for i, d in enumerate(DIFFICULTIES)
+            },
+        }
+
+
+def used_slugs(urls: Iterable[str]) -> set[str]:
+    """LeetCode slugs among a user's checklist URLs."""
+    return {slug for slug in map(slug_from_url, urls) if slug}
+
+
+problem_catalog = ProblemCatalog(PROBLEM_CATALOG_PATH)
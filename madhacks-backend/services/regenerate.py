@@ -0,0 +1,189 @@
+"""
+Incremental regeneration of a saved roadmap after a profile edit.
+
+Works out which days a new profile / prepDays / hoursPerDay actually
+touches and re-plans only those with services.planner; every other day is
+kept as saved. A day is affected when:
+
+- it is past the old plan (prepDays grew), or every day is (hours changed)
+- it has a topic that was removed, or whose importance/confidence changed
+  (known when the roadmap carries the "profile" it was generated from)
+- its topics now have more time than their new share; the days with the
+  largest surplus are freed until less than a day's worth is left over,
+  which also makes room for added topics and a shorter plan
+
+Checked checklist items of re-planned or dropped days are carried into the
+new day, and the new slots ask for correspondingly fewer items.
+"""
+
+from typing import Any
+
+from services.planner import UNIT_HOURS, replan_days, topic_units, units_per_day
+from services.summary import is_leetcode_item
+from services.topics import topic_id
+
+
+def profile_of(dsa_topics: dict[str, dict], core_fundamentals: dict[str, dict]) -> dict[str, Any]:
+    """What a generated roadmap stores under "profile" for later regeneration."""
+    return {"dsa_topics": dsa_topics, "core_fundamentals": core_fundamentals}
+
+
+def _metas(profile: Any) -> dict[str, tuple[float, float]] | None:
+    if not isinstance(profile, dict):
+        return None
+    out: dict[str, tuple[float, float]] = {}
+    for group in ("dsa_topics", "core_fundamentals"):
+        topics = profile.get(group)
+        if not isinstance(topics, dict):
+            return None
+        for name, meta in topics.items():
+            meta = meta if isinstance(meta, dict) else {}
+            out[topic_id(name)] = (
+                float(meta.get("importance", 5)),
+                float(meta.get("confidence", 5)),
+            )
+    return out
+
+
+def day_units(day: dict[str, Any], daily_hours: float) -> dict[str, int]:
+    """Half-hour units per topic id on a saved day (its focus area if it has no slots)."""
+    units: dict[str, int] = {}
+    slots = day.get("slots")
+    if isinstance(slots, list) and slots:
+        for slot in slots:
+            if isinstance(slot, dict) and slot.get("topic"):
+                key = topic_id(slot["topic"])
+                units[key] = units.get(key, 0) + round(float(slot.get("hours", 0)) / UNIT_HOURS)
+    elif day.get("focus_area"):
+        hours = day.get("hours_allocated")
+        units[topic_id(day["focus_area"])] = units_per_day(
+            float(hours) if isinstance(hours, (int, float)) else daily_hours
+        )
+    return units
+
+
+def _checked_items(day: dict[str, Any]) -> list[dict[str, Any]]:
+    checklist = day.get("checklist")
+    if not isinstance(checklist, list):
+        return []
+    return [i for i in checklist if isinstance(i, dict) and i.get("checked")]
+
+
+def _carry(day: dict[str, Any], items: list[dict[str, Any]]) -> None:
+    """Put checked items on a re-planned day and ask its slots for that much less."""
+    for item in items:
+        day["checklist"].append(item)
+        key = topic_id(item.get("topic"))
+        slot = next((s for s in day["slots"] if topic_id(s["topic"]) == key), None)
+        if slot is None:
+            continue
+        if is_leetcode_item(item):
+            if slot["leetcode_count"] <= 0:
+                continue
+            slot["leetcode_count"] -= 1
+            difficulty = str(item.get("difficulty") or "").lower()
+            if difficulty in slot["difficulties"]:
+                slot["difficulties"].remove(difficulty)
+            else:
+                slot["difficulties"].pop()
+        elif slot["study_count"] > 0:
+            slot["study_count"] -= 1
+
+
+def plan_regeneration(
+    existing: dict[str, Any],
+    dsa_topics: dict[str, dict],
+    core_fundamentals: dict[str, dict],
+    total_days: int,
+    daily_hours: float,
+) -> dict[str, Any]:
+    """
+    {days, affected, changed_topics}: all total_days days, the kept ones as
+    saved and the affected ones (day numbers in `affected`) as planner
+    skeletons whose slots still need filling.
+    """
+    old_days = [d for d in existing.get("roadmap") or [] if isinstance(d, dict)]
+    old_hours = existing.get("daily_hours")
+    if not isinstance(old_hours, (int, float)):
+        old_hours = daily_hours
+    per_day = units_per_day(daily_hours)
+
+    names = {topic_id(n): n for n in list(dsa_topics) + list(core_fundamentals)}
+    target = {
+        topic_id(n): u
+        for n, u in topic_units(dsa_topics, core_fundamentals, total_days, daily_hours).items()
+    }
+
+    old_profile = existing.get("profile")
+    old_metas = _metas(old_profile)
+    old_names = {}
+    if old_metas is not None:
+        old_names = {
+            topic_id(n): n
+            for group in ("dsa_topics", "core_fundamentals")
+            for n in old_profile[group]
+        }
+    new_metas = _metas(profile_of(dsa_topics, core_fundamentals)) or {}
+    changed: set[str] = set()
+    if old_metas is not None:
+        changed = {
+            k for k in old_metas.keys() | new_metas.keys() if old_metas.get(k) != new_metas.get(k)
+        }
+
+    units = {n: day_units(day, old_hours) for n, day in enumerate(old_days[:total_days], start=1)}
+    if units_per_day(old_hours) != per_day:
+        kept: dict[int, dict[str, int]] = {}
+    else:
+        kept = {
+            n: u for n, u in units.items()
+            if u and not any(k in changed or k not in names for k in u)
+        }
+
+    def kept_units() -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for u in kept.values():
+            for key, n in u.items():
+                totals[key] = totals.get(key, 0) + n
+        return totals
+
+    # Free the days of over-served topics until what is left is within a day.
+    while kept:
+        totals = kept_units()
+        surplus = {k: max(0, n - target.get(k, 0)) for k, n in totals.items()}
+        if sum(surplus.values()) < per_day:
+            break
+        freed = max(kept, key=lambda n: (sum(min(u, surplus[k]) for k, u in kept[n].items()), n))
+        del kept[freed]
+
+    affected = [n for n in range(1, total_days + 1) if n not in kept]
+    first_seen: dict[str, int] = {}
+    for n in sorted(kept):
+        for key in kept[n]:
+            first_seen.setdefault(names[key], n)
+    fresh = replan_days(
+        dsa_topics, core_fundamentals, total_days, daily_hours, affected,
+        {names[k]: n for k, n in kept_units().items()}, first_seen,
+    )
+
+    days: list[dict[str, Any]] = []
+    replanned = iter(fresh)
+    for n in range(1, total_days + 1):
+        if n in kept:
+            days.append({**old_days[n - 1], "day": n, "date_placeholder": f"Day {n}"})
+            continue
+        day = next(replanned)
+        if n <= len(old_days):
+            _carry(day, _checked_items(old_days[n - 1]))
+        days.append(day)
+    dropped = [i for day in old_days[total_days:] for i in _checked_items(day)]
+    if dropped and days:
+        if days[-1]["day"] in affected:
+            _carry(days[-1], dropped)
+        else:
+            days[-1] = {**days[-1], "checklist": list(days[-1].get("checklist") or []) + dropped}
+
+    return {
+        "days": days,
+        "affected": affected,
+        "changed_topics": sorted(names.get(k) or old_names.get(k, k) for k in changed),
+    }
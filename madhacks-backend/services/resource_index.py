@@ -0,0 +1,301 @@
+"""
+Persistent index of study links and LeetCode problems seen in roadmaps.
+
+Entries are collected from roadmap[].checklist[] items of roadmaps this
+server generated (never from client-supplied JSON, since the index is shared
+by every user) and keyed by (topic, kind, difficulty), so later roadmaps can
+reuse them instead of making the model search for the same articles again.
+Entries expire by age and are dropped after repeated link-health failures;
+start_link_checks() runs check_links() every RESOURCE_CHECK_INTERVAL_SECONDS
+in a background thread.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Iterable
+
+from services.metrics import stage
+from services.summary import is_leetcode_item
+from services.topics import RENAMED_TOPIC_IDS, TOPIC_INDEX_VERSION, topic_id
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESOURCE_MAX_AGE_DAYS = float(os.environ.get("RESOURCE_MAX_AGE_DAYS", "90"))
+RESOURCE_MAX_FAILURES = int(os.environ.get("RESOURCE_MAX_FAILURES", "2"))
+# 0 turns the periodic link check off
+RESOURCE_CHECK_INTERVAL_SECONDS = float(os.environ.get("RESOURCE_CHECK_INTERVAL_SECONDS", "3600"))
+
+
+def topic_key(topic: Any) -> str:
+    """Canonical topic id, so "hash maps" and "Hash Table" share entries."""
+    return topic_id(topic)
+
+
+class ResourceIndex:
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._checker: threading.Thread | None = None
+        self._stop = threading.Event()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resources ("
+            " topic TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " difficulty TEXT NOT NULL DEFAULT '',"
+            " url TEXT NOT NULL,"
+            " title TEXT NOT NULL DEFAULT '',"
+            " reason TEXT NOT NULL DEFAULT '',"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " uses INTEGER NOT NULL DEFAULT 1,"
+            " failures INTEGER NOT NULL DEFAULT 0,"
+            " checked_at REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (topic, kind, url))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS resources_lookup"
+            " ON resources (topic, kind, difficulty)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._rekey_topics()
+
+    def _rekey_topics(self) -> None:
+        """
+        Move rows stored under older topic keys to their canonical topic id,
+        once per version of the topic table.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'topic_index_version'"
+            ).fetchone()
+            if row is not None and row[0] == TOPIC_INDEX_VERSION:
+                return
+            # Only an index from before the version was recorded can hold retired ids.
+            renamed = RENAMED_TOPIC_IDS if row is None else {}
+            topics = [row[0] for row in self._conn.execute("SELECT DISTINCT topic FROM resources")]
+            for old in topics:
+                new = renamed.get(old) or topic_key(old)
+                if new == old:
+                    continue
+                # Rows already present under the new key keep their stats.
+                self._conn.execute(
+                    "UPDATE OR IGNORE resources SET topic = ? WHERE topic = ?", (new, old)
+                )
+                self._conn.execute("DELETE FROM resources WHERE topic = ?", (old,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('topic_index_version', ?)",
+                (TOPIC_INDEX_VERSION,),
+            )
+            self._conn.commit()
+
+    # -----------------------------
+    # Collect
+    # -----------------------------
+    def add_items(self, items: Iterable[dict[str, Any]]) -> int:
+        """Upsert checklist items; returns how many rows were touched."""
+        now = time.time()
+        rows = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            url = item.get("url")
+            topic = topic_key(item.get("topic"))
+            if not isinstance(url, str) or not url.strip().startswith("http") or not topic:
+                continue
+            kind = "leetcode" if is_leetcode_item(item) else "study"
+            difficulty = str(item.get("difficulty") or "").strip().lower() if kind == "leetcode" else ""
+            rows.append(
+                (
+                    topic, kind, difficulty, url.strip(),
+                    str(item.get("title") or ""), str(item.get("reason") or ""),
+                    now, now,
+                )
+            )
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO resources"
+                " (topic, kind, difficulty, url, title, reason, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (topic, kind, url) DO UPDATE SET"
+                " last_seen = excluded.last_seen, uses = uses + 1",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    @stage("resource_index")
+    def ingest_roadmap(self, roadmap_json: dict[str, Any]) -> int:
+        """
+        Collect every checklist item of a generated roadmap. Blocks on SQLite;
+        async callers should run it in a worker thread.
+        """
+        roadmap = roadmap_json.get("roadmap", []) if isinstance(roadmap_json, dict) else []
+        if not isinstance(roadmap, list):
+            return 0
+
+        items: list[dict[str, Any]] = []
+        for day_obj in roadmap:
+            if not isinstance(day_obj, dict):
+                continue
+            checklist = day_obj.get("checklist", [])
+            if isinstance(checklist, list):
+                items.extend(item for item in checklist if isinstance(item, dict))
+
+        return self.add_items(items)
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def lookup(
+        self,
+        topic: str,
+        kind: str,
+        difficulty: str | None = None,
+        limit: int = 1,
+        exclude: set[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Fresh, healthy entries for a topic, most reused first.
+        URLs in exclude are skipped (e.g. items already in this roadmap).
+        """
+        if limit <= 0:
+            return []
+        cutoff = time.time() - RESOURCE_MAX_AGE_DAYS * 86400
+        sql = (
+            "SELECT url, title, reason, difficulty FROM resources"
+            " WHERE topic = ? AND kind = ? AND last_seen >= ? AND failures < ?"
+        )
+        args: list[Any] = [topic_key(topic), kind, cutoff, RESOURCE_MAX_FAILURES]
+        if difficulty:
+            sql += " AND difficulty = ?"
+            args.append(difficulty.lower())
+        sql += " ORDER BY uses DESC, first_seen ASC LIMIT ?"
+        args.append(limit + len(exclude or ()))
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+
+        out: list[dict[str, Any]] = []
+        for url, title, reason, diff in rows:
+            if exclude and url in exclude:
+                continue
+            item = {"type": kind, "title": title or url, "url": url, "topic": topic}
+            if kind == "leetcode":
+                item["difficulty"] = diff or "medium"
+            if reason:
+                item["reason"] = reason
+            out.append(item)
+            if len(out) >= limit:
+                break
+        return out
+
+    # -----------------------------
+    # Health + eviction
+    # -----------------------------
+    def record_result(self, url: str, ok: bool) -> None:
+        now = time.time()
+        with self._lock:
+            if ok:
+                self._conn.execute(
+                    "UPDATE resources SET failures = 0, checked_at = ? WHERE url = ?", (now, url)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE resources SET failures = failures + 1, checked_at = ? WHERE url = ?",
+                    (now, url),
+                )
+            self._conn.commit()
+
+    def prune(self) -> int:
+        """Delete entries that are too old or have failed too many health checks."""
+        cutoff = time.time() - RESOURCE_MAX_AGE_DAYS * 86400
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM resources WHERE last_seen < ? OR failures >= ?",
+                (cutoff, RESOURCE_MAX_FAILURES),
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def check_links(self, limit: int = 50, timeout: float = 5.0) -> dict[str, int]:
+        """
+        HEAD-check the least recently verified links. 404/410, 5xx and
+        connection errors count as failures; bot blocks (403/429) do not.
+        """
+        with self._lock:
+            urls = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT url FROM resources GROUP BY url ORDER BY MIN(checked_at) ASC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            ]
+
+        ok_count = failed = 0
+        for url in urls:
+            req = urllib.request.Request(url, method="HEAD", headers={"User-Agent": "Mozilla/5.0"})
+            try:
+                with urllib.request.urlopen(req, timeout=timeout):
+                    ok = True
+            except urllib.error.HTTPError as e:
+                ok = e.code in (401, 403, 405, 429)
+            except Exception:
+                ok = False
+            self.record_result(url, ok)
+            ok_count += ok
+            failed += not ok
+
+        return {"checked": len(urls), "ok": ok_count, "failed": failed, "pruned": self.prune()}
+
+    def _run_checks(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                logger.info("resource link check: %s", self.check_links())
+            except Exception as e:
+                logger.warning("resource link check failed: %s", e)
+
+    def start_link_checks(self, interval: float = RESOURCE_CHECK_INTERVAL_SECONDS) -> None:
+        """check_links() (which also prunes) every interval seconds, in a daemon thread."""
+        if interval <= 0:
+            return
+        if self._checker is None or not self._checker.is_alive():
+            self._stop.clear()
+            self._checker = threading.Thread(
+                target=self._run_checks, args=(interval,), name="resource-link-check", daemon=True
+            )
+            self._checker.start()
+
+    def stop_link_checks(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), COUNT(DISTINCT topic) FROM resources GROUP BY kind"
+            ).fetchall()
+        return {kind: {"entries": n, "topics": topics} for kind, n, topics in rows}
+
+
+resource_index = ResourceIndex(
+    os.environ.get("RESOURCE_INDEX_PATH", os.path.join(BACKEND_DIR, ".cache", "resources.sqlite3"))
+)
+
+
+if __name__ == "__main__":
+    print(resource_index.check_links())
@@ -0,0 +1,150 @@
+"""
+Cached merged view for GET /api/roadmap.
+
+get_roadmaps_by_user_id() reads every roadmap document and merges each
+item's checked flag in. The serialized result is kept per user with a
+content-hash ETag and its compressed variants, and checked with one
+field-masked read of the user document: every save and checklist toggle
+changes that document's version, so a matching version means the cached
+body is current, also after writes from another instance.
+
+- If-None-Match with the current ETag -> 304, nothing rebuilt or sent
+- Otherwise the cached body, brotli (when installed) or gzip encoded if
+  the client accepts it and it is at least RESPONSE_COMPRESS_MIN_BYTES
+- save/putitem(s) drop the user's entry here as well
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Mapping
+
+from fastapi.responses import Response
+
+from services import fast_json
+from services.crud import get_roadmaps_by_user_id, get_user_version
+from services.metrics import stage
+
+try:
+    import brotli
+except ImportError:  # optional, gzip otherwise
+    brotli = None
+
+ROADMAP_VIEW_CACHE_ENTRIES = int(os.environ.get("ROADMAP_VIEW_CACHE_ENTRIES", "256"))
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: compressed variants share the ETag.
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class RoadmapView:
+    __slots__ = ("version", "etag", "body", "_encoded")
+
+    def __init__(self, version: Any, body: bytes) -> None:
+        self.version = version
+        self.body = body
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress(self.body, encoding)
+        return self._encoded[encoding]
+
+    def response(self, headers: Mapping[str, str]) -> Response:
+        base = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+        if _etag_matches(headers.get("if-none-match", ""), self.etag):
+            return Response(status_code=304, headers=base)
+
+        encoding = None
+        if len(self.body) >= RESPONSE_COMPRESS_MIN_BYTES:
+            accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+            if brotli is not None and "br" in accepted:
+                encoding = "br"
+            elif "gzip" in accepted:
+                encoding = "gzip"
+        if encoding is None:
+            return Response(self.body, media_type="application/json", headers=base)
+        return Response(
+            self.encoded(encoding),
+            media_type="application/json",
+            headers={**base, "Content-Encoding": encoding},
+        )
+
+
+class RoadmapViewCache:
+    def __init__(self, max_entries: int = ROADMAP_VIEW_CACHE_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._views: "OrderedDict[str, RoadmapView]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, user_id: str) -> RoadmapView:
+        """The user's current merged view, rebuilt only if the user document changed."""
+        # Read before building: a write in between only costs one extra rebuild later.
+        version = get_user_version(user_id)
+        with self._lock:
+            view = self._views.get(user_id)
+            if view is not None and version is not None and view.version == version:
+                self._views.move_to_end(user_id)
+                self._counters["hits"] += 1
+                return view
+            self._counters["misses"] += 1
+
+        with stage("roadmap_view"):
+            view = RoadmapView(version, fast_json.dumps(get_roadmaps_by_user_id(user_id)))
+        if version is None:
+            return view
+        with self._lock:
+            self._views[user_id] = view
+            self._views.move_to_end(user_id)
+            while len(self._views) > self.max_entries:
+                self._views.popitem(last=False)
+                self._counters["evictions"] += 1
+        return view
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            if self._views.pop(user_id, None) is not None:
+                self._counters["invalidations"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._views),
+                "max_entries": self.max_entries,
+                "compression": "br" if brotli is not None else "gzip",
+            }
+
+
+roadmap_views = RoadmapViewCache()
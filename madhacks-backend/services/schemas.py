@@ -0,0 +1,232 @@
+"""
+Typed shapes of the model's JSON outputs, and the decoder that turns raw
+model text into validated dicts.
+
+The *Output models validate what the prompts ask for. The *Schema models
+are the subset sent to Gemini as a response schema (no free-form dicts,
+which the Developer API rejects); their outputs validate against the
+matching *Output model too.
+
+decode_output() tries one-pass validation of the raw text first, then
+falls back to extracting the JSON object from surrounding prose, dropping
+trailing commas, and finally to salvaging every complete element of a
+truncated array.
+"""
+
+import json
+import re
+from typing import Any, Optional, Type, Union
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+
+from services.fast_json import loads
+from services.json_stream import ArrayStreamParser
+from services.summary import is_leetcode_item
+
+
+def _items_with_url(value: Any) -> Any:
+    """Drop checklist entries that are not objects with a URL instead of failing the day."""
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, dict) and isinstance(item.get("url"), str)]
+    return value
+
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _leading_number(value: Any) -> Any:
+    """The first number in a string such as "Day 3" or "2 hours"; None if it has none."""
+    if isinstance(value, str):
+        match = _NUMBER_RE.search(value)
+        return match.group() if match else None
+    return value
+
+
+def _leading_int(value: Any) -> Any:
+    value = _leading_number(value)
+    if isinstance(value, str) and "." in value:
+        return int(float(value))
+    return value
+
+
+class ChecklistItem(BaseModel):
+    type: str = Field("study", description='"study" or "leetcode"')
+    title: str = ""
+    url: str
+    topic: Optional[str] = None
+    difficulty: Optional[str] = Field(None, description="easy, medium or hard (leetcode only)")
+    reason: Optional[str] = None
+
+    @field_validator("title", mode="before")
+    @classmethod
+    def _null_title(cls, value: Any) -> Any:
+        return "" if value is None else value
+
+    @model_validator(mode="before")
+    @classmethod
+    def _derive_type(cls, value: Any) -> Any:
+        """A missing or non-string type is inferred from the URL instead of failing the roadmap."""
+        if isinstance(value, dict):
+            item_type = value.get("type")
+            if not isinstance(item_type, str) or not item_type.strip():
+                derived = "leetcode" if is_leetcode_item({"url": value.get("url")}) else "study"
+                value = {**value, "type": derived}
+        return value
+
+
+class RoadmapDay(BaseModel):
+    day: Optional[int] = None
+    date_placeholder: Optional[str] = None
+    focus_area: Optional[str] = None
+    hours_allocated: Optional[float] = None
+    checklist: list[ChecklistItem] = Field(default_factory=list)
+
+    @field_validator("checklist", mode="before")
+    @classmethod
+    def _filter_checklist(cls, value: Any) -> Any:
+        return _items_with_url(value)
+
+    @field_validator("day", mode="before")
+    @classmethod
+    def _day_number(cls, value: Any) -> Any:
+        return _leading_int(value)
+
+    @field_validator("hours_allocated", mode="before")
+    @classmethod
+    def _hours_number(cls, value: Any) -> Any:
+        return _leading_number(value)
+
+
+class RoadmapSummary(BaseModel):
+    major_focus_areas: dict[str, Any] = Field(default_factory=dict)
+    total_study_resources: int = 0
+    total_leetcode_problems: int = 0
+
+
+class RoadmapOutput(BaseModel):
+    company: Optional[str] = None
+    role: Optional[str] = None
+    total_days: Optional[int] = None
+    daily_hours: Optional[float] = None
+    roadmap: list[RoadmapDay]
+    # Missing after a repair or in schema mode; the caller computes it locally.
+    summary: Optional[RoadmapSummary] = None
+
+
+class ConceptsOutput(BaseModel):
+    # {"topic": score} as prompted, or a list of "topic score" / TopicScore items
+    dsa_topics: Union[dict[str, Any], list[Any]]
+    core_fundamentals: Union[dict[str, Any], list[Any]]
+
+
+class FillSlot(BaseModel):
+    day: int
+    topic: str
+    checklist: list[ChecklistItem] = Field(default_factory=list)
+
+    @field_validator("checklist", mode="before")
+    @classmethod
+    def _filter_checklist(cls, value: Any) -> Any:
+        return _items_with_url(value)
+
+
+class FillOutput(BaseModel):
+    slots: list[FillSlot]
+
+
+# -----------------------------
+# Response schemas sent to the model
+# -----------------------------
+class TopicScore(BaseModel):
+    topic: str
+    score: int = Field(..., description="Importance from 1 to 10")
+
+
+class ConceptsSchema(BaseModel):
+    dsa_topics: list[TopicScore] = Field(..., description="Top 10 DSA topics, most important first")
+    core_fundamentals: list[TopicScore] = Field(..., description="Core fundamentals, most important first")
+
+
+class RoadmapSchema(BaseModel):
+    roadmap: list[RoadmapDay]
+
+
+# -----------------------------
+# Decoding
+# -----------------------------
+def _strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before '}' or ']' (outside strings)."""
+    out: list[str] = []
+    in_string = escape = False
+    pending = -1  # index in out of a comma that may be trailing
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            out.append(ch)
+            continue
+        if ch in "}]" and pending >= 0:
+            out[pending] = ""
+        if ch == ",":
+            pending = len(out)
+        elif not ch.isspace():
+            pending = -1
+        if ch == '"':
+            in_string = True
+        out.append(ch)
+    return "".join(out)
+
+
+def _object_text(text: str) -> str:
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError(f"Model did not return JSON.\nRaw output:\n{text}")
+    return text[start : end + 1]
+
+
+def _validate(model: Type[BaseModel], data: Any) -> dict:
+    try:
+        return model.model_validate(data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        raise ValueError(f"Output does not match {model.__name__}: {e}")
+
+
+def decode_output(
+    model: Type[BaseModel], text: str, array_key: str | None = None
+) -> tuple[dict, bool]:
+    """
+    Parse and validate model output. Returns (data, repaired); repaired is
+    True when a truncated `array_key` array was cut back to its complete
+    elements. Raises ValueError when nothing usable is left.
+    """
+    text = (text or "").strip()
+
+    try:
+        return model.model_validate_json(text).model_dump(exclude_unset=True), False
+    except ValidationError as e:
+        if not any(err["type"] == "json_invalid" for err in e.errors()):
+            raise ValueError(f"Output does not match {model.__name__}: {e}")
+
+    try:
+        candidate = _object_text(text)
+        try:
+            data = loads(candidate)
+        except json.JSONDecodeError:
+            data = loads(_strip_trailing_commas(candidate))
+        return _validate(model, data), False
+    except ValueError as e:
+        if array_key is None:
+            raise ValueError(f"Could not parse JSON: {e}\nRaw output:\n{text}")
+
+    parser = ArrayStreamParser(array_key, strict=False)
+    items = parser.feed(_strip_trailing_commas(text))
+    if not items:
+        raise ValueError(f"Could not parse JSON and no complete '{array_key}' items.\nRaw output:\n{text}")
+    data = parser.salvage()
+    data[array_key] = items
+    return _validate(model, data), True
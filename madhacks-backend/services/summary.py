@@ -0,0 +1,86 @@
+"""
+Local computation of roadmap summary fields from the days themselves,
+so totals never depend on the model counting correctly.
+"""
+
+from collections import Counter
+from typing import Any, Iterable
+
+# The prompt's own example uses "pratice"; accept every spelling we've seen.
+LEETCODE_TYPES = {"leetcode", "practice", "pratice", "problem"}
+
+
+def is_leetcode_item(item: dict[str, Any]) -> bool:
+    item_type = str(item.get("type", "")).strip().lower()
+    if item_type in LEETCODE_TYPES:
+        return True
+    url = item.get("url")
+    return isinstance(url, str) and "leetcode.com/problems/" in url
+
+
+def is_study_item(item: dict[str, Any]) -> bool:
+    return str(item.get("type", "")).strip().lower() == "study" and not is_leetcode_item(item)
+
+
+class SummaryBuilder:
+    """Accumulates counts day by day, so callers never need to hold every day."""
+
+    def __init__(self) -> None:
+        self.total_study_resources = 0
+        self.total_leetcode_problems = 0
+        self.days = 0
+        self._focus: Counter = Counter()
+        self._focus_labels: dict[str, str] = {}
+
+    def add_day(self, day: dict[str, Any]) -> None:
+        self.days += 1
+        checklist = day.get("checklist", [])
+        if not isinstance(checklist, list):
+            checklist = []
+
+        items = [item for item in checklist if isinstance(item, dict)]
+        for item in items:
+            if is_leetcode_item(item):
+                self.total_leetcode_problems += 1
+            elif is_study_item(item):
+                self.total_study_resources += 1
+
+        focus = str(day.get("focus_area") or "").strip()
+        if focus:
+            key = focus.lower()
+            self._focus_labels.setdefault(key, focus)
+            # Weight by content so "areas with the most to practice" float up.
+            self._focus[key] += max(1, len(items))
+
+    def major_focus_areas(self, limit: int = 5) -> dict[str, str]:
+        out: dict[str, str] = {}
+        for key, weight in self._focus.most_common(limit):
+            out[self._focus_labels[key]] = f"{weight} checklist items"
+        return out
+
+    def build(self, model_summary: dict[str, Any] | None = None) -> dict[str, Any]:
+        """
+        Totals are always the local counts. major_focus_areas keeps the model's
+        descriptions when it supplied them, otherwise it is derived locally.
+        """
+        focus_areas = None
+        if isinstance(model_summary, dict):
+            focus_areas = model_summary.get("major_focus_areas")
+        if not isinstance(focus_areas, dict) or not focus_areas:
+            focus_areas = self.major_focus_areas()
+
+        return {
+            "major_focus_areas": focus_areas,
+            "total_study_resources": self.total_study_resources,
+            "total_leetcode_problems": self.total_leetcode_problems,
+        }
+
+
+def summarize_roadmap(
+    days: Iterable[dict[str, Any]], model_summary: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    builder = SummaryBuilder()
+    for day in days:
+        if isinstance(day, dict):
+            builder.add_day(day)
+    return builder.build(model_summary)
@@ -0,0 +1,128 @@
+"""
+Prompt templates (prompt.md, roadmap.md, ...) with {{placeholder}} slots.
+
+A template is read and split into literal/placeholder segments once, then
+rendered with a single join. The file is re-read only when its mtime
+changes, and content_hash lets caches key on the exact prompt version.
+An edit that fails validation is logged and the last good version is kept.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if value is None:
+        return ""
+    return str(value)
+
+
+class PromptTemplate:
+    def __init__(self, path: str, placeholders: set[str]) -> None:
+        """
+        placeholders is the exact set of names the template must use.
+        Loading fails if the file references any other name, so typos in the
+        markdown surface at startup rather than as a literal {{...}} in a prompt.
+        """
+        self.path = path
+        self.placeholders = frozenset(placeholders)
+        self._lock = threading.Lock()
+        self._mtime_ns = -1
+        self._segments: list[str] = []
+        self._slots: list[tuple[int, str]] = []
+        self._hash = ""
+        self._load()
+
+    def _load(self) -> None:
+        stat = os.stat(self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        segments: list[str] = []
+        slots: list[tuple[int, str]] = []
+        pos = 0
+        for m in PLACEHOLDER_RE.finditer(text):
+            segments.append(text[pos : m.start()])
+            slots.append((len(segments), m.group(1)))
+            segments.append("")
+            pos = m.end()
+        segments.append(text[pos:])
+
+        used = {name for _, name in slots}
+        unknown = used - self.placeholders
+        if unknown:
+            raise TemplateError(
+                f"{os.path.basename(self.path)} uses unknown placeholders: {sorted(unknown)}"
+            )
+        unused = self.placeholders - used
+        if unused:
+            raise TemplateError(
+                f"{os.path.basename(self.path)} is missing placeholders: {sorted(unused)}"
+            )
+
+        self._segments = segments
+        self._slots = slots
+        self._hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self._mtime_ns = stat.st_mtime_ns
+
+    def _refresh(self) -> None:
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            # Keep serving the last good version if the file is mid-replace.
+            return
+        if mtime_ns != self._mtime_ns:
+            with self._lock:
+                if mtime_ns != self._mtime_ns:
+                    try:
+                        self._load()
+                    except (OSError, TemplateError) as e:
+                        logger.warning(
+                            "keeping previous %s: %s", os.path.basename(self.path), e
+                        )
+                        # Don't re-read the bad version on every render.
+                        self._mtime_ns = mtime_ns
+
+    @property
+    def content_hash(self) -> str:
+        self._refresh()
+        return self._hash
+
+    def render(self, **values: Any) -> str:
+        self._refresh()
+        with self._lock:
+            segments = list(self._segments)
+            slots = self._slots
+
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise TemplateError(
+                f"Missing values for {os.path.basename(self.path)}: {sorted(missing)}"
+            )
+        unknown = values.keys() - self.placeholders
+        if unknown:
+            raise TemplateError(
+                f"Unknown placeholders for {os.path.basename(self.path)}: {sorted(unknown)}"
+            )
+
+        texts = {name: _to_text(v) for name, v in values.items()}
+        for index, name in slots:
+            segments[index] = texts[name]
+        return "".join(segments)
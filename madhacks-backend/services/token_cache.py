@@ -0,0 +1,231 @@
+"""
+Cached Firebase ID-token verification.
+
+- Decoded claims are cached by token digest until the token's own `exp`
+  (capped by AUTH_TOKEN_CACHE_MAX_AGE), so repeat requests skip signature checks
+- Google's signing certificates are prefetched and refreshed in a background
+  thread before they expire, so no request waits on a certificate download
+- With FIREBASE_CHECK_REVOKED=1 a revoked token is rejected within
+  AUTH_TOKEN_CACHE_MAX_AGE seconds; POST /api/auth/revoke drops the
+  caller's cached tokens at once through invalidate_uid()
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Any
+
+from services.firebase_app import get_app
+
+ID_TOKEN_CERT_URI = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_MAX_AGE = float(os.environ.get("AUTH_TOKEN_CACHE_MAX_AGE", "300"))
+FIREBASE_CHECK_REVOKED = os.environ.get("FIREBASE_CHECK_REVOKED", "0") == "1"
+
+
+# Both classes follow google.auth.transport's Request/Response interfaces
+# without importing it, so firebase_admin loads only when first needed.
+class _CachedResponse:
+    def __init__(self, status: int, headers: dict[str, str], data: bytes) -> None:
+        self._status = status
+        self._headers = headers
+        self._data = data
+
+    @property
+    def status(self) -> int:
+        return self._status
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return self._headers
+
+    @property
+    def data(self) -> bytes:
+        return self._data
+
+
+class CertPrefetcher:
+    """
+    google-auth transport placed in front of firebase_admin's own one.
+    Requests for the ID-token certificate URL are served from memory; the
+    copy is refreshed in the background at 80% of its Cache-Control max-age.
+    Every other request goes to the wrapped transport.
+    """
+
+    def __init__(self, delegate: Any, cert_url: str = ID_TOKEN_CERT_URI) -> None:
+        self.delegate = delegate
+        self.cert_url = cert_url
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self._lock = threading.Lock()
+        self._response: _CachedResponse | None = None
+        self._expires_at = 0.0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def _fetch(self) -> float:
+        """Download the certificates; returns seconds until the next refresh."""
+        req = urllib.request.Request(self.cert_url, headers={"Accept": "application/json"})
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            data = resp.read()
+            headers = dict(resp.headers.items())
+        json.loads(data)  # don't cache a broken body
+
+        match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+        max_age = float(match.group(1)) if match else 3600.0
+        with self._lock:
+            self._response = _CachedResponse(200, headers, data)
+            self._expires_at = time.time() + max_age
+        self.refreshes += 1
+        return max(30.0, max_age * 0.8)
+
+    def _run(self) -> None:
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                delay = self._fetch()
+            except Exception:
+                self.refresh_failures += 1
+                delay = 30.0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="firebase-cert-prefetch", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if url == self.cert_url and method == "GET":
+            with self._lock:
+                if self._response is not None and time.time() < self._expires_at:
+                    return self._response
+        return self.delegate(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+
+
+class CachedTokenVerifier:
+    def __init__(
+        self,
+        max_entries: int = AUTH_TOKEN_CACHE_SIZE,
+        max_age: float = AUTH_TOKEN_CACHE_MAX_AGE,
+        check_revoked: bool = FIREBASE_CHECK_REVOKED,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self.check_revoked = check_revoked
+        self.prefetcher: CertPrefetcher | None = None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "failures": 0,
+            "evictions": 0,
+            "verify_seconds_total": 0.0,
+            "verify_seconds_max": 0.0,
+        }
+
+    def start_prefetch(self) -> None:
+        """
+        Route firebase_admin's certificate fetches through a CertPrefetcher.
+        Uses firebase_admin internals, so it quietly does nothing if they move.
+        """
+        if self.prefetcher is not None:
+            self.prefetcher.start()
+            return
+        from firebase_admin import auth
+
+        try:
+            verifier = auth._get_client(get_app())._token_verifier
+        except Exception:
+            return
+        if not hasattr(verifier, "request"):
+            return
+        self.prefetcher = CertPrefetcher(verifier.request)
+        verifier.request = self.prefetcher
+        self.prefetcher.start()
+
+    def verify(self, token: str) -> dict:
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, claims = entry
+                if now < expires_at:
+                    self._entries.move_to_end(digest)
+                    self._counters["hits"] += 1
+                    return claims
+                del self._entries[digest]
+            self._counters["misses"] += 1
+
+        if self.prefetcher is None:
+            self.start_prefetch()
+
+        from firebase_admin import auth
+
+        started = time.perf_counter()
+        try:
+            claims = auth.verify_id_token(token, app=get_app(), check_revoked=self.check_revoked)
+        except Exception:
+            with self._lock:
+                self._counters["failures"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._counters["verify_seconds_total"] += elapsed
+                self._counters["verify_seconds_max"] = max(
+                    self._counters["verify_seconds_max"], elapsed
+                )
+
+        expires_at = min(float(claims.get("exp", now)), now + self.max_age)
+        with self._lock:
+            self._entries[digest] = (expires_at, claims)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return claims
+
+    def invalidate_uid(self, uid: str) -> int:
+        """Drop every cached token of a user, e.g. after revoke_refresh_tokens()."""
+        with self._lock:
+            stale = [k for k, (_, claims) in self._entries.items() if claims.get("uid") == uid]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            verified = self._counters["misses"]
+            lookups = self._counters["hits"] + verified
+            out: dict[str, Any] = {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "check_revoked": self.check_revoked,
+                **self._counters,
+                "hit_ratio": self._counters["hits"] / lookups if lookups else 0.0,
+                "verify_seconds_avg": (
+                    self._counters["verify_seconds_total"] / verified if verified else 0.0
+                ),
+            }
+        if self.prefetcher is not None:
+            out["cert_refreshes"] = self.prefetcher.refreshes
+            out["cert_refresh_failures"] = self.prefetcher.refresh_failures
+        return out
+
+
+token_verifier = CachedTokenVerifier()
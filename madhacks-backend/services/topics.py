@@ -0,0 +1,250 @@
+"""
+Canonical topic index.
+
+The model, the user's concept profile and LeetCode all name the same topic
+differently ("hash maps", "Hash Table", "hashing", "HashMap"). resolve()
+maps any of them to one Topic with a stable id, so caches, the resource
+index and LeetCode stats can be joined on it.
+
+The lookup table (canonical names, synonyms and LeetCode tag names, each
+also indexed without spaces and with plurals folded) is built once at
+import. Names not found there are matched with difflib against the same
+keys (except short ones, where one letter is already a large edit), and
+every result is memoized. Unknown topics are kept with a slug
+of their own name as id, so nothing is ever dropped.
+"""
+
+import difflib
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Optional
+
+# Fuzzy matches below this difflib ratio are treated as unknown topics.
+FUZZY_CUTOFF = 0.88
+# Keys this short ("prim", "dsu") only match exactly; "primes" is not "prim".
+FUZZY_MIN_KEY_LENGTH = 6
+
+
+class Topic(NamedTuple):
+    id: str
+    name: str
+    kind: Optional[str]  # "dsa", "core", or None for unknown topics
+
+
+# (id, canonical name, kind, synonyms). LeetCode tagNames are synonyms of the
+# topic they belong to, so solved counts land on the same ids; tags too
+# generic to be synonyms are mapped in LEETCODE_TAG_TOPICS instead. DSA names are
+# lowercase and fundamentals Title Case, as prompt.md asks of the model.
+TOPICS: list[tuple[str, str, str, tuple[str, ...]]] = [
+    ("arrays", "arrays", "dsa", ("array", "Array", "arrays and strings", "arrays & hashing")),
+    ("strings", "strings", "dsa", ("string", "String", "string manipulation")),
+    ("hash-maps", "hash maps", "dsa", (
+        "hash map", "hashmap", "hash table", "Hash Table", "hash tables", "hashing",
+        "hash set", "hashset", "dictionary", "dictionaries", "hash function", "Hash Function",
+    )),
+    ("two-pointers", "two pointers", "dsa", ("two pointer", "2 pointers", "Two Pointers")),
+    ("sliding-window", "sliding window", "dsa", ("Sliding Window", "sliding windows")),
+    ("binary-search", "binary search", "dsa", ("Binary Search",)),
+    ("sorting", "sorting", "dsa", ("sort", "Sorting", "sorting algorithms", "Merge Sort", "Bucket Sort", "Counting Sort", "Radix Sort")),
+    ("linked-lists", "linked lists", "dsa", ("linked list", "Linked List", "Doubly-Linked List", "doubly linked list")),
+    ("stacks", "stacks", "dsa", ("stack", "Stack")),
+    ("monotonic-stack", "monotonic stack", "dsa", ("Monotonic Stack", "monotonic queue", "Monotonic Queue")),
+    ("queues", "queues", "dsa", ("queue", "Queue", "deque")),
+    ("heaps", "heap / priority queue", "dsa", (
+        "heap", "heaps", "priority queue", "priority queues", "heap/priority queue",
+        "Heap (Priority Queue)", "min heap", "max heap",
+    )),
+    ("trees", "trees", "dsa", ("tree", "Tree", "binary tree", "binary trees", "Binary Tree")),
+    ("binary-search-trees", "binary search trees", "dsa", ("bst", "binary search tree", "Binary Search Tree")),
+    ("tries", "trie", "dsa", ("tries", "Trie", "prefix tree", "prefix trees")),
+    ("graphs", "graphs", "dsa", ("graph", "Graph", "graph theory", "graph algorithms", "graph traversal")),
+    ("dfs", "depth-first search", "dsa", ("dfs", "Depth-First Search", "depth first search")),
+    ("bfs", "breadth-first search", "dsa", ("bfs", "Breadth-First Search", "breadth first search")),
+    ("topological-sort", "topological sort", "dsa", ("Topological Sort", "topological sorting", "toposort")),
+    ("shortest-path", "shortest paths", "dsa", ("Shortest Path", "shortest path", "dijkstra", "dijkstra's algorithm", "bellman ford")),
+    ("union-find", "union find", "dsa", ("Union Find", "disjoint set", "disjoint set union", "dsu")),
+    ("minimum-spanning-tree", "minimum spanning tree", "dsa", ("Minimum Spanning Tree", "mst", "kruskal", "prim")),
+    ("dynamic-programming", "dynamic programming", "dsa", ("dp", "Dynamic Programming", "memoization", "Memoization", "tabulation")),
+    ("greedy", "greedy", "dsa", ("greedy algorithms", "Greedy")),
+    ("backtracking", "backtracking", "dsa", ("Backtracking",)),
+    ("recursion", "recursion", "dsa", ("Recursion", "recursive algorithms")),
+    ("divide-and-conquer", "divide and conquer", "dsa", ("Divide and Conquer", "divide & conquer")),
+    ("bit-manipulation", "bit manipulation", "dsa", ("Bit Manipulation", "bitwise operations", "bitmask", "Bitmask", "bit masking")),
+    ("math", "math", "dsa", ("Math", "mathematics", "number theory", "Number Theory", "Combinatorics", "combinatorics", "Geometry")),
+    ("prefix-sum", "prefix sums", "dsa", ("prefix sum", "Prefix Sum", "cumulative sum")),
+    ("intervals", "intervals", "dsa", ("interval", "merge intervals", "overlapping intervals", "Line Sweep", "sweep line")),
+    ("matrix", "matrix", "dsa", ("matrices", "Matrix", "2d arrays", "grid")),
+    ("segment-tree", "segment trees", "dsa", ("segment tree", "Segment Tree", "Binary Indexed Tree", "fenwick tree", "binary indexed tree")),
+    ("string-matching", "string matching", "dsa", ("String Matching", "Rolling Hash", "kmp", "rabin karp", "pattern matching")),
+    ("simulation", "simulation", "dsa", ("Simulation",)),
+    ("data-structure-design", "data structure design", "dsa", ("design data structures", "lru cache")),
+    ("operating-systems", "Operating Systems", "core", ("os", "operating system", "OS fundamentals")),
+    ("dbms", "Database Management Systems", "core", ("dbms", "databases", "database", "database systems", "rdbms")),
+    ("sql", "SQL", "core", ("sql queries", "mysql", "postgresql")),
+    ("computer-networks", "Computer Networks", "core", ("networks", "networking", "computer networking", "cn", "tcp/ip")),
+    ("system-design", "System Design", "core", ("hld", "high-level design", "high level design", "scalable systems")),
+    ("low-level-design", "Low-Level Design", "core", ("lld", "low level design", "object-oriented design", "ood", "design patterns")),
+    ("oop", "Object-Oriented Programming", "core", ("oop", "oops", "object oriented programming", "object-oriented programming concepts")),
+    ("concurrency", "Concurrency", "core", ("multithreading", "multi-threading", "threads", "parallel programming", "Concurrency and multithreading")),
+    ("distributed-systems", "Distributed Systems", "core", ("distributed computing",)),
+    ("computer-architecture", "Computer Architecture", "core", ("computer organization", "coa", "computer organization and architecture")),
+    ("memory-management", "Memory Management", "core", ("memory", "virtual memory", "pointers and memory")),
+    ("compilers", "Compilers", "core", ("compiler design", "compiler")),
+    ("embedded-systems", "Embedded Systems", "core", ("embedded", "embedded programming", "firmware")),
+    ("software-engineering", "Software Engineering", "core", ("sdlc", "software development life cycle", "testing", "software testing")),
+]
+
+# LeetCode tag -> topic id, for tags that are ambiguous as free-form names
+# (a concept profile's "Design" is not the LeetCode "Design" tag).
+LEETCODE_TAG_TOPICS = {"Design": "data-structure-design"}
+
+# Ids of earlier versions of the table -> their current id. Stores written
+# before they tracked TOPIC_INDEX_VERSION may still hold the old ones.
+RENAMED_TOPIC_IDS = {"design": "data-structure-design"}
+
+# Hash of the table; caches that store canonicalized output include it in their key.
+TOPIC_INDEX_VERSION = hashlib.sha256(
+    repr((TOPICS, LEETCODE_TAG_TOPICS)).encode("utf-8")
+).hexdigest()[:12]
+
+_FILLER = {"algorithm", "basic", "fundamental", "concept", "problem", "technique", "pattern", "question"}
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _words(text: str) -> list[str]:
+    text = str(text or "").lower().replace("&", " and ")
+    return [_singular(w) for w in _WORD_RE.findall(text)]
+
+
+def _keys(text: str) -> list[str]:
+    """Lookup keys of a name: words joined with spaces, then without."""
+    words = _words(text)
+    return [" ".join(words), "".join(words)] if words else []
+
+
+def slugify(text: Any) -> str:
+    return "-".join(_WORD_RE.findall(str(text or "").lower()))
+
+
+def _build() -> tuple[dict[str, Topic], dict[str, Topic]]:
+    by_id: dict[str, Topic] = {}
+    by_key: dict[str, Topic] = {}
+    for topic_id, name, kind, synonyms in TOPICS:
+        topic = Topic(topic_id, name, kind)
+        by_id[topic_id] = topic
+        for alias in (name, topic_id.replace("-", " "), *synonyms):
+            for key in _keys(alias):
+                by_key.setdefault(key, topic)
+    return by_id, by_key
+
+
+_BY_ID, _BY_KEY = _build()
+_FUZZY_KEYS = sorted(k for k in _BY_KEY if len(k) >= FUZZY_MIN_KEY_LENGTH)
+
+
+@lru_cache(maxsize=4096)
+def _lookup(text: str) -> Optional[Topic]:
+    keys = _keys(text)
+    if not keys:
+        return None
+    for key in keys:
+        if key in _BY_KEY:
+            return _BY_KEY[key]
+
+    # "graph algorithms", "sorting techniques"
+    words = [w for w in keys[0].split() if w not in _FILLER]
+    if words and len(words) < len(keys[0].split()):
+        for key in (" ".join(words), "".join(words)):
+            if key in _BY_KEY:
+                return _BY_KEY[key]
+
+    match = difflib.get_close_matches(keys[0], _FUZZY_KEYS, n=1, cutoff=FUZZY_CUTOFF)
+    return _BY_KEY[match[0]] if match else None
+
+
+def resolve(name: Any) -> Topic:
+    """Canonical topic for a name; unknown names keep their own (cleaned) name."""
+    text = " ".join(str(name or "").split())
+    found = _lookup(text)
+    if found is not None:
+        return found
+    return Topic(slugify(text), text, None)
+
+
+def resolve_tag(tag: Any) -> Topic:
+    """resolve() for a LeetCode tagName."""
+    found = LEETCODE_TAG_TOPICS.get(" ".join(str(tag or "").split()))
+    return _BY_ID[found] if found else resolve(tag)
+
+
+def topic_id(name: Any) -> str:
+    return resolve(name).id
+
+
+def canonical_name(name: Any) -> str:
+    return resolve(name).name
+
+
+def canonicalize_keys(
+    values: dict[str, Any],
+    combine: Callable[[Any, Any], Any],
+    name_of: Callable[[Any], str] = canonical_name,
+) -> dict[str, Any]:
+    """
+    Re-key a {topic: value} dict by canonical name (name_of), in first-seen
+    order. Values of topics that collapse into one are merged with combine(old, new).
+    """
+    out: dict[str, Any] = {}
+    for key, value in values.items():
+        name = name_of(key)
+        if not name:
+            continue
+        out[name] = combine(out[name], value) if name in out else value
+    return out
+
+
+def canonicalize_scores(scores: dict[str, Any]) -> dict[str, Any]:
+    """{topic: score}, duplicates keeping the highest score."""
+    return canonicalize_keys(scores, max)
+
+
+def _merge_profile(old: dict, new: dict) -> dict:
+    # Most important, least confident reading wins, so merging never shrinks study time.
+    merged = {**old, **new}
+    merged["importance"] = max(old.get("importance", 0), new.get("importance", 0))
+    merged["confidence"] = min(old.get("confidence", 0), new.get("confidence", 0))
+    return merged
+
+
+def canonicalize_profile(profile: dict[str, dict]) -> dict[str, dict]:
+    """{topic: {importance, confidence}} keyed by canonical name."""
+    return canonicalize_keys(profile, _merge_profile)
+
+
+def topic_index() -> list[dict[str, Any]]:
+    """The canonical topics and every synonym that maps to them."""
+    return [
+        {"id": topic_id_, "name": name, "kind": kind, "synonyms": list(synonyms)}
+        for topic_id_, name, kind, synonyms in TOPICS
+    ]
+
+
+def stats() -> dict[str, Any]:
+    info = _lookup.cache_info()
+    return {
+        "version": TOPIC_INDEX_VERSION,
+        "topics": len(_BY_ID),
+        "keys": len(_BY_KEY),
+        "memo_hits": info.hits,
+        "memo_misses": info.misses,
+        "memo_size": info.currsize,
+    }
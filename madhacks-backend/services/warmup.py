@@ -0,0 +1,58 @@
+"""
+Background warm-up of lazily created clients.
+
+SDKs and clients (google.genai, firebase_admin, the document store) are
+loaded on first use so the server imports and answers /api/health fast.
+With WARMUP_ON_STARTUP=1 the steps registered here run in a worker thread
+right after startup, so the first real request usually finds them ready;
+startup itself never waits for them, and a failing step is only logged.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable
+
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    def __init__(self) -> None:
+        self._steps: dict[str, Callable[[], Any]] = {}
+        self._results: dict[str, dict[str, Any]] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, step: Callable[[], Any]) -> None:
+        """step() runs once in a worker thread during warm-up."""
+        self._steps[name] = step
+
+    def _run_steps(self) -> None:
+        for name, step in self._steps.items():
+            started = time.perf_counter()
+            try:
+                step()
+                result: dict[str, Any] = {"ok": True}
+            except Exception as e:
+                logger.warning("warm-up step %s failed: %s", name, e)
+                result = {"ok": False, "error": str(e)}
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            self._results[name] = result
+        logger.info("warm-up finished: %s", self._results)
+
+    def start(self) -> None:
+        """Run the registered steps in the background (once)."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._run_steps))
+
+    def stats(self) -> dict[str, Any]:
+        if self._task is None:
+            state = "disabled" if not WARMUP_ON_STARTUP else "pending"
+        else:
+            state = "done" if self._task.done() else "running"
+        return {"state": state, "steps": list(self._steps), "results": dict(self._results)}
+
+
+warmup = Warmup()
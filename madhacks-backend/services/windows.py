@@ -0,0 +1,143 @@
+"""
+Helpers for generating long roadmaps as independent day windows:
+split the horizon, decide up front which topics each window covers,
+and stitch the generated windows back into one continuous plan.
+"""
+
+from typing import Any
+
+from services.summary import summarize_roadmap
+
+
+def topic_weight(meta: dict[str, Any]) -> float:
+    """Important topics with low confidence get the most time."""
+    importance = float(meta.get("importance", 5))
+    confidence = float(meta.get("confidence", 5))
+    return max(importance, 0.0) * max(11.0 - confidence, 1.0)
+
+
+def apportion(weights: list[float], total: int, minimum: int = 0) -> list[int]:
+    """
+    Largest-remainder split of total in proportion to weights, each part at
+    least minimum (as far as total allows). All-zero weights split evenly.
+    """
+    total_weight = sum(weights)
+    if total_weight <= 0:
+        weights = [1.0] * len(weights)
+        total_weight = float(len(weights))
+    shares = [total * w / total_weight for w in weights]
+    counts = [max(minimum, int(s)) for s in shares]
+    while sum(counts) > total:
+        i = max(range(len(counts)), key=lambda j: (counts[j] - shares[j], -j))
+        counts[i] -= 1
+    order = sorted(range(len(counts)), key=lambda j: (counts[j] - shares[j], j))
+    for j in order[: total - sum(counts)]:
+        counts[j] += 1
+    return counts
+
+
+def split_windows(total_days: int, window_days: int) -> list[tuple[int, int]]:
+    """
+    Split days 1..total_days into inclusive (start, end) windows.
+    A short tail window is folded into the previous one so no window is tiny.
+    """
+    window_days = max(1, int(window_days))
+    windows: list[tuple[int, int]] = []
+    start = 1
+    while start <= total_days:
+        end = min(start + window_days - 1, total_days)
+        windows.append((start, end))
+        start = end + 1
+
+    if len(windows) > 1 and windows[-1][1] - windows[-1][0] + 1 < window_days // 2:
+        last_start, last_end = windows.pop()
+        prev_start, _ = windows.pop()
+        windows.append((prev_start, last_end))
+    return windows
+
+
+def allocate_days(
+    dsa_topics: dict[str, dict], core_fundamentals: dict[str, dict], total_days: int
+) -> list[tuple[str, str]]:
+    """
+    Return one (kind, topic) per day, kind being "dsa" or "core".
+    Days are shared out in proportion to topic_weight() (largest remainder),
+    and higher-weight topics are scheduled first.
+    """
+    topics = [("dsa", t, topic_weight(m)) for t, m in dsa_topics.items()]
+    topics += [("core", t, topic_weight(m)) for t, m in core_fundamentals.items()]
+    topics.sort(key=lambda x: -x[2])
+    if not topics or total_days <= 0:
+        return []
+
+    topics = topics[:total_days]
+    counts = apportion([w for _, _, w in topics], total_days, minimum=1)
+
+    schedule: list[tuple[str, str]] = []
+    for (kind, topic, _), n in zip(topics, counts):
+        schedule.extend([(kind, topic)] * n)
+    return schedule
+
+
+def window_topics(
+    schedule: list[tuple[str, str]],
+    start: int,
+    end: int,
+    dsa_topics: dict[str, dict],
+    core_fundamentals: dict[str, dict],
+) -> tuple[dict[str, dict], dict[str, dict]]:
+    """Topic maps restricted to what the window covers, with planned_days set."""
+    dsa: dict[str, dict] = {}
+    core: dict[str, dict] = {}
+    for kind, topic in schedule[start - 1 : end]:
+        target, source = (dsa, dsa_topics) if kind == "dsa" else (core, core_fundamentals)
+        if topic not in target:
+            target[topic] = {**source[topic], "planned_days": 0}
+        target[topic]["planned_days"] += 1
+    return dsa, core
+
+
+def merge_windows(
+    parts: list[dict[str, Any]],
+    company_name: str,
+    job_role: str,
+    total_prep_days: int,
+    daily_hours: float,
+) -> dict[str, Any]:
+    """
+    Concatenate window roadmaps in order with continuous day numbering
+    and a summary computed from the merged days.
+    """
+    days: list[dict[str, Any]] = []
+    for part in parts:
+        for day in part.get("roadmap", []):
+            if not isinstance(day, dict):
+                continue
+            n = len(days) + 1
+            day["day"] = n
+            day["date_placeholder"] = f"Day {n}"
+            days.append(day)
+
+    model_focus: dict[str, Any] = {}
+    for part in parts:
+        s = part.get("summary")
+        if isinstance(s, dict) and isinstance(s.get("major_focus_areas"), dict):
+            for area, why in s["major_focus_areas"].items():
+                model_focus.setdefault(area, why)
+
+    summary = summarize_roadmap(days)
+    if model_focus:
+        # Prefer the model's wording for the areas the local count ranks highest.
+        ranked = {k.lower() for k in summary["major_focus_areas"]}
+        picked = {k: v for k, v in model_focus.items() if k.lower() in ranked}
+        if picked:
+            summary["major_focus_areas"] = picked
+
+    return {
+        "company": company_name,
+        "role": job_role,
+        "total_days": total_prep_days,
+        "daily_hours": daily_hours,
+        "roadmap": days,
+        "summary": summary,
+    }
@@ -0,0 +1,77 @@
+"""Single-flight and tiering of services.cache.ResponseCache."""
+
+import asyncio
+import threading
+
+from services.cache import ResponseCache
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    cache = ResponseCache("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"v": 1}
+
+    async def main():
+        leader = asyncio.create_task(cache.aget_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.aget_or_compute("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter
+
+    assert asyncio.run(main()) == {"v": 1}
+    assert calls == 1
+    assert cache.get("k") == {"v": 1}
+
+
+def test_async_disk_tier_runs_off_the_loop(tmp_path):
+    cache = ResponseCache("test", db_path=str(tmp_path / "cache.sqlite3"))
+    loop_threads: list[bool] = []
+    disk_get, disk_set = cache._disk_get, cache._disk_set
+
+    async def main():
+        loop_thread = threading.get_ident()
+
+        def tracked(fn):
+            def wrapper(*args):
+                loop_threads.append(threading.get_ident() == loop_thread)
+                return fn(*args)
+            return wrapper
+
+        cache._disk_get, cache._disk_set = tracked(disk_get), tracked(disk_set)
+
+        async def compute():
+            return {"v": 2}
+
+        first = await cache.aget_or_compute("k", compute)
+        cache._entries.clear()
+        second = await cache.aget_or_compute("k", compute)
+        return first, second
+
+    assert asyncio.run(main()) == ({"v": 2}, {"v": 2})
+    assert loop_threads and not any(loop_threads)
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_sync_flight_computes_once():
+    cache = ResponseCache("test")
+    calls = 0
+    started = threading.Event()
+
+    def compute():
+        nonlocal calls
+        calls += 1
+        started.wait(0.05)
+        return 1
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=("k", compute)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == 1
@@ -0,0 +1,37 @@
+"""Request deadlines of services.call_policy.CallPolicy."""
+
+import asyncio
+
+import pytest
+
+from services.call_policy import CallPolicy, ModelDeadlineExceeded, Target
+
+
+async def _slow(target: Target) -> str:
+    await asyncio.sleep(0.15)
+    return target.model
+
+
+def _policy() -> CallPolicy:
+    return CallPolicy([Target("m", 0)], deadlines={"roadmap": 0.25}, hedge_percentile=0)
+
+
+def test_calls_after_begin_share_one_deadline():
+    policy = _policy()
+
+    async def main():
+        policy.begin()
+        await policy.acall("roadmap", _slow)
+        await policy.acall("roadmap", _slow)
+
+    with pytest.raises(ModelDeadlineExceeded):
+        asyncio.run(main())
+
+
+def test_calls_without_begin_get_a_deadline_each():
+    policy = _policy()
+
+    async def main():
+        return [await policy.acall("roadmap", _slow) for _ in range(2)]
+
+    assert asyncio.run(main()) == ["m", "m"]
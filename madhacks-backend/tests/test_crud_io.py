@@ -0,0 +1,138 @@
+"""
+Document reads/writes of the crud paths against db.memory.MemoryStore,
+as counted by get_io_stats().
+"""
+
+import pytest
+
+import db
+from db.memory import MemoryStore
+from services import crud
+
+USER = "user-1"
+
+
+def _roadmap(*urls: str) -> dict:
+    return {
+        "company": "Acme",
+        "roadmap": [
+            {"day": 1, "checklist": [{"type": "study", "title": u, "url": u} for u in urls]}
+        ],
+    }
+
+
+class CountingStore(MemoryStore):
+    """MemoryStore that also counts round trips per method."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def get(self, path, fields=None):
+        self._count("get")
+        return super().get(path, fields)
+
+    def get_many(self, paths):
+        self._count("get_many")
+        return super().get_many(paths)
+
+
+@pytest.fixture
+def store():
+    store = CountingStore()
+    db.set_store(store)
+    crud._io_stats.clear()
+    yield store
+    db.set_store(None)
+
+
+def _save(company: str, roadmap_json: dict) -> None:
+    def save(uow):
+        crud.save_roadmap_dump(USER, company, roadmap_json, uow=uow)
+        crud.extract_urls_and_update_db(USER, roadmap_json, uow=uow)
+
+    crud.run_in_unit(USER, save, label="save")
+
+
+def _io(label: str) -> tuple[int, int, int]:
+    entry = crud.get_io_stats()[label]
+    return entry["calls"], entry["reads"], entry["writes"]
+
+
+def test_save_reads_user_once_and_writes_roadmap_and_user(store):
+    _save("Acme", _roadmap("https://a", "https://b"))
+    # user doc read, roadmap document + user doc written
+    assert _io("save") == (1, 1, 2)
+
+
+def test_resave_of_unchanged_roadmap_writes_nothing(store):
+    roadmap_json = _roadmap("https://a")
+    _save("Acme", roadmap_json)
+    _save("Acme", roadmap_json)
+    assert _io("save") == (2, 2, 2)
+
+
+def test_getitem_is_one_read(store):
+    _save("Acme", _roadmap("https://a"))
+    assert crud.get_url_status(USER, "https://a") is False
+    assert _io("get_url_status") == (1, 1, 0)
+
+
+def test_putitem_is_one_blind_write(store):
+    _save("Acme", _roadmap("https://a"))
+    crud.set_url_status(USER, "https://a", True)
+    assert _io("set_url_status") == (1, 0, 1)
+    assert crud.get_url_status(USER, "https://a") is True
+
+
+def test_putitem_for_missing_user_writes_nothing(store):
+    crud.set_url_status("nobody", "https://a", True)
+    assert _io("set_url_status") == (1, 0, 0)
+
+
+def test_bulk_without_scope_is_one_blind_write(store):
+    _save("Acme", _roadmap("https://a", "https://b"))
+    changes = crud.set_url_statuses(USER, {"https://a": True, "https://b": True})
+    assert changes == {"https://a": True, "https://b": True}
+    assert _io("set_url_statuses") == (1, 0, 1)
+
+
+def test_bulk_for_missing_user_writes_nothing(store):
+    assert crud.set_url_statuses("nobody", {"https://a": True}) is None
+    assert _io("set_url_statuses") == (1, 0, 0)
+    assert crud.get_urls_for_user("nobody") == {}
+
+
+def test_bulk_with_scope_returns_state_of_whole_scope(store):
+    _save("Acme", _roadmap("https://a", "https://b"))
+    crud.set_url_status(USER, "https://a", True)
+    changes = crud.set_url_statuses(USER, {"https://b": True}, company_name="Acme")
+    assert changes == {"https://a": True, "https://b": True}
+
+
+def test_bulk_with_scope_reads_user_and_roadmap_once(store):
+    _save("Acme", _roadmap("https://a", "https://b"))
+    changes = crud.set_url_statuses(
+        USER, {"https://elsewhere": True}, company_name="Acme", checked=True
+    )
+    assert changes == {"https://a": True, "https://b": True}
+    assert _io("set_url_statuses") == (1, 2, 1)
+    assert crud.get_urls_for_user(USER) == {"https://a": True, "https://b": True}
+
+
+def test_get_roadmaps_batches_roadmap_reads(store):
+    for company in ("Acme", "Globex", "Initech"):
+        _save(company, _roadmap(f"https://{company}"))
+    crud.set_url_status(USER, "https://Globex", True)
+    store.calls.clear()
+
+    out = crud.get_roadmaps_by_user_id(USER)[USER]["roadmaps"]
+
+    assert set(out) == {"Acme", "Globex", "Initech"}
+    assert out["Globex"]["roadmap"][0]["checklist"][0]["checked"] is True
+    # user doc + three roadmap documents, in two round trips
+    assert _io("get_roadmaps") == (1, 4, 0)
+    assert store.calls == {"get": 1, "get_many": 1}
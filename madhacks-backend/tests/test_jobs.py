@@ -0,0 +1,82 @@
+"""Startup recovery of services.jobs.JobQueue."""
+
+import asyncio
+import sqlite3
+import subprocess
+import sys
+import time
+
+from services.admission import admission
+from services.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+def _insert(path, job_id, status, owner):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO jobs (id, kind, dedupe_key, status, payload, created_at, owner)"
+        " VALUES (?, 'roadmap', ?, ?, '{}', ?, ?)",
+        (job_id, job_id, status, time.time(), owner),
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_store_is_created_on_open_not_construction(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    queue = JobQueue(str(path))
+    assert not path.exists()
+    queue.open()
+    assert path.exists()
+
+
+def test_open_fails_only_jobs_of_stopped_processes(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobQueue(path)
+    first.open()
+    boot = first.owner.rpartition(":")[0]
+
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    try:
+        _insert(path, "live", RUNNING, f"{boot}:{live.pid}")
+        _insert(path, "dead", RUNNING, f"{boot}:{dead.pid}")
+        _insert(path, "rebooted", QUEUED, f"another-boot:{live.pid}")
+        _insert(path, "legacy", QUEUED, None)
+
+        second = JobQueue(path)
+        second.open()
+        status = {job_id: second.get(job_id)["status"] for job_id in ("live", "dead", "rebooted", "legacy")}
+    finally:
+        live.kill()
+        live.wait()
+
+    assert status == {"live": RUNNING, "dead": FAILED, "rebooted": FAILED, "legacy": FAILED}
+
+
+def test_only_submitters_can_read_a_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+    async def handler(payload):
+        return {"echo": payload}
+
+    queue.register("echo", handler)
+
+    async def submit(client):
+        admission.bind((client, "roadmap"))
+        job, _ = await queue.submit("echo", {"x": 1})
+        return job["id"]
+
+    async def main():
+        job_id = await submit("uid:a")
+        assert await submit("uid:b") == job_id
+        job = await queue.wait(job_id, 5, "uid:a")
+        while job["status"] != SUCCEEDED:
+            job = await queue.wait(job_id, 5, "uid:a")
+        return job_id, job
+
+    job_id, job = asyncio.run(main())
+    assert job["result"] == {"echo": {"x": 1}}
+    assert queue.get(job_id, "uid:b")["status"] == SUCCEEDED
+    assert queue.get(job_id, "ip:10.0.0.1") is None
+    assert queue.cancel(job_id, "ip:10.0.0.1") is None
@@ -0,0 +1,28 @@
+"""Lenient decoding of model output (services.schemas)."""
+
+import json
+
+from services.schemas import RoadmapOutput, decode_output
+
+
+def _decode_day(**fields) -> dict:
+    day = {"checklist": [{"type": "study", "title": "Arrays", "url": "https://a"}], **fields}
+    data, repaired = decode_output(RoadmapOutput, json.dumps({"roadmap": [day]}), "roadmap")
+    assert not repaired
+    return data["roadmap"][0]
+
+
+def test_day_label_becomes_its_number():
+    assert _decode_day(day="Day 3")["day"] == 3
+
+
+def test_hours_take_the_leading_number():
+    assert _decode_day(hours_allocated="2 hours")["hours_allocated"] == 2.0
+    assert _decode_day(hours_allocated="1.5h")["hours_allocated"] == 1.5
+    assert _decode_day(hours_allocated="a few")["hours_allocated"] is None
+
+
+def test_null_title_becomes_empty():
+    day = _decode_day(checklist=[{"title": None, "url": "https://leetcode.com/problems/two-sum/"}])
+    assert day["checklist"][0]["title"] == ""
+    assert day["checklist"][0]["type"] == "leetcode"
@@ -0,0 +1,65 @@
+"""Canonical topic resolution (services.topics)."""
+
+import pytest
+
+from services.leetcode import solved_summary
+from services.topics import canonicalize_profile, resolve, resolve_tag, topic_id
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Hash Table", "hash-maps"),
+        ("hashmap", "hash-maps"),
+        ("Arrays & Hashing", "arrays"),
+        ("graph algorithms", "graphs"),
+        ("DSU", "union-find"),
+        ("prim", "minimum-spanning-tree"),
+        ("OS", "operating-systems"),
+        ("lru cache", "data-structure-design"),
+    ],
+)
+def test_synonyms(name, expected):
+    assert topic_id(name) == expected
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Dynamic Programing", "dynamic-programming"),
+        ("Hash Tabel", "hash-maps"),
+        ("Sliding Windw", "sliding-window"),
+        ("Topological sortng", "topological-sort"),
+    ],
+)
+def test_fuzzy_matches(name, expected):
+    assert topic_id(name) == expected
+
+
+@pytest.mark.parametrize("name", ["Primes", "Prime", "Design", "Designs", "Sets", "Memo"])
+def test_near_misses_stay_unknown(name):
+    topic = resolve(name)
+    assert topic.kind is None
+    assert topic.name == name
+
+
+def test_design_tag_is_data_structure_design():
+    assert resolve_tag("Design").id == "data-structure-design"
+    assert resolve_tag("Hash Table").id == "hash-maps"
+    assert topic_id("Design") != resolve_tag("Design").id
+
+
+def test_solved_summary_folds_tags():
+    summary = solved_summary({
+        "Design": {"Easy": 1, "Medium": 2, "Hard": 0, "Total": 3},
+        "Hash Table": {"Easy": 4, "Medium": 0, "Hard": 0, "Total": 4},
+    })
+    assert set(summary) == {"data structure design", "hash maps"}
+
+
+def test_profile_merges_duplicates():
+    profile = canonicalize_profile({
+        "Hash Table": {"importance": 6, "confidence": 7},
+        "hashing": {"importance": 8, "confidence": 4},
+    })
+    assert profile == {"hash maps": {"importance": 8, "confidence": 4}}